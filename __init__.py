@@ -1,46 +1,83 @@
 import bpy
 import os
+import time
 if "bake_logic" in locals():
     import importlib
+    importlib.reload(registry)
+    importlib.reload(hash_utils)
+    importlib.reload(bake_cache)
+    importlib.reload(material_dedup)
+    importlib.reload(texture_transfer)
+    importlib.reload(png_writer)
+    importlib.reload(modal_steps)
+    importlib.reload(instrument)
+    importlib.reload(skintone)
+    importlib.reload(shader_warmup)
     importlib.reload(bake_logic)
+    importlib.reload(library_link)
+    importlib.reload(template_cache)
+    importlib.reload(gn_cache)
+    importlib.reload(variant_index)
+    importlib.reload(crowd)
+    importlib.reload(finalize_logic)
+    importlib.reload(export_stream)
+    importlib.reload(spec)
+    importlib.reload(batch)
 else:
+    from . import registry
+    from . import hash_utils
+    from . import bake_cache
+    from . import material_dedup
+    from . import texture_transfer
+    from . import png_writer
+    from . import modal_steps
+    from . import instrument
+    from . import skintone
+    from . import shader_warmup
     from . import bake_logic
+    from . import library_link
+    from . import template_cache
+    from . import gn_cache
+    from . import variant_index
+    from . import crowd
+    from . import finalize_logic
+    from . import export_stream
+    from . import spec
+    from . import batch
 
 ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
 LIB_PATH = os.path.join(ADDON_DIR, "resources", "CharLibrary.blend")
 
-# --- GET GN OBJ ---
-def get_obj1():
-    return next((o for o in bpy.data.objects if o.name.startswith("Beard_GN")), None)
-def get_obj2():
-    return next((o for o in bpy.data.objects if o.name.startswith("Cape_GN")), None)
-def get_obj3():
-    return next((o for o in bpy.data.objects if o.name.startswith("Earrings_GN")), None)
-def get_obj4():
-    return next((o for o in bpy.data.objects if o.name.startswith("FaceAcc_GN")), None)
-def get_obj5():
-    return next((o for o in bpy.data.objects if o.name.startswith("Gloves_GN")), None)
-def get_obj6():
-    return next((o for o in bpy.data.objects if o.name.startswith("Hair_GN")), None)
-def get_obj7():
-    return next((o for o in bpy.data.objects if o.name.startswith("HeadAcc_GN")), None)
-def get_obj8():
-    return next((o for o in bpy.data.objects if o.name.startswith("Overpants_GN")), None)
-def get_obj9():
-    return next((o for o in bpy.data.objects if o.name.startswith("Overshirt_GN")), None)
-def get_obj10():
-    return next((o for o in bpy.data.objects if o.name.startswith("Pants_GN")), None)
-def get_obj11():
-    return next((o for o in bpy.data.objects if o.name.startswith("Shoes_GN")), None)
-def get_obj12():
-    return next((o for o in bpy.data.objects if o.name.startswith("Undershirt_GN")), None)
-
 # --- 1. SPAWN OPERATOR ---
 class HYCHAR_OT_spawn_character(bpy.types.Operator):
     bl_idname = "hychar.spawn_character"
     bl_label = "Spawn Character"
     bl_description = "Appends character from the internal addon library folder"
 
+    mode: bpy.props.EnumProperty(
+        name="Spawn Mode",
+        items=[
+            ('APPEND', "Append", "Copy the whole character library into this file"),
+            ('LINK', "Link", "Link the library and override it; only finalized parts are made local"),
+        ],
+        default='APPEND'
+    )
+    use_template_cache: bpy.props.BoolProperty(
+        name="Use Template Cache",
+        description="Keep a hidden copy of the library character in memory and spawn from it instead of re-reading the file",
+        default=True
+    )
+    measure_size: bpy.props.BoolProperty(
+        name="Report File Size",
+        description="Save a temporary copy of the file after spawning and report its size",
+        default=False
+    )
+    warm_shaders: bpy.props.BoolProperty(
+        name="Warm Up Shaders",
+        description="After spawning, compile every Hy* material option in the background so switching them later doesn't stall Eevee",
+        default=False
+    )
+
     def execute(self, context):
         # 1. Force absolute path
         filepath = LIB_PATH
@@ -54,18 +91,46 @@ class HYCHAR_OT_spawn_character(bpy.types.Operator):
             return {'CANCELLED'}
 
         coll_name = "Master_Character_Collection"
-
-        with bpy.data.libraries.load(filepath, link=False) as (data_from, data_to):
-            if coll_name in data_from.collections:
-                data_to.collections = [coll_name]
+        t_start = time.perf_counter()
+
+        source = self.mode.lower()
+        if self.mode == 'LINK':
+            with instrument.stage("spawn.link"):
+                linked = library_link.link_collection(context, filepath, coll_name)
+            if not linked:
+                self.report({'ERROR'}, f"'{coll_name}' not found in {os.path.basename(filepath)}")
+                return {'CANCELLED'}
+        elif self.use_template_cache and template_cache.has_template():
+            with instrument.stage("spawn.template"):
+                template_cache.instantiate(context)
+            source = "template cache"
+        else:
+            with instrument.stage("spawn.append"):
+                with bpy.data.libraries.load(filepath, link=False) as (data_from, data_to):
+                    if coll_name in data_from.collections:
+                        data_to.collections = [coll_name]
+
+                for coll in data_to.collections:
+                    if coll:
+                        context.scene.collection.children.link(coll)
+            for coll in data_to.collections:
+                if coll and self.use_template_cache:
+                    budget = context.scene.hy_template_budget_mb * 1024 * 1024
+                    with instrument.stage("spawn.template_store"):
+                        stored = template_cache.store(coll, budget)
+                    if not stored:
+                        print(f"HyTailor Debug: template over {context.scene.hy_template_budget_mb} MB budget, not cached")
+        registry.invalidate()
+        spawn_time = time.perf_counter() - t_start
+
+        msg = f"Character Spawned! ({source}, {spawn_time:.2f}s"
+        if self.measure_size:
+            msg += f", file {library_link.measure_file_size() / (1024 * 1024):.1f} MB"
+        self.report({'INFO'}, msg + ")")
         
-        for coll in data_to.collections:
-            if coll:
-                context.scene.collection.children.link(coll)
-                
-        self.report({'INFO'}, "Character Spawned!")
-        
-        for area in context.screen.areas:
+        # No screen when running headless (blender --background)
+        areas = context.screen.areas if context.screen else []
+        for area in areas:
             if area.type == 'VIEW_3D':
                 # Loop through all spaces in the 3D area (usually just one, but safer)
                 for space in area.spaces:
@@ -73,23 +138,58 @@ class HYCHAR_OT_spawn_character(bpy.types.Operator):
                         # Stay in RENDERED if they are already there
                         if space.shading.type in {'SOLID', 'WIREFRAME'}:
                             space.shading.type = 'MATERIAL'
+
+        # Needs the viewport in Material Preview, which is why it comes last
+        if self.warm_shaders and registry.get_rig():
+            queued = shader_warmup.start(registry.get_rig())
+            if queued:
+                print(f"HyTailor Debug: warming up {queued} shader variants")
         return {'FINISHED'}
 
 # --- 2. BAKE OPERATOR ---
-class MESH_OT_clone_factory_final(bpy.types.Operator):
+class MESH_OT_clone_factory_final(modal_steps.StepOperator, bpy.types.Operator):
     bl_idname = "mesh.clone_factory_final"
     bl_label = "Bake & Clone Hierarchy"
     bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):
+    use_geometry_cache: bpy.props.BoolProperty(
+        name="Use Geometry Cache",
+        description="Reuse Geometry Nodes output stored by Bake Geometry instead of evaluating it again",
+        default=True
+    )
+    material_mode: bpy.props.EnumProperty(
+        name="Materials",
+        items=[
+            ('UNIQUE', "Unique", "Every character gets its own {PREFIX}_ copy of each material"),
+            ('SHARED', "Shared", "Reuse identical materials and baked images from characters finalized in shared mode"),
+        ],
+        default='UNIQUE'
+    )
+    incremental: bpy.props.BoolProperty(
+        name="Update Existing",
+        description="If this name was finalized before, rebuild only the meshes and materials whose inputs changed "
+                    "and keep its rig, widgets and unchanged pieces. Refused for baked characters",
+        default=False
+    )
+    crowd_mode: bpy.props.BoolProperty(
+        name="Crowd Mode",
+        description="Share identical meshes, widget meshes and armature data with characters finalized in crowd mode "
+                    "instead of giving this one its own copies",
+        default=False
+    )
+
+    # Runs blocking from scripts, or one object per timer tick from the UI (Esc cancels)
+    def steps(self, context):
         PREFIX = context.scene.custom_rig_prefix
         RIG_NAME = "CharRig" 
-        master_rig = bpy.data.objects.get(RIG_NAME)
+        master_rig = registry.get_rig()
         
         if not master_rig:
             self.report({'ERROR'}, f"Rig '{RIG_NAME}' not found!")
             return {'CANCELLED'}
         
+        self.watch(master_rig, master_rig.data, *master_rig.children_recursive)
+
         # --- SWITCH TO REST POSE ---
         # ensures GeoNodes meshes are captured in their neutral state
         old_pose_type = master_rig.data.pose_position
@@ -97,7 +197,77 @@ class MESH_OT_clone_factory_final(bpy.types.Operator):
         # Force a scene update so modifiers see the rest pose
         context.view_layer.update()
         # --------------------------------------
-        
+
+        # Everything created so far, so a cancelled run can be rolled back
+        state = {"copies": [], "widgets": {}, "materials": {}, "collections": []}
+        existing_col = bpy.data.collections.get((f"{PREFIX}_Collection", None))
+        manifest = finalize_logic.read_manifest(existing_col) if self.incremental else None
+        if manifest:
+            # Updating doesn't re-bake: changed pieces would lose their baked textures or mix
+            # with stale ones, and a bake also moves the UVs the manifest keys were taken from
+            baked = finalize_logic.baked_objects(list(existing_col.all_objects) + list(master_rig.children_recursive))
+            if baked:
+                master_rig.data.pose_position = old_pose_type
+                self.report({'ERROR'}, f"Can't update {PREFIX} in place: {baked[0]} has baked textures. "
+                                       f"Finalize under a new name, or remove {PREFIX}_Collection first")
+                return {'CANCELLED'}
+        try:
+            if manifest:
+                result = yield from self.update_steps(context, PREFIX, master_rig, existing_col, manifest, state)
+            else:
+                result = yield from self.clone_steps(context, PREFIX, RIG_NAME, master_rig, state)
+        except modal_steps.Cancelled:
+            removed = finalize_logic.remove_partial_clone(
+                state["copies"] + list(state["widgets"].values()), state["collections"], state["materials"].values()
+            )
+            master_rig.data.pose_position = old_pose_type
+            registry.invalidate()
+            self.report({'WARNING'}, f"Finalize cancelled, rolled back {removed} data-blocks")
+            return {'CANCELLED'}
+        if result is None:
+            master_rig.data.pose_position = old_pose_type
+            return {'CANCELLED'}
+        new_rig, mesh_copies, mod_timings, mod_errors, eval_time, geo_cache, deduper = result
+
+        ### TARGETED CLEANUP ###
+        # Remove only what the spawned template brought in, in one batched call
+        removed, cleanup_time = 0, 0.0
+        orig_coll = bpy.data.collections.get(("Master_Character_Collection", None))
+        if orig_coll:
+            with instrument.stage("finalize.cleanup"):
+                removed, cleanup_time = finalize_logic.cleanup_template(orig_coll)
+        registry.invalidate()
+
+        # This switches your NEW baked rig (with the prefix) to Pose Mode
+        if new_rig:
+            new_rig.data.pose_position = 'POSE'
+            context.view_layer.objects.active = new_rig
+            new_rig.select_set(True)
+        context.view_layer.update()
+        mod_time = eval_time + sum(mod_timings.values())
+        headline = f"Updated {PREFIX}: {state['update']}" if "update" in state else f"Baked {PREFIX} successfully!"
+        msg = (f"{headline} (modifiers {mod_time * 1000:.1f}ms for {len(mesh_copies)} meshes, "
+               f"cleanup removed {removed} IDs in {cleanup_time * 1000:.1f}ms)")
+        if geo_cache and geo_cache.hits:
+            msg += f" | {geo_cache.summary()}"
+        if deduper:
+            msg += f" | {deduper.summary()}"
+        if state.get("sharer"):
+            msg += f" | {state['sharer'].summary()}"
+        if mod_errors:
+            self.report({'WARNING'}, f"{msg} | {len(mod_errors)} modifier issue(s), see console")
+        else:
+            self.report({'INFO'}, msg)
+        return {'FINISHED'} 
+
+    def clone_steps(self, context, PREFIX, RIG_NAME, master_rig, state):
+        # Linked spawns: make local only what is about to be cloned
+        to_localize = [master_rig] + [c for c in master_rig.children_recursive if c.visible_get()]
+        if any(library_link.is_linked(o) for o in to_localize):
+            with instrument.stage("finalize.localize"):
+                library_link.localize_objects(to_localize)
+            registry.invalidate()
+
         bpy.ops.object.select_all(action='DESELECT')
         to_duplicate = []
         if master_rig.visible_get():
@@ -111,22 +281,35 @@ class MESH_OT_clone_factory_final(bpy.types.Operator):
 
         if len(to_duplicate) <= 1:
             self.report({'ERROR'}, "No visible meshes found to bake!")
-            return {'CANCELLED'}
+            return None
 
-        bpy.ops.object.duplicate()
-        copies = context.selected_objects
+        # Recorded on the collection so finalizing this prefix again can skip unchanged pieces
+        piece_keys = {}
+        if self.incremental:
+            piece_keys = finalize_logic.piece_keys([o for o in to_duplicate if o.type == 'MESH'])
+
+        with instrument.stage("finalize.duplicate"):
+            bpy.ops.object.duplicate()
+        copies = state["copies"]
+        copies.extend(context.selected_objects)
         new_rig = next((obj for obj in copies if obj.type == 'ARMATURE'), None)
         
         if not new_rig:
             self.report({'ERROR'}, "Failed to clone the rig correctly.")
-            return {'CANCELLED'}
+            raise modal_steps.Cancelled()
             
         new_rig.name = f"{PREFIX}_{RIG_NAME}"
+        sharer = crowd.CrowdSharer() if self.crowd_mode else None
+        if sharer:
+            with instrument.stage("finalize.crowd_share"):
+                sharer.share_armature(new_rig)
+        state["sharer"] = sharer
 
         new_col = bpy.data.collections.new(f"{PREFIX}_Collection")
         context.scene.collection.children.link(new_col)
         widget_col = bpy.data.collections.new(f"{PREFIX}_Rig_Widgets")
         new_col.children.link(widget_col)
+        state["collections"] += [new_col, widget_col]
         
         # Exclude widgets from view
         def exclude_collection(layer_col, target_name):
@@ -140,19 +323,34 @@ class MESH_OT_clone_factory_final(bpy.types.Operator):
         exclude_collection(context.view_layer.layer_collection, widget_col.name)
         
         # Bone Widgets
-        widget_map = {}
-        for bone in new_rig.pose.bones:
-            widget_obj = bone.custom_shape
-            if widget_obj:
-                if widget_obj.name not in widget_map:
-                    new_widget = widget_obj.copy()
-                    new_widget.name = f"{PREFIX}_WGT_{widget_obj.name}"
-                    new_widget.data = widget_obj.data.copy()
-                    widget_col.objects.link(new_widget)
-                    widget_map[widget_obj.name] = new_widget
-                bone.custom_shape = widget_map[widget_obj.name]
+        widget_map = state["widgets"]
+        with instrument.stage("finalize.widgets"):
+            for bone in new_rig.pose.bones:
+                widget_obj = bone.custom_shape
+                if widget_obj:
+                    if widget_obj.name not in widget_map:
+                        new_widget = library_link.localize(widget_obj.copy())
+                        new_widget.name = f"{PREFIX}_WGT_{widget_obj.name}"
+                        new_widget.data = sharer.widget_mesh(widget_obj.data) if sharer else widget_obj.data.copy()
+                        widget_col.objects.link(new_widget)
+                        widget_map[widget_obj.name] = new_widget
+                    bone.custom_shape = widget_map[widget_obj.name]
+
+        mesh_copies = [obj for obj in copies if obj.type == 'MESH']
+        self.progress_total = 1 + len(mesh_copies) + len(copies)
+        yield "clone rig and widgets"
                 
-        material_map = {} 
+        # Bake every modifier except Armature into the mesh data, one depsgraph evaluation for all
+        geo_cache = gn_cache.GeometryCache() if self.use_geometry_cache else None
+        mod_timings, mod_errors = {}, []
+        eval_time = yield from finalize_logic.iter_apply_modifiers(context, mesh_copies, geo_cache, mod_timings, mod_errors)
+        for name, seconds in mod_timings.items():
+            print(f"HyTailor Finalize: {name} modifiers applied in {seconds * 1000:.1f}ms")
+        for name, error in mod_errors:
+            print(f"HyTailor Finalize: {name}: {error}")
+
+        material_map = state["materials"]
+        deduper = material_dedup.MaterialDeduper() if self.material_mode == 'SHARED' else None
 
         for obj in copies:
             for col in obj.users_collection:
@@ -160,90 +358,151 @@ class MESH_OT_clone_factory_final(bpy.types.Operator):
             new_col.objects.link(obj)
 
             if obj.type == 'MESH':
-                context.view_layer.objects.active = obj
-                obj.parent = new_rig
-                mods_to_apply = [m.name for m in obj.modifiers if m.type != 'ARMATURE']
-                for m_name in mods_to_apply:
-                    try: bpy.ops.object.modifier_apply(modifier=m_name)
-                    except: pass
-                
-                # 2. Universal Material Prefixing
-                for slot in obj.material_slots:
-                    if slot.material:
-                        orig_mat = slot.material
-                        
-                        # Check if we already handled this material for another object 
-                        # or another slot on the Body
-                        if orig_mat not in material_map:
-                            new_mat = orig_mat.copy()
-                            # Apply the user's custom prefix from the UI
-                            new_mat.name = f"{PREFIX}_{orig_mat.name}"
-                            material_map[orig_mat] = new_mat
-                        
-                        # Assign the shared unique version
-                        slot.material = material_map[orig_mat]
-                
-                arm_mod = next((m for m in obj.modifiers if m.type == 'ARMATURE'), None)
-                if not arm_mod:
-                    arm_mod = obj.modifiers.new(name="Armature", type='ARMATURE')
-                arm_mod.object = new_rig
-                
+                self.attach_mesh(obj, PREFIX, new_rig, material_map, deduper, sharer)
                 clean_obj_name = obj.name.split(".")[0]
                 obj.name = f"{PREFIX}_{clean_obj_name}"
-
-        ### RECURSIVE SAFE CLEANUP ###
-        orig_coll = bpy.data.collections.get("Master_Character_Collection")
-        if orig_coll:
-            # 1. Use a set to collect EVERY object in the collection AND its sub-collections
-            all_objs = set()
-            def get_all_children(col):
-                for obj in col.objects:
-                    all_objs.add(obj)
-                for child_col in col.children:
-                    get_all_children(child_col)
-            
-            get_all_children(orig_coll)
-            
-            # 2. Collect the data-blocks from every object found
-            data_to_delete = {o.data for o in all_objs if o.data}
-
-            # 3. Delete the Objects first
-            for o in all_objs:
-                try:
-                    bpy.data.objects.remove(o, do_unlink=True)
-                except:
-                    pass
-            
-            # 4. Delete the Data-Blocks (This frees the names like "Body")
-            for data in data_to_delete:
-                try:
-                    if data.users == 0:
-                        if isinstance(data, bpy.types.Mesh):
-                            bpy.data.meshes.remove(data)
-                        elif isinstance(data, bpy.types.Armature):
-                            bpy.data.armatures.remove(data)
-                except:
-                    pass
-
-            # 5. Delete the main collection and all its sub-collections
-            def delete_sub_collections(col):
-                for child in col.children:
-                    delete_sub_collections(child)
-                bpy.data.collections.remove(col)
-            
-            delete_sub_collections(orig_coll)
-
-        # 6. Final safety purge for materials/textures
-        bpy.ops.outliner.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
-
-        # This switches your NEW baked rig (with the prefix) to Pose Mode
-        if new_rig:
-            new_rig.data.pose_position = 'POSE'
-            context.view_layer.objects.active = new_rig
-            new_rig.select_set(True)
-        context.view_layer.update()
-        self.report({'INFO'}, f"Baked {PREFIX} successfully!")
-        return {'FINISHED'} 
+            yield obj.name
+
+        if self.incremental:
+            finalize_logic.write_manifest(new_col, new_rig.name, {
+                name: {"object": f"{PREFIX}_{name}", "geometry": keys[0], "materials": keys[1]}
+                for name, keys in piece_keys.items()
+            })
+        return new_rig, mesh_copies, mod_timings, mod_errors, eval_time, geo_cache, deduper
+
+    def update_steps(self, context, PREFIX, master_rig, new_col, manifest, state):
+        """Incremental finalize: rebuild only the pieces of {PREFIX}_Collection whose keys changed.
+        The finalized rig and widgets are kept as they are."""
+        new_rig = bpy.data.objects.get((manifest["rig"], None))
+        if not new_rig:
+            self.report({'ERROR'}, f"'{manifest['rig']}' is gone; finalize under a new name instead")
+            return None
+        pieces = manifest["pieces"]
+
+        current = {finalize_logic.piece_name(o): o for o in master_rig.children_recursive
+                   if o.type == 'MESH' and o.visible_get()}
+        keys = finalize_logic.piece_keys(current.values())
+        rebuild, recolor, kept = [], [], []
+        for name, (geometry, materials) in keys.items():
+            old = pieces.get(name)
+            if not old or not bpy.data.objects.get((old["object"], None)) or old["geometry"] != geometry:
+                rebuild.append(name)
+            elif old["materials"] != materials:
+                recolor.append(name)
+            else:
+                kept.append(name)
+        dropped = [name for name in pieces if name not in current]
+
+        # Linked spawns: make local only what is about to be copied
+        to_localize = [master_rig] + [current[n] for n in rebuild + recolor]
+        if any(library_link.is_linked(o) for o in to_localize):
+            with instrument.stage("finalize.localize"):
+                library_link.localize_objects(to_localize)
+            registry.invalidate()
+            current = {finalize_logic.piece_name(o): o for o in master_rig.children_recursive
+                       if o.type == 'MESH' and o.visible_get()}
+
+        copies = state["copies"]
+        with instrument.stage("finalize.duplicate"):
+            for name in rebuild:
+                src = current[name]
+                copy = src.copy()
+                copy.data = src.data.copy()
+                new_col.objects.link(copy)
+                copies.append(copy)
+        self.progress_total = 1 + 2 * len(copies)
+        yield "compare manifest"
+
+        geo_cache = gn_cache.GeometryCache() if self.use_geometry_cache else None
+        mod_timings, mod_errors = {}, []
+        eval_time = yield from finalize_logic.iter_apply_modifiers(context, copies, geo_cache, mod_timings, mod_errors)
+        for name, seconds in mod_timings.items():
+            print(f"HyTailor Finalize: {name} modifiers applied in {seconds * 1000:.1f}ms")
+        for name, error in mod_errors:
+            print(f"HyTailor Finalize: {name}: {error}")
+
+        material_map = state["materials"]
+        deduper = material_dedup.MaterialDeduper() if self.material_mode == 'SHARED' else None
+        sharer = state["sharer"] = crowd.CrowdSharer() if self.crowd_mode else None
+        for obj in copies:
+            self.attach_mesh(obj, PREFIX, new_rig, material_map, deduper, sharer)
+            yield obj.name
+
+        # No yields from here on: the finalized character is only touched once nothing can be cancelled
+        old_objects = [bpy.data.objects.get((pieces[n]["object"], None)) for n in rebuild + dropped if n in pieces]
+        old_objects = [o for o in old_objects if o]
+        old_materials = set()
+        for name in recolor:
+            target = bpy.data.objects.get((pieces[name]["object"], None))
+            for slot, src_slot in zip(target.material_slots, current[name].material_slots):
+                if src_slot.material:
+                    old_materials.add(slot.material)
+                    if target.data.users > 1:
+                        # Crowd-shared mesh: don't recolor the other characters with it
+                        slot.link = 'OBJECT'
+                    slot.material = self.prefixed_material(src_slot.material, PREFIX, material_map, deduper)
+        referenced = {o.data for o in old_objects if o.data} | old_materials
+        referenced |= {s.material for o in old_objects for s in o.material_slots if s.material}
+        referenced.discard(None)
+        to_remove = finalize_logic.removable_ids(set(old_objects), referenced)
+        bpy.data.batch_remove(to_remove)
+
+        # New copies were made while the old ones still held their names; take them over
+        for orig_mat, new_mat in material_map.items():
+            wanted = f"{PREFIX}_{orig_mat.name}"
+            if new_mat.name != wanted and new_mat.name.startswith(f"{wanted}."):
+                new_mat.name = wanted
+        for name, obj in zip(rebuild, copies):
+            obj.name = f"{PREFIX}_{name}"
+            pieces[name] = {"object": obj.name, "geometry": keys[name][0], "materials": keys[name][1]}
+        for name in recolor:
+            pieces[name]["materials"] = keys[name][1]
+        for name in dropped:
+            del pieces[name]
+        finalize_logic.write_manifest(new_col, new_rig.name, pieces)
+
+        state["update"] = (f"rebuilt {len(rebuild)}, recolored {len(recolor)}, kept {len(kept)}, "
+                           f"removed {len(dropped)} piece(s)")
+        return new_rig, copies, mod_timings, mod_errors, eval_time, geo_cache, deduper
+
+    def prefixed_material(self, orig_mat, PREFIX, material_map, deduper):
+        # Check if we already handled this material for another object 
+        # or another slot on the Body
+        if orig_mat not in material_map:
+            # Shared mode repoints orig_mat's baked images before it's fingerprinted and copied
+            existing, fp = deduper.find(orig_mat) if deduper else (None, None)
+            if existing:
+                # Identical to one a previous character already owns
+                material_map[orig_mat] = existing
+            else:
+                new_mat = orig_mat.copy()
+                # Apply the user's custom prefix from the UI
+                new_mat.name = f"{PREFIX}_{orig_mat.name}"
+                if deduper:
+                    deduper.remember(new_mat, fp)
+                material_map[orig_mat] = new_mat
+        return material_map[orig_mat]
+
+    def attach_mesh(self, obj, PREFIX, new_rig, material_map, deduper, sharer=None):
+        """Parent a mesh copy to the finalized rig, give it the prefixed materials
+        and, in crowd mode, swap its mesh for an identical shared one"""
+        obj.parent = new_rig
+
+        # 2. Universal Material Prefixing
+        with instrument.stage("finalize.materials", obj.name):
+            for slot in obj.material_slots:
+                if slot.material:
+                    # Assign the shared unique version
+                    slot.material = self.prefixed_material(slot.material, PREFIX, material_map, deduper)
+
+        arm_mod = next((m for m in obj.modifiers if m.type == 'ARMATURE'), None)
+        if not arm_mod:
+            arm_mod = obj.modifiers.new(name="Armature", type='ARMATURE')
+        arm_mod.object = new_rig
+
+        if sharer:
+            with instrument.stage("finalize.crowd_share", obj.name):
+                sharer.share_mesh(obj)
 
 # --- 3. UI PANEL ---
 class UI_PT_CharacterCustomizer(bpy.types.Panel):
@@ -253,58 +512,64 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
     bl_region_type = 'UI'
     bl_category = 'HyTailor'
 
+    # Set per draw: memoized or uncached socket lookups (for timing comparisons)
+    resolve = staticmethod(registry.resolve_socket)
+
     def gv(self, mat_prefix, grp, sock):
-        obj = bpy.data.objects.get("Body")
-        if not obj: return 0
+        entry = self.resolve(mat_prefix, grp, sock)
+        if not entry: return 0
+        s, prop = entry
+        if prop == "enum_value": return 0
         try:
-            # Find the first slot where the material name starts with our prefix
-            slot = next((s for s in obj.material_slots if s.material and s.material.name.startswith(mat_prefix)), None)
-            if not slot: return 0
-            
-            node = slot.material.node_tree.nodes.get(grp)
-            s = node.inputs.get(sock)
-            for p in ["index", "value", "default_value"]:
-                if hasattr(s, p): return getattr(s, p)
+            return getattr(s, prop)
+        except ReferenceError as e:
+            # Material or node was removed since the lookup was cached
+            instrument.swallowed("panel.stale_socket", e)
+            registry.invalidate()
             return 0
-        except: return 0
 
     def mat_ui(self, layout, mat_prefix, grp, sock, text=""):
-        obj = bpy.data.objects.get("Body")
-        if not obj: return
+        entry = self.resolve(mat_prefix, grp, sock)
+        if not entry: return
+        s, prop = entry
         try:
-            # KEEPING YOUR LOGIC: Find slot where material name starts with prefix
-            slot = next((s for s in obj.material_slots if s.material and s.material.name.startswith(mat_prefix)), None)
-            if not slot: return
-            
-            node = slot.material.node_tree.nodes.get(grp)
-            s = node.inputs.get(sock)
-            prop = next((p for p in ["index", "value", "default_value", "enum_value"] if hasattr(s, p)), None)
-            
-            if prop:
-                # This split forces the 0.4 label ratio to match standard dropdowns
-                split = layout.split(factor=0.4)
-                split.label(text=text if text else s.name)
-                split.prop(s, prop, text="") # text="" prevents the double-label bug
-        except: pass
+            # This split forces the 0.4 label ratio to match standard dropdowns
+            split = layout.split(factor=0.4)
+            split.label(text=text if text else s.name)
+            split.prop(s, prop, text="") # text="" prevents the double-label bug
+        except ReferenceError as e:
+            instrument.swallowed("panel.stale_socket", e)
+            registry.invalidate()
+
+    def draw_export(self, layout, scene):
+        box = layout.box()
+        box.label(text="Export Characters", icon='EXPORT')
+        box.prop(scene, "hy_export_dir", text="")
+        row = box.row(align=True)
+        row.prop(scene, "hy_export_format", text="")
+        row.prop(scene, "hy_export_free", text="Free After", toggle=True)
+        op = box.operator("hychar.export_characters", text="EXPORT ALL FINALIZED", icon='FILE_3D')
+        op.directory = scene.hy_export_dir
+        op.format = scene.hy_export_format
+        op.free_after = scene.hy_export_free
 
     def draw(self, context):
+        scene = context.scene
+        self.resolve = registry.resolve_socket if scene.hy_use_ui_cache else registry.find_socket
+        t_start = time.perf_counter()
+        self.draw_panel(context)
+        instrument.record_draw_time(time.perf_counter() - t_start)
+
+    def draw_panel(self, context):
         layout = self.layout
         scene = context.scene
-        obj1 = get_obj1()
-        obj2 = get_obj2()
-        obj3 = get_obj3()
-        obj4 = get_obj4()
-        obj5 = get_obj5()
-        obj6 = get_obj6()
-        obj7 = get_obj7()
-        obj8 = get_obj8()
-        obj9 = get_obj9()
-        obj10 = get_obj10()
-        obj11 = get_obj11()
-        obj12 = get_obj12()
-        main_rig = bpy.data.objects.get("CharRig")
-
-        layout.operator("mesh.individual_bake", text="Bake Textures", icon='RENDER_STILL')
+        obj1 = registry.get_object("Beard_GN")
+        obj2 = registry.get_object("Cape_GN")
+        main_rig = registry.get_rig()
+
+        op = layout.operator("mesh.individual_bake", text="Bake Textures", icon='RENDER_STILL')
+        op.resolution_mode = scene.hy_bake_resolution
+        layout.prop(scene, "hy_bake_resolution", text="")
         # Create a sub-layout that is grayed out and indented
         sub = layout.column(align=True)
         sub.active = False  # Makes the text gray/subtle
@@ -315,10 +580,29 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
         row.label(text="Finalizes Textures", icon='INFO')
         
         layout.separator()
+        warmup = shader_warmup.STATUS
+        if warmup["running"]:
+            row = layout.row(align=True)
+            row.label(text=f"Warming shaders {warmup['variants']}/{warmup['total']} variants", icon='SHADING_RENDERED')
+            row.operator("hychar.warm_shaders", text="", icon='CANCEL').cancel = True
+        elif main_rig:
+            row = layout.row(align=True)
+            row.label(text=f"Warm-up: {warmup['message']}" if warmup["message"] else "Shaders not warmed up")
+            row.operator("hychar.warm_shaders", text="", icon='SHADING_RENDERED')
         if not main_rig:
             col = layout.column(align=True)
             col.scale_y = 2.0
-            col.operator("hychar.spawn_character", text="SPAWN CHARACTER", icon='APPEND_BLEND')
+            op = col.operator("hychar.spawn_character", text="SPAWN CHARACTER", icon='APPEND_BLEND')
+            op.mode = scene.hy_spawn_mode
+            op.warm_shaders = scene.hy_warm_shaders
+            layout.prop(scene, "hy_spawn_mode", expand=True)
+            layout.prop(scene, "hy_warm_shaders")
+            if template_cache.has_template():
+                row = layout.row(align=True)
+                row.label(text=f"Template cached (~{template_cache.estimate_bytes() / (1024 * 1024):.1f} MB)", icon='FILE_CACHE')
+                row.operator("hychar.free_template_cache", text="", icon='TRASH')
+            # Finalized characters can be exported without a live one in the scene
+            self.draw_export(layout, scene)
             return
             
 
@@ -326,18 +610,18 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             layout.label(text="Meshes missing!", icon='ERROR')
             return
 
-        gn1 = obj1.modifiers.get("GeometryNodes")
-        gn2 = obj2.modifiers.get("GeometryNodes")
-        gn3 = obj3.modifiers.get("GeometryNodes")
-        gn4 = obj4.modifiers.get("GeometryNodes")
-        gn5 = obj5.modifiers.get("GeometryNodes")
-        gn6 = obj6.modifiers.get("GeometryNodes")
-        gn7 = obj7.modifiers.get("GeometryNodes")
-        gn8 = obj8.modifiers.get("GeometryNodes")
-        gn9 = obj9.modifiers.get("GeometryNodes")
-        gn10 = obj10.modifiers.get("GeometryNodes")
-        gn11 = obj11.modifiers.get("GeometryNodes")
-        gn12 = obj12.modifiers.get("GeometryNodes")
+        gn1 = registry.get_modifier("Beard_GN")
+        gn2 = registry.get_modifier("Cape_GN")
+        gn3 = registry.get_modifier("Earrings_GN")
+        gn4 = registry.get_modifier("FaceAcc_GN")
+        gn5 = registry.get_modifier("Gloves_GN")
+        gn6 = registry.get_modifier("Hair_GN")
+        gn7 = registry.get_modifier("HeadAcc_GN")
+        gn8 = registry.get_modifier("Overpants_GN")
+        gn9 = registry.get_modifier("Overshirt_GN")
+        gn10 = registry.get_modifier("Pants_GN")
+        gn11 = registry.get_modifier("Shoes_GN")
+        gn12 = registry.get_modifier("Undershirt_GN")
         
         standard_materials = {
         "Faded Leather": "Faded Leather",
@@ -362,7 +646,9 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             split = col.split(factor=0.4)
             split.label(text="Skintone")
             
-            split.prop(scene, "hy_skintone_master", text="")
+            row = split.row(align=True)
+            row.prop(scene, "hy_skintone_master", text="")
+            row.prop(scene, "hy_skintone_scope", text="")
             self.mat_ui(col, "Ears", "HyEars", "Ears", text="Ears")
             self.mat_ui(col, "Mouth", "HyMouth", "Mouth Type", text="Mouth")
             col.separator()
@@ -388,7 +674,7 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             col = box.column(align=True)
             split = col.split(factor=0.4)
             split.label(text="Hair")
-            split.prop(gn6, '["Socket_2"]', text="")
+            split.prop(gn6, registry.style_path("Hair_GN", "hair"), text="")
             self.mat_ui(col, "Hair", "HyHair", "Hair Color", text="  └ Color")
             col.separator()
             self.mat_ui(col, "Eyebrows", "HyEyebrows", "Eyebrows", text="Eyebrows")
@@ -396,7 +682,7 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             col.separator()
             split = col.split(factor=0.4)
             split.label(text="Beard")
-            split.prop(gn1, '["Socket_4"]', text="")
+            split.prop(gn1, registry.style_path("Beard_GN", "beard"), text="")
             self.mat_ui(col, "Beard", "HyBeard", "Beard Color", text="  └ Color")
 
         # --- ACCESSORIES ---
@@ -408,7 +694,7 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             
             split = col.split(factor=0.4)
             split.label(text="Head Accessory")
-            split.prop(gn7, '["Socket_22"]', text="")
+            split.prop(gn7, registry.style_path("HeadAcc_GN", "head_acc"), text="")
             self.mat_ui(col, "HeadAcc", "HyHeadAcc", "Material Selection", text="  └ Material")
             val_head = self.gv("HeadAcc", "HyHeadAcc", "Material Selection")
             if val_head in standard_materials:
@@ -418,7 +704,7 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             
             split = col.split(factor=0.4)
             split.label(text="Face Accessory")
-            split.prop(gn4, '["Socket_21"]', text="")
+            split.prop(gn4, registry.style_path("FaceAcc_GN", "face_acc"), text="")
             self.mat_ui(col, "FaceAcc", "HyFaceAcc", "Material Selection", text="  └ Material")
             val_face = self.gv("FaceAcc", "HyFaceAcc", "Material Selection")
             if val_face in standard_materials:
@@ -427,13 +713,13 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             # --- Earrings Selection ---
             split = col.split(factor=0.4)
             split.label(text="Earrings")
-            split.prop(gn3, '["Socket_19"]', text="")
+            split.prop(gn3, registry.style_path("Earrings_GN", "earrings"), text="")
             
             split = col.split(factor=0.4)
             split.label(text="Side")
-            split.prop(gn3, '["Socket_20"]', text="")
+            split.prop(gn3, registry.style_path("Earrings_GN", "earring_side"), text="")
 
-            ear_choice = gn3["Socket_19"]
+            ear_choice = gn3[registry.STYLE_SOCKETS["Earrings_GN"]["earrings"]]
             # Map choice to the arguments needed by mat_ui
             # {index: (mat_prefix, grp, sock, label)}
             ear_map = {
@@ -461,7 +747,7 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             col.label(text="UNDERSHIRT", icon='MOD_CLOTH')
             split = col.split(factor=0.4)
             split.label(text="Style")
-            split.prop(gn12, '["Socket_4"]', text="")
+            split.prop(gn12, registry.style_path("Undershirt_GN", "undershirt"), text="")
             self.mat_ui(col, "Undershirt", "HyUndershirt", "Material Selection", text="  └ Material")
             val_utop = self.gv("Undershirt", "HyUndershirt", "Material Selection")
             if val_utop in standard_materials:
@@ -473,7 +759,7 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             col.label(text="OVERSHIRT", icon='MOD_CLOTH')
             split = col.split(factor=0.4)
             split.label(text="Style")
-            split.prop(gn9, '["Socket_4"]', text="")
+            split.prop(gn9, registry.style_path("Overshirt_GN", "overshirt"), text="")
             self.mat_ui(col, "Overshirt", "HyOvershirt", "Material Selection", text="  └ Material")
             val_over = self.gv("Overshirt", "HyOvershirt", "Material Selection")
             if val_over in standard_materials:
@@ -485,7 +771,7 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             col.label(text="GLOVES", icon='MOD_CLOTH')
             split = col.split(factor=0.4)
             split.label(text="Style")
-            split.prop(gn5, '["Socket_4"]', text="")
+            split.prop(gn5, registry.style_path("Gloves_GN", "gloves"), text="")
             self.mat_ui(col, "Gloves", "HyGloves", "Material Selection", text="  └ Material")
             val_glove = self.gv("Gloves", "HyGloves", "Material Selection")
             if val_glove in standard_materials:
@@ -498,7 +784,7 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             col.label(text="PANTS", icon='USER')
             split = col.split(factor=0.4)
             split.label(text="Style")
-            split.prop(gn10, '["Socket_4"]', text="")
+            split.prop(gn10, registry.style_path("Pants_GN", "pants"), text="")
             self.mat_ui(col, "Pants", "HyPants", "Material Selection", text="  └ Material")
             val_pants = self.gv("Pants", "HyPants", "Material Selection")
             if val_pants in standard_materials:
@@ -510,7 +796,7 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             col.label(text="OVERPANTS", icon='USER')
             split = col.split(factor=0.4)
             split.label(text="Style")
-            split.prop(gn8, '["Socket_4"]', text="")
+            split.prop(gn8, registry.style_path("Overpants_GN", "overpants"), text="")
             self.mat_ui(col, "Overpants", "HyOverpants", "Material Selection", text="  └ Material")
             val_opants = self.gv("Overpants", "HyOverpants", "Material Selection")
             if val_opants in standard_materials:
@@ -522,7 +808,7 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             col.label(text="SHOES", icon='MOD_DYNAMICPAINT')
             split = col.split(factor=0.4)
             split.label(text="Style")
-            split.prop(gn11, '["Socket_15"]', text="")
+            split.prop(gn11, registry.style_path("Shoes_GN", "shoes"), text="")
             self.mat_ui(col, "Shoes", "HyShoes", "Material Selection", text="  └ Material")
             val_shoes = self.gv("Shoes", "HyShoes", "Material Selection")
             if val_shoes in standard_materials:
@@ -536,10 +822,10 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
             col = box.column(align=True)
             split = col.split(factor=0.4)
             split.label(text="Style")
-            split.prop(gn2, '["Socket_17"]', text="")
+            split.prop(gn2, registry.style_path("Cape_GN", "cape"), text="")
             split = col.split(factor=0.4)
             split.label(text="Neck")
-            split.prop(gn2, '["Socket_18"]', text="")
+            split.prop(gn2, registry.style_path("Cape_GN", "cape_neck"), text="")
             self.mat_ui(col, "Cape", "HyCape", "Material Selection", text="  └ Material")
             val_cape = self.gv("Cape", "HyCape", "Material Selection")
             if val_cape in standard_materials:
@@ -551,67 +837,134 @@ class UI_PT_CharacterCustomizer(bpy.types.Panel):
         export_box.label(text="Finalize Character", icon='EXPORT')
         export_box.prop(scene, "custom_rig_prefix", text="Char Name:")
         
-        export_box.operator("mesh.clone_factory_final", text="APPLY TO CHARACTER", icon='DUPLICATE')
-        export_box.label(text="Note: Creates Single User Materials", icon='INFO')
+        export_box.operator("hychar.bake_geometry", text="Bake Geometry", icon='GEOMETRY_NODES')
+        existing_col = bpy.data.collections.get((f"{scene.custom_rig_prefix}_Collection", None))
+        can_update = existing_col is not None and finalize_logic.MANIFEST_KEY in existing_col
+        if can_update:
+            export_box.prop(scene, "hy_finalize_update", icon='FILE_REFRESH')
+        op = export_box.operator("mesh.clone_factory_final", text="APPLY TO CHARACTER", icon='DUPLICATE')
+        op.material_mode = scene.hy_material_mode
+        op.crowd_mode = scene.hy_crowd_mode
+        op.incremental = can_update and scene.hy_finalize_update
+        export_box.prop(scene, "hy_material_mode", expand=True)
+        export_box.prop(scene, "hy_crowd_mode")
+        if scene.hy_material_mode == 'SHARED':
+            export_box.label(text="Note: Identical Materials Are Shared", icon='INFO')
+            export_box.label(text="Edits Affect Every Character Using Them")
+        else:
+            export_box.label(text="Note: Creates Single User Materials", icon='INFO')
         export_box.label(text="Colors Still Accessible in Shaders")
+        self.draw_export(layout, scene)
         layout.label(text="HyTailor v1.0.6 | Created by DxF")
 
+        row = layout.row(align=True)
+        row.prop(scene, "hy_show_draw_time", text="Draw Time", toggle=True)
+        if scene.hy_show_draw_time:
+            row.prop(scene, "hy_use_ui_cache", text="Cache Lookups", toggle=True)
+            stats = instrument.DRAW_STATS
+            layout.label(text=f"Panel draw: {stats['avg'] * 1000:.2f} ms avg "
+                              f"({stats['last'] * 1000:.2f} ms last)", icon='TIME')
+
 def update_hy_skintone(self, context):
-    # Convert the slider integer to a string to avoid the Enum error
-    val_str = str(self.hy_skintone_master)
-    
-    obj = bpy.data.objects.get("Body") or context.active_object
-    if not obj or obj.type != 'MESH':
-        return
-
-    sync_map = {
-        "Body": "HyBody",
-        "Ears": "HyEars",
-        "Mouth": "HyMouth",
-        "Face": "HyFace"
-    }
-
-    for slot in obj.material_slots:
-        if not slot.material or not slot.material.use_nodes:
-            continue
-            
-        mat = slot.material
-        for prefix, group_name in sync_map.items():
-            if mat.name.startswith(prefix):
-                node = mat.node_tree.nodes.get(group_name)
-                if node:
-                    sk_input = node.inputs.get("Skintone")
-                    if not sk_input:
-                        sk_input = node.inputs[0]
-                        
-                    if sk_input:
-                        try:
-                            # Try setting it as a string first (for Enums)
-                            sk_input.default_value = val_str
-                        except TypeError:
-                            # Fallback to int if that specific socket actually is a number
-                            sk_input.default_value = self.hy_skintone_master
-    
-    # Refresh viewport to show the change
-    for area in context.screen.areas:
-        if area.type == 'VIEW_3D':
-            area.tag_redraw()
+    with instrument.stage("skintone"):
+        skintone.propagate(context, self.hy_skintone_master, self.hy_skintone_scope)
+
 # --- 4. REGISTRATION ---
 classes = (
     HYCHAR_OT_spawn_character, 
     MESH_OT_clone_factory_final, 
     UI_PT_CharacterCustomizer, 
-    bake_logic.MESH_OT_individual_bake
+    bake_logic.MESH_OT_individual_bake,
+    template_cache.HYCHAR_OT_free_template_cache,
+    gn_cache.HYCHAR_OT_bake_geometry,
+    export_stream.HYCHAR_OT_export_characters
 )
 
 def register():
     for cls in classes: bpy.utils.register_class(cls)
+    registry.register()
+    template_cache.register()
+    gn_cache.register()
+    bake_logic.register()
+    skintone.register()
+    shader_warmup.register()
+    instrument.register()
     bpy.types.Scene.ui_show_general = bpy.props.BoolProperty(default=True)
     bpy.types.Scene.ui_show_head = bpy.props.BoolProperty(default=False)
     bpy.types.Scene.ui_show_acc = bpy.props.BoolProperty(default=False)
     bpy.types.Scene.ui_show_body = bpy.props.BoolProperty(default=False)
     bpy.types.Scene.ui_show_cape = bpy.props.BoolProperty(default=False)
     bpy.types.Scene.custom_rig_prefix = bpy.props.StringProperty(name="Prefix", default="NewChar")
+    bpy.types.Scene.hy_spawn_mode = bpy.props.EnumProperty(
+    name="Spawn Mode",
+    items=[
+        ('APPEND', "Append", "Copy the whole character library into this file"),
+        ('LINK', "Link", "Link the library and override it; only finalized parts are made local"),
+    ],
+    default='APPEND'
+    )
+    bpy.types.Scene.hy_warm_shaders = bpy.props.BoolProperty(
+    name="Warm Up Shaders",
+    description="Compile every Hy* material option after spawning so later switches don't stall the viewport",
+    default=False
+    )
+    bpy.types.Scene.hy_template_budget_mb = bpy.props.IntProperty(
+    name="Template Cache Budget (MB)",
+    description="Characters estimated above this size aren't kept in the spawn template cache",
+    min=0,
+    default=512
+    )
+    bpy.types.Scene.hy_bake_resolution = bpy.props.EnumProperty(
+    name="Bake Resolution",
+    items=[
+        ('FIXED', "Fixed 512", "Every mesh gets a 512x512 texture"),
+        ('PREVIEW', "Preview", "Texel-density sized, small textures for quick looks"),
+        ('GAME', "Game", "Texel-density sized for real-time use"),
+        ('HERO', "Hero", "Texel-density sized for close-ups"),
+    ],
+    default='FIXED'
+    )
+    bpy.types.Scene.hy_material_mode = bpy.props.EnumProperty(
+    name="Finalize Materials",
+    items=[
+        ('UNIQUE', "Unique", "Every character gets its own copy of each material"),
+        ('SHARED', "Shared", "Reuse identical materials and baked images across characters (crowds)"),
+    ],
+    default='UNIQUE'
+    )
+    bpy.types.Scene.hy_crowd_mode = bpy.props.BoolProperty(
+    name="Crowd Mode",
+    description="Share identical meshes, widgets and armature data between finalized characters to save memory",
+    default=False
+    )
+    bpy.types.Scene.hy_export_dir = bpy.props.StringProperty(name="Export Folder", subtype='DIR_PATH', default="//export/")
+    bpy.types.Scene.hy_export_format = bpy.props.EnumProperty(name="Export Format", items=export_stream.FORMATS, default='GLB')
+    bpy.types.Scene.hy_export_free = bpy.props.BoolProperty(
+    name="Free After Export",
+    description="Remove each character from the file once written so memory stays flat",
+    default=False
+    )
+    bpy.types.Scene.hy_finalize_update = bpy.props.BoolProperty(
+    name="Update Changed Pieces Only",
+    description="This name was finalized before: rebuild only the meshes and materials whose inputs changed. "
+                "Needs the same spawned character it was finalized from; not available once either is baked",
+    default=False
+    )
+    bpy.types.Scene.hy_show_draw_time = bpy.props.BoolProperty(name="Show Draw Time", default=False)
+    bpy.types.Scene.hy_use_ui_cache = bpy.props.BoolProperty(
+    name="Cache Panel Lookups",
+    description="Resolve material sockets once instead of searching the Body materials on every redraw",
+    default=True
+    )
+    bpy.types.Scene.hy_skintone_scope = bpy.props.EnumProperty(
+    name="Skintone Scope",
+    items=[
+        ('LIVE', "Live", "Only the spawned character being edited"),
+        ('SELECTED', "Selected", "Characters with a selected mesh or rig, finalized ones included"),
+        ('ALL', "All", "Every character in the file"),
+    ],
+    default='LIVE'
+    )
     bpy.types.Scene.hy_skintone_master = bpy.props.IntProperty(
     name="Master Skintone",
     min=1,
@@ -621,14 +974,34 @@ def register():
     )
 
 def unregister():
+    instrument.unregister()
+    skintone.unregister()
+    shader_warmup.unregister()
     for cls in reversed(classes): bpy.utils.unregister_class(cls)
+    bake_logic.unregister()
+    gn_cache.unregister()
+    template_cache.unregister()
+    registry.unregister()
     del bpy.types.Scene.ui_show_general
     del bpy.types.Scene.ui_show_head
     del bpy.types.Scene.ui_show_acc
     del bpy.types.Scene.ui_show_body
     del bpy.types.Scene.ui_show_cape
     del bpy.types.Scene.custom_rig_prefix
+    del bpy.types.Scene.hy_spawn_mode
+    del bpy.types.Scene.hy_template_budget_mb
+    del bpy.types.Scene.hy_warm_shaders
+    del bpy.types.Scene.hy_bake_resolution
+    del bpy.types.Scene.hy_material_mode
+    del bpy.types.Scene.hy_crowd_mode
+    del bpy.types.Scene.hy_finalize_update
+    del bpy.types.Scene.hy_export_dir
+    del bpy.types.Scene.hy_export_format
+    del bpy.types.Scene.hy_export_free
+    del bpy.types.Scene.hy_show_draw_time
+    del bpy.types.Scene.hy_use_ui_cache
     del bpy.types.Scene.hy_skintone_master
+    del bpy.types.Scene.hy_skintone_scope
     
 
 if __name__ == "__main__":
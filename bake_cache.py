@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import shutil
+from contextlib import contextmanager
+from . import hash_utils
+
+# Bump when the bake output for identical inputs changes (margin, pass...)
+BAKE_VERSION = "diffuse-color-m2-v2"
+
+def bake_key(obj, uv_layer, resolution=512, method='CYCLES'):
+    """Content hash of everything a color bake of obj reads: topology, UVs, its material node trees,
+    the target size and the requested bake method ('DIRECT' transfer differs from Cycles at the margins)"""
+    h = hash_utils.new_hash()
+    h.update(f"{BAKE_VERSION}|res:{resolution}|method:{method}".encode())
+    hash_utils.hash_topology(obj.data, h, uv_layer)
+    seen = set()
+    for slot in obj.material_slots:
+        mat = slot.material
+        h.update(f"|slot:{mat.name if mat else None}".encode())
+        if mat and mat.node_tree:
+            hash_utils.hash_node_tree(mat.node_tree, h, seen)
+    return h.hexdigest()
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+LOCK_POLL_SECONDS = 0.05
+
+def _try_lock(fd):
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def index_lock(index_path):
+    """Cross-process lock around reading, merging and replacing a shared index. An OS file lock
+    (flock/msvcrt) on a .lock file next to it: the OS drops it when the holder exits or crashes,
+    so there is no stale lock to break. The file itself is left in place; deleting it would let
+    a waiter lock the old inode while a newcomer locks a new one."""
+    fd = os.open(f"{index_path}.lock", os.O_CREAT | os.O_RDWR)
+    try:
+        while not _try_lock(fd):
+            time.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+class BakeCache:
+    """On-disk store of baked PNGs keyed by bake_key, trimmed least-recently-used first"""
+
+    def __init__(self, cache_dir, limit_bytes):
+        self.cache_dir = cache_dir
+        self.limit_bytes = limit_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._read_index()
+        # Keys this run added/touched or deleted, merged into the on-disk index
+        # on save so parallel batch workers sharing the cache don't drop entries.
+        self._touched = set()
+        self._removed = set()
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def lookup(self, key):
+        entry = self.index.get(key)
+        path = self._path(key)
+        if entry and os.path.exists(path):
+            entry["last_used"] = time.time()
+            self._touched.add(key)
+            self.hits += 1
+            return path
+        if self.index.pop(key, None):
+            self._removed.add(key)
+        self.misses += 1
+        return None
+
+    def store(self, key, src_path):
+        dst = self._path(key)
+        tmp = f"{dst}.{os.getpid()}.tmp"
+        shutil.copyfile(src_path, tmp)
+        os.replace(tmp, dst)
+        self.index[key] = {"size": os.path.getsize(dst), "last_used": time.time()}
+        self._touched.add(key)
+        self._removed.discard(key)
+
+    def evict(self):
+        total = sum(e["size"] for e in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda kv: kv[1]["last_used"]):
+            if total <= self.limit_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            total -= entry["size"]
+            del self.index[key]
+            self._removed.add(key)
+            self.evicted += 1
+
+    def save(self):
+        # Another worker may save between our read and replace; hold the lock across both
+        with index_lock(self.index_path):
+            merged = self._read_index()
+            for key in self._removed:
+                merged.pop(key, None)
+            for key in self._touched:
+                if key in self.index:
+                    merged[key] = self.index[key]
+            self.index = merged
+            self.evict()
+            tmp = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.index, f)
+            os.replace(tmp, self.index_path)
+        self._touched.clear()
+        self._removed.clear()
+
+    def summary(self):
+        return f"cache {self.hits} hit(s), {self.misses} miss(es)" + (f", {self.evicted} evicted" if self.evicted else "")
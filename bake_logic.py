@@ -1,113 +1,538 @@
 import bpy
 import os
+import math
+import time
+import shutil
+import numpy as np
+from bpy.app.handlers import persistent
+from . import bake_cache
+from . import texture_transfer
+from . import png_writer
+from . import modal_steps
+from . import instrument
 
-class MESH_OT_individual_bake(bpy.types.Operator):
-    """Bake Individual - 512px, Closest Filtering, Restored UDIM Logic"""
+# Cycles time of the last per-object run and the meshes it baked, so a
+# single-pass bake of the same meshes can report a measured speedup (and any
+# other set only an estimate from the per-call average).
+_LAST_PER_OBJECT_BAKE = {"seconds": 0.0, "calls": 0, "meshes": frozenset()}
+
+# --- BULK UV HELPERS ---
+# foreach_get/foreach_set move the whole loop array in one call instead of
+# one RNA access per loop, which dominates on high-poly meshes.
+def read_uvs(uv_layer):
+    uvs = np.empty(len(uv_layer.data) * 2, dtype=np.float32)
+    uv_layer.data.foreach_get("uv", uvs)
+    return uvs.reshape(-1, 2)
+
+def write_uvs(uv_layer, uvs):
+    uv_layer.data.foreach_set("uv", uvs.ravel())
+
+def udim_offset(uvs):
+    # Same truncation as the old int(min(...)) generator passes
+    u_offset = int(uvs[:, 0].min())
+    v_offset = int(uvs[:, 1].min())
+    return u_offset, v_offset
+
+# --- TEXEL DENSITY SIZING ---
+# Every mesh used to get a 512x512 target, so an earring cost as much as the
+# body. Size each target from how much UV space the mesh covers relative to
+# its surface area instead: the smallest power of two that reaches the
+# preset's pixels-per-meter, clamped to the preset's range.
+FIXED_RESOLUTION = 512
+BYTES_PER_PIXEL = 4
+# preset: (pixels per meter, smallest size, largest size)
+RESOLUTION_PRESETS = {
+    'PREVIEW': (128.0, 32, 256),
+    'GAME': (512.0, 64, 1024),
+    'HERO': (2048.0, 256, 4096),
+}
+
+def surface_areas(obj, uvs):
+    """(UV area in tile units, world-space surface area) of obj's mesh"""
+    mesh = obj.data
+    n = len(mesh.polygons)
+    starts = np.empty(n, dtype=np.int32)
+    totals = np.empty(n, dtype=np.int32)
+    areas = np.empty(n, dtype=np.float32)
+    mesh.polygons.foreach_get("loop_start", starts)
+    mesh.polygons.foreach_get("loop_total", totals)
+    mesh.polygons.foreach_get("area", areas)
+
+    # Shoelace formula per polygon: each loop paired with the next one in its face
+    nxt = np.arange(1, len(uvs) + 1)
+    nxt[starts + totals - 1] = starts
+    cross = uvs[:, 0] * uvs[nxt, 1] - uvs[nxt, 0] * uvs[:, 1]
+    poly_of_loop = np.repeat(np.arange(n), totals)
+    uv_area = float(np.abs(np.bincount(poly_of_loop, weights=cross, minlength=n)).sum() * 0.5)
+
+    scale = abs(np.linalg.det(np.array(obj.matrix_world.to_3x3()))) ** (2.0 / 3.0)
+    return uv_area, float(areas.sum()) * scale
+
+def texel_resolution(uv_area, area, preset, density=0.0):
+    """Power-of-two size giving the preset's texel density (or density if set)"""
+    preset_density, smallest, largest = RESOLUTION_PRESETS[preset]
+    density = density or preset_density
+    if uv_area <= 0.0 or area <= 0.0:
+        return min(max(FIXED_RESOLUTION, smallest), largest)
+    needed = density * math.sqrt(area / uv_area)
+    size = 1 << max(0, math.ceil(math.log2(needed)))
+    return min(max(size, smallest), largest)
+
+def image_bytes(resolution):
+    return resolution * resolution * BYTES_PER_PIXEL
+
+# --- OUTPUT FOLDERS ---
+# Batch workers point these at their own folders so parallel processes
+# don't overwrite each other's {obj.name}_{tile}.png files.
+def get_bake_dir():
+    override = os.environ.get("HYTAILOR_BAKE_DIR")
+    if override:
+        return override
+    addon_dir = os.path.dirname(os.path.dirname(__file__))
+    return os.path.join(addon_dir, "library", "baked_textures")
+
+def get_cache_dir():
+    override = os.environ.get("HYTAILOR_BAKE_CACHE_DIR")
+    if override:
+        return override
+    addon_dir = os.path.dirname(os.path.dirname(__file__))
+    return os.path.join(addon_dir, "library", "bake_cache")
+
+# --- PER-MESH BAKE STATE ---
+class BakeJob:
+    """Everything set up on one mesh for a bake, so it can be finished and restored later"""
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.mat = obj.material_slots[0].material
+        self.original_uv = obj.data.uv_layers.active
+        self.bake_uv = None
+        self.bake_img = None
+        self.uv_src_node = None
+        self.target = None
+        self.uvs = None
+        self.shifted_uvs = None
+        self.tile_num = 1001
+        self.uv_offset = None
+        self.resolution = FIXED_RESOLUTION
+        self.file_path = None
+        self.cache_key = None
+        self.cached = False
+        self.method = 'CYCLES'
+        self.fallback = None
+        self.uv_time = 0.0
+        self.bake_time = 0.0
+
+def prepare_job(obj):
+    """Read UVs and work out the UDIM tile without touching the scene. None if the mesh can't bake."""
+    original_uv = obj.data.uv_layers.active
+    if not original_uv or not len(original_uv.data): return None
+    if not obj.material_slots or not obj.material_slots[0].material: return None
+
+    job = BakeJob(obj)
+
+    # 1. UDIM TILE CALCULATION
+    t_uv = time.perf_counter()
+    job.uvs = read_uvs(original_uv)
+    u_offset, v_offset = udim_offset(job.uvs)
+    job.uv_offset = np.array((u_offset, v_offset), dtype=np.float32)
+    job.shifted_uvs = job.uvs - job.uv_offset
+    job.tile_num = 1001 + u_offset + (v_offset * 10)
+    job.uv_time += time.perf_counter() - t_uv
+    return job
+
+def setup_job(job):
+    """Target image, temp UV layer and shader lock for a Cycles bake"""
+    obj = job.obj
+
+    # 2. TARGET IMAGE (512x512 unless sized by texel density)
+    temp_name = f"Bake_{obj.name}_{job.tile_num}"
+    job.bake_img = bpy.data.images.new(temp_name, job.resolution, job.resolution, alpha=True)
+
+    # 3. TEMP BAKE UV (Shifted for Target)
+    t_uv = time.perf_counter()
+    job.bake_uv = obj.data.uv_layers.new(name="TEMP_BAKEOFFSET")
+    write_uvs(job.bake_uv, job.shifted_uvs)
+    obj.data.uv_layers.active = job.bake_uv
+    job.uv_time += time.perf_counter() - t_uv
+
+    mat = job.mat
+    mat.use_nodes = True
+    nodes, links = mat.node_tree.nodes, mat.node_tree.links
+
+    # SHADER LOCK: Force sources to use original coordinates
+    job.uv_src_node = nodes.new('ShaderNodeUVMap')
+    job.uv_src_node.uv_map = job.original_uv.name
+    for node in nodes:
+        if node.type == 'TEX_IMAGE' and node.image and node.image.source == 'TILED':
+            links.new(job.uv_src_node.outputs['UV'], node.inputs['Vector'])
+
+    job.target = nodes.new('ShaderNodeTexImage')
+    job.target.image = job.bake_img
+    nodes.active = job.target
+
+def finish_job(job, lib_dir, writer, pixels=None):
+    """Queue the PNG write and use the baked image as the result directly, no reload"""
+    job.file_path = os.path.join(lib_dir, f"{job.obj.name}_{job.tile_num}.png")
+    img = job.bake_img
+    if pixels is None:
+        pixels = np.empty(len(img.pixels), dtype=np.float32)
+        img.pixels.foreach_get(pixels)
+    writer.submit(job.file_path, pixels, img.size[0], img.size[1])
+    img.name = os.path.basename(job.file_path)
+    img.filepath_raw = job.file_path
+    img.file_format = 'PNG'
+    apply_result(job, img)
+
+# Baked images keep their in-memory pixels (source GENERATED, filepath_raw set
+# to the written PNG): switching them to FILE would throw the buffer away and
+# reload it from disk. They're switched over only right before the .blend is
+# saved, so the file references the PNG instead of an empty generated image.
+BAKED_KEY = "hy_baked"
+
+def release_results(jobs, write_errors):
+    """Mark finished images as backed by their written PNGs; pack the ones that failed to write"""
+    for job in jobs:
+        if job.file_path in write_errors:
+            job.bake_img.pack()
+        else:
+            job.bake_img[BAKED_KEY] = True
+
+@persistent
+def _on_save_pre(*_args):
+    for img in bpy.data.images:
+        if img.source == 'GENERATED' and img.get(BAKED_KEY) and not img.packed_file:
+            img.source = 'FILE'
+
+def register():
+    if _on_save_pre not in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.append(_on_save_pre)
+
+def unregister():
+    if _on_save_pre in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(_on_save_pre)
+
+def transfer_job(job, depsgraph, sampler, lib_dir, writer):
+    """Fill the target straight from the source textures, no Cycles. Raises texture_transfer.Unsupported."""
+    t_bake = time.perf_counter()
+    with instrument.stage("bake.direct_eval", job.obj.name):
+        pixels = texture_transfer.transfer_pixels(job, depsgraph, sampler)
+    job.bake_img = bpy.data.images.new(f"Bake_{job.obj.name}_{job.tile_num}", job.resolution, job.resolution, alpha=True)
+    try:
+        job.bake_img.pixels.foreach_set(pixels)
+        job.bake_time = time.perf_counter() - t_bake
+        job.method = 'DIRECT'
+        finish_job(job, lib_dir, writer, pixels)
+    finally:
+        if job.bake_img.users == 0:
+            bpy.data.images.remove(job.bake_img)
+
+def apply_result(job, image=None):
+    """Move the UVs into 0-1 space and wire image (or job.file_path, loaded) up as BAKED_RESULT"""
+    nodes, links = job.mat.node_tree.nodes, job.mat.node_tree.links
+
+    # 5. SHIFT ORIGINAL UVS TO 0-1 SPACE
+    t_uv = time.perf_counter()
+    write_uvs(job.original_uv, job.shifted_uvs)
+    job.uv_time += time.perf_counter() - t_uv
+
+    # 4. BUILD THE DIFFUSE / MIX / TRANSPARENT CHAIN
+    res_node = nodes.new('ShaderNodeTexImage')
+    res_node.name = "BAKED_RESULT"
+    res_node.image = image or bpy.data.images.load(job.file_path)
+
+    # SET INTERPOLATION TO CLOSEST
+    res_node.interpolation = 'Closest'
+    res_node.extension = 'CLIP'
+
+    diffuse = nodes.new('ShaderNodeBsdfDiffuse')
+    transparent = nodes.new('ShaderNodeBsdfTransparent')
+    mix = nodes.new('ShaderNodeMixShader')
+    output = next((n for n in nodes if n.type == 'OUTPUT_MATERIAL'), nodes.new('ShaderNodeOutputMaterial'))
+
+    # Linking logic
+    links.new(res_node.outputs['Color'], diffuse.inputs['Color'])
+    links.new(res_node.outputs['Alpha'], mix.inputs['Factor'])
+    links.new(transparent.outputs['BSDF'], mix.inputs[1])
+    links.new(diffuse.outputs['BSDF'], mix.inputs[2])
+    links.new(mix.outputs['Shader'], output.inputs['Surface'])
+
+def restore_job(job):
+    """Undo whatever setup_job got through, so a job that failed halfway leaves nothing behind"""
+    obj = job.obj
+    if job.bake_uv is not None:
+        if "TEMP_BAKEOFFSET" in obj.data.uv_layers:
+            obj.data.uv_layers.remove(job.bake_uv)
+        obj.data.uv_layers.active = job.original_uv
+        job.bake_uv = None
+    nodes = job.mat.node_tree.nodes if job.mat.node_tree else None
+    for node in (job.uv_src_node, job.target):
+        if node is not None and nodes is not None:
+            nodes.remove(node)
+    job.uv_src_node = job.target = None
+    if job.bake_img is not None and job.bake_img.users == 0:
+        bpy.data.images.remove(job.bake_img)
+        job.bake_img = None
+
+def run_bake():
+    bpy.ops.object.bake(type='DIFFUSE', pass_filter={'COLOR'}, margin=2, use_clear=True)
+
+class MESH_OT_individual_bake(modal_steps.StepOperator, bpy.types.Operator):
+    """Bake Individual - 512px or texel-density sized, Closest Filtering, Restored UDIM Logic"""
     bl_idname = "mesh.individual_bake"
     bl_label = "Bake Individual"
     bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):
+    single_pass: bpy.props.BoolProperty(
+        name="Single Bake Pass",
+        description="Bake every selected mesh in one Cycles call instead of one call per object",
+        default=False
+    )
+    resolution_mode: bpy.props.EnumProperty(
+        name="Resolution",
+        items=[
+            ('FIXED', "Fixed 512", "Every mesh gets a 512x512 texture"),
+            ('PREVIEW', "Preview", "Size by texel density, 128 px/m, 32-256 px"),
+            ('GAME', "Game", "Size by texel density, 512 px/m, 64-1024 px"),
+            ('HERO', "Hero", "Size by texel density, 2048 px/m, 256-4096 px"),
+        ],
+        default='FIXED'
+    )
+    texel_density: bpy.props.FloatProperty(
+        name="Texel Density (px/m)",
+        description="Overrides the preset's pixels per meter when above 0",
+        min=0.0,
+        default=0.0
+    )
+    use_direct_transfer: bpy.props.BoolProperty(
+        name="Direct Texture Transfer",
+        description="Copy pixels straight from the source textures for materials that only pick and tint images; "
+                    "anything else still goes through Cycles. Faster, but the margin is a plain texel dilation "
+                    "rather than Cycles' adjacent-faces margin",
+        default=False
+    )
+    png_compression: bpy.props.IntProperty(
+        name="PNG Compression",
+        description="zlib level for baked PNGs: low for fast iteration, 9 for the smallest final files",
+        min=0,
+        max=9,
+        default=png_writer.DEFAULT_LEVEL
+    )
+    use_cache: bpy.props.BoolProperty(
+        name="Use Bake Cache",
+        description="Reuse a previous bake when the mesh, UVs, material values and source images are unchanged",
+        default=True
+    )
+    cache_limit_mb: bpy.props.IntProperty(
+        name="Cache Size (MB)",
+        description="Least recently used bakes are deleted once the cache grows past this size",
+        min=1,
+        default=256
+    )
+
+    # execute() and the modal invoke() come from StepOperator; each step bakes one mesh
+    def steps(self, context):
         selected_objs = [
-            obj for obj in context.selected_objects 
+            obj for obj in context.selected_objects
             if obj.type == 'MESH' and not obj.name.split('.')[0].endswith(("Mouth", "Ears"))
         ]
-        
+
         if not selected_objs:
             self.report({'WARNING'}, "No valid mesh objects selected (Mouth meshes excluded).")
             return {'CANCELLED'}
-        
-        addon_dir = os.path.dirname(os.path.dirname(__file__))
-        lib_dir = os.path.join(addon_dir, "library", "baked_textures")
+
+        self.watch(*selected_objs)
+        lib_dir = get_bake_dir()
         if not os.path.exists(lib_dir):
             os.makedirs(lib_dir)
 
-        for obj in selected_objs:
+        context.view_layer.objects.active = selected_objs[0]
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        t_run = time.perf_counter()
+        with instrument.stage("bake.prepare"):
+            jobs = [job for job in map(prepare_job, selected_objs) if job]
+        if self.resolution_mode != 'FIXED':
+            for job in jobs:
+                t_uv = time.perf_counter()
+                uv_area, area = surface_areas(job.obj, job.shifted_uvs)
+                job.resolution = texel_resolution(uv_area, area, self.resolution_mode, self.texel_density)
+                job.uv_time += time.perf_counter() - t_uv
+
+        # CACHE HITS: copy the stored PNG and wire it up, no bake needed
+        cache = None
+        if self.use_cache:
+            cache = bake_cache.BakeCache(get_cache_dir(), self.cache_limit_mb * 1024 * 1024)
+            # A run with direct transfer on is cached apart from a Cycles-only run
+            method = 'DIRECT' if self.use_direct_transfer else 'CYCLES'
+            for job in jobs:
+                job.cache_key = bake_cache.bake_key(job.obj, job.original_uv, job.resolution, method)
+                cached_path = cache.lookup(job.cache_key)
+                if cached_path:
+                    job.file_path = os.path.join(lib_dir, f"{job.obj.name}_{job.tile_num}.png")
+                    shutil.copyfile(cached_path, job.file_path)
+                    apply_result(job)
+                    job.cached = True
+        pending = [job for job in jobs if not job.cached]
+
+        to_bake = self.progress_total = len(pending)
+
+        # PNGs are encoded in the background while the next mesh bakes
+        writer = png_writer.PngWriter(self.png_compression)
+        scene = context.scene
+        old_engine, old_samples = scene.render.engine, scene.cycles.samples
+        transferred, baked, bake_calls = [], [], []
+        cancelled = False
+        try:
+            # DIRECT PATH: simple image/tint materials never reach the renderer
+            if self.use_direct_transfer:
+                sampler = texture_transfer.ImageSampler()
+                for job in pending:
+                    try:
+                        transfer_job(job, context.evaluated_depsgraph_get(), sampler, lib_dir, writer)
+                    except texture_transfer.Unsupported as e:
+                        instrument.swallowed("bake.direct_fallback")
+                        job.fallback = str(e)
+                        continue
+                    transferred.append(job)
+                    yield job.obj.name
+                pending = [job for job in pending if job.method != 'DIRECT']
+
+            if pending:
+                scene.render.engine = 'CYCLES'
+                scene.cycles.samples = 1
+            self.progress_total = self.progress_done + len(pending)
+            if self.single_pass:
+                yield from self.bake_single_pass(context, pending, lib_dir, writer, baked, bake_calls)
+            else:
+                yield from self.bake_per_object(context, pending, lib_dir, writer, baked, bake_calls)
+        except modal_steps.Cancelled:
+            # Meshes already finished keep their result; the one in progress was restored
+            cancelled = True
+        finally:
+            with instrument.stage("bake.png_wait"):
+                encode_time, write_errors = writer.wait()
+            scene.render.engine = old_engine
+            scene.cycles.samples = old_samples
+        bake_total = sum(bake_calls)
+        release_results(transferred + baked, write_errors)
+        run_time = time.perf_counter() - t_run
+
+        for path, error in write_errors.items():
+            print(f"HyTailor Bake: could not write {path}: {error} (image packed instead)")
+        if cache:
+            for job in transferred + baked:
+                if job.file_path not in write_errors:
+                    cache.store(job.cache_key, job.file_path)
+            cache.save()
+        jobs = [job for job in jobs if job.cached] + transferred + baked
+
+        # PER-MESH TIMING BREAKDOWN
+        for job in jobs:
+            print(f"HyTailor Bake: {job.obj.name} ({len(job.uvs)} loops, {job.resolution}px) "
+                  f"uv={job.uv_time * 1000:.1f}ms bake={job.bake_time * 1000:.1f}ms "
+                  + ("(cached)" if job.cached else f"({job.method.lower()}"
+                     + (f", fallback: {job.fallback})" if job.fallback else ")")))
+
+        if not jobs:
+            self.report({'WARNING'}, "Nothing was baked (meshes need UVs and a material).")
+            return {'FINISHED'}
+
+        uv_total = sum(job.uv_time for job in jobs)
+        share = (uv_total / bake_total * 100) if bake_total else 0.0
+        msg = (f"Done {len(jobs)} meshes ({len(transferred)} direct, {len(baked)} baked in {len(bake_calls)} call(s)), "
+               f"{run_time:.2f}s | "
+               f"UV {uv_total * 1000:.1f}ms ({share:.1f}% of bake) | PNG {encode_time * 1000:.0f}ms in background")
+
+        meshes = frozenset(job.obj.name for job in baked)
+        last = _LAST_PER_OBJECT_BAKE
+        if self.single_pass:
+            if last["calls"] and bake_total and meshes == last["meshes"]:
+                msg += f" | {last['seconds'] / bake_total:.1f}x vs per-object run of the same meshes"
+            elif last["calls"] and bake_total:
+                estimate = last["seconds"] / last["calls"] * len(baked)
+                msg += (f" | ~{estimate / bake_total:.1f}x, estimated from last per-object run "
+                        f"({last['calls']} meshes)")
+        elif bake_calls:
+            last.update(seconds=bake_total, calls=len(bake_calls), meshes=meshes)
+
+        if self.resolution_mode != 'FIXED':
+            saved = sum(image_bytes(FIXED_RESOLUTION) - image_bytes(job.resolution) for job in jobs)
+            msg += f" | {saved / (1024 * 1024):+.1f} MB saved vs 512px"
+        if cache:
+            msg += f" | {cache.summary()}"
+        if write_errors:
+            msg += f" | {len(write_errors)} PNG(s) failed to write, packed instead"
+        if cancelled:
+            msg = f"Cancelled after {len(transferred) + len(baked)} of {to_bake} meshes | {msg}"
+        # FINISHED even when cancelled, so the meshes that did finish get an undo step
+        self.report({'WARNING'} if write_errors or cancelled else {'INFO'}, msg)
+        return {'FINISHED'}
+
+    # Both bake paths are step generators: they bake prepared jobs, append the finished ones
+    # to done and the duration of every Cycles call to bake_calls, and yield after each call
+    def bake_per_object(self, context, jobs, lib_dir, writer, done, bake_calls):
+        for job in jobs:
             # DESELECT ALL AND SELECT ONLY THIS MESH
             bpy.ops.object.select_all(action='DESELECT')
-            obj.select_set(True)
-            context.view_layer.objects.active = obj
-            bpy.ops.object.mode_set(mode='OBJECT')
-            context.scene.render.engine = 'CYCLES'
-            context.scene.cycles.samples = 1
-            
-            # 1. UDIM TILE CALCULATION
-            original_uv = obj.data.uv_layers.active
-            if not original_uv: continue
-            u_offset = int(min(d.uv[0] for d in original_uv.data))
-            v_offset = int(min(d.uv[1] for d in original_uv.data))
-            tile_num = 1001 + u_offset + (v_offset * 10)
-
-            # 2. TARGET IMAGE (Set to 512x512)
-            temp_name = f"Bake_{obj.name}_{tile_num}"
-            bake_img = bpy.data.images.new(temp_name, 512, 512, alpha=True)
-
-            # 3. TEMP BAKE UV (Shifted for Target)
-            bake_uv = obj.data.uv_layers.new(name="TEMP_BAKEOFFSET")
-            for i in range(len(bake_uv.data)):
-                bake_uv.data[i].uv[0] = original_uv.data[i].uv[0] - u_offset
-                bake_uv.data[i].uv[1] = original_uv.data[i].uv[1] - v_offset
-            obj.data.uv_layers.active = bake_uv
-
-            if obj.material_slots and obj.material_slots[0].material:
-                mat = obj.material_slots[0].material
-                mat.use_nodes = True
-                nodes, links = mat.node_tree.nodes, mat.node_tree.links
-                
-                # SHADER LOCK: Force sources to use original coordinates
-                uv_src_node = nodes.new('ShaderNodeUVMap')
-                uv_src_node.uv_map = original_uv.name
-                for node in nodes:
-                    if node.type == 'TEX_IMAGE' and node.image and node.image.source == 'TILED':
-                        links.new(uv_src_node.outputs['UV'], node.inputs['Vector'])
-
-                target = nodes.new('ShaderNodeTexImage')
-                target.image = bake_img
-                nodes.active = target
-
-                try:
-                    # PERFORM BAKE
-                    bpy.ops.object.bake(type='DIFFUSE', pass_filter={'COLOR'}, margin=2, use_clear=True)
-                    
-                    file_path = os.path.join(lib_dir, f"{obj.name}_{tile_num}.png")
-                    bake_img.filepath_raw = file_path
-                    bake_img.file_format = 'PNG'
-                    bake_img.save()
-                    
-                    # 5. SHIFT ORIGINAL UVS TO 0-1 SPACE
-                    for i in range(len(original_uv.data)):
-                        original_uv.data[i].uv[0] -= u_offset
-                        original_uv.data[i].uv[1] -= v_offset
-                    
-                    # 4. BUILD THE DIFFUSE / MIX / TRANSPARENT CHAIN
-                    res_node = nodes.new('ShaderNodeTexImage')
-                    res_node.name = "BAKED_RESULT"
-                    res_node.image = bpy.data.images.load(file_path)
-                    
-                    # SET INTERPOLATION TO CLOSEST
-                    res_node.interpolation = 'Closest'
-                    res_node.extension = 'CLIP'
-                    
-                    diffuse = nodes.new('ShaderNodeBsdfDiffuse')
-                    transparent = nodes.new('ShaderNodeBsdfTransparent')
-                    mix = nodes.new('ShaderNodeMixShader')
-                    output = next((n for n in nodes if n.type == 'OUTPUT_MATERIAL'), nodes.new('ShaderNodeOutputMaterial'))
-
-                    # Linking logic
-                    links.new(res_node.outputs['Color'], diffuse.inputs['Color'])
-                    links.new(res_node.outputs['Alpha'], mix.inputs['Factor'])
-                    links.new(transparent.outputs['BSDF'], mix.inputs[1])
-                    links.new(diffuse.outputs['BSDF'], mix.inputs[2])
-                    links.new(mix.outputs['Shader'], output.inputs['Surface'])
-
-                finally:
-                    # RESTORE
-                    if "TEMP_BAKEOFFSET" in obj.data.uv_layers:
-                        obj.data.uv_layers.remove(bake_uv)
-                    obj.data.uv_layers.active = original_uv
-                    nodes.remove(uv_src_node)
-                    nodes.remove(target)
-                    if bake_img.users == 0:
-                        bpy.data.images.remove(bake_img)
-
-        return {'FINISHED'}
\ No newline at end of file
+            job.obj.select_set(True)
+            context.view_layer.objects.active = job.obj
+
+            try:
+                setup_job(job)
+                # PERFORM BAKE
+                t_bake = time.perf_counter()
+                with instrument.stage("bake.cycles", job.obj.name):
+                    run_bake()
+                job.bake_time = time.perf_counter() - t_bake
+                bake_calls.append(job.bake_time)
+                finish_job(job, lib_dir, writer)
+            finally:
+                # RESTORE
+                restore_job(job)
+            done.append(job)
+            yield job.obj.name
+
+    def bake_single_pass(self, context, jobs, lib_dir, writer, done, bake_calls):
+        # Cycles bakes each selected object into the active image node of its own
+        # material, so one call fills every target. Meshes sharing a material in
+        # any slot or mesh data would fight over the same node/UV layer and go per-object.
+        batch, leftovers = [], []
+        seen_mats, seen_meshes = set(), set()
+        for job in jobs:
+            mats = {slot.material for slot in job.obj.material_slots if slot.material}
+            if mats & seen_mats or job.obj.data in seen_meshes:
+                leftovers.append(job)
+                continue
+            seen_mats |= mats
+            seen_meshes.add(job.obj.data)
+            batch.append(job)
+        self.progress_total = self.progress_done + bool(batch) + len(leftovers)
+
+        try:
+            for job in batch:
+                setup_job(job)
+
+            if batch:
+                bpy.ops.object.select_all(action='DESELECT')
+                for job in batch:
+                    job.obj.select_set(True)
+                context.view_layer.objects.active = batch[0].obj
+
+                t_bake = time.perf_counter()
+                with instrument.stage("bake.cycles", f"{len(batch)} meshes"):
+                    run_bake()
+                bake_time = time.perf_counter() - t_bake
+                bake_calls.append(bake_time)
+
+                for job in batch:
+                    job.bake_time = bake_time
+                    finish_job(job, lib_dir, writer)
+        finally:
+            for job in batch:
+                restore_job(job)
+
+        if batch:
+            done.extend(batch)
+            yield f"{len(batch)} meshes in one pass"
+        yield from self.bake_per_object(context, leftovers, lib_dir, writer, done, bake_calls)
@@ -0,0 +1,199 @@
+import bpy
+import os
+import json
+import time
+import traceback
+from . import registry
+from . import template_cache
+from . import variant_index
+from . import instrument
+from . import export_stream
+from . import library_link
+from .spec import CSV_MAT_PREFIX, parse_value, load_spec
+
+# --- SPEC FIELDS ---
+# Style sockets on the Geometry Nodes modifiers: {spec key: (object prefix, socket)}
+GN_FIELDS = {key: (prefix, socket) for prefix, fields in registry.STYLE_SOCKETS.items()
+             for key, socket in fields.items()}
+
+# Shorthand for common material sockets: {spec key: (material prefix, group, socket)}
+MAT_FIELDS = {
+    "body_type": ("Body", "HyBody", "Body Type"),
+    "face_type": ("Face", "HyFace", "Face Type"),
+    "ears": ("Ears", "HyEars", "Ears"),
+    "mouth": ("Mouth", "HyMouth", "Mouth Type"),
+    "hair_color": ("Hair", "HyHair", "Hair Color"),
+    "beard_color": ("Beard", "HyBeard", "Beard Color"),
+    "eye_color": ("Eyes", "HyEyes", "Eye Color"),
+}
+
+# --- CONFIGURE ---
+def find_gn_modifier(obj_prefix):
+    obj, mod = registry.get_gn(obj_prefix)
+    if not obj:
+        raise KeyError(f"No object starting with '{obj_prefix}'")
+    if not mod:
+        raise KeyError(f"'{obj.name}' has no GeometryNodes modifier")
+    return obj, mod
+
+def set_material_socket(mat_prefix, grp, sock, value):
+    entry = registry.resolve_socket(mat_prefix, grp, sock)
+    if not entry:
+        raise KeyError(f"Material socket '{mat_prefix}/{grp}/{sock}' not found on Body")
+    entry[0].default_value = value
+
+def configure(context, row):
+    touched = set()
+    for key, (obj_prefix, socket) in GN_FIELDS.items():
+        if key in row:
+            value = int(row[key])
+            # Catch typos before baking when the variant index has been built
+            variants = variant_index.get_variants(obj_prefix, socket)
+            if variants is not None and str(value) not in variants:
+                known = ", ".join(sorted(variants, key=int))
+                raise KeyError(f"{key}={value} is not a known {obj_prefix} style (indexed: {known})")
+            obj, mod = find_gn_modifier(obj_prefix)
+            mod[socket] = value
+            touched.add(obj)
+
+    materials = dict(row.get("materials", {}))
+    for key, target in MAT_FIELDS.items():
+        if key in row:
+            materials["/".join(target)] = row[key]
+    for path, value in materials.items():
+        mat_prefix, grp, sock = path.split("/", 2)
+        set_material_socket(mat_prefix, grp, sock, value)
+
+    if "skintone" in row:
+        context.scene.hy_skintone_master = int(row["skintone"])
+
+    # ID property writes don't tag the depsgraph on their own
+    for obj in touched:
+        obj.update_tag()
+    context.view_layer.update()
+
+# --- PIPELINE ---
+def clear_scene():
+    """Drop every object and collection so each character starts from an empty file.
+    The spawn template cache is kept so later rows don't re-read the library."""
+    keep = set()
+    template = template_cache.get_template()
+    if template:
+        keep = {template} | set(template.children_recursive) | set(template.all_objects)
+    bpy.data.batch_remove([i for i in list(bpy.data.objects) + list(bpy.data.collections) if i not in keep])
+    # The template has no users of its own; a fake user for the purge keeps it
+    if template:
+        template.use_fake_user = True
+    try:
+        with instrument.stage("batch.purge"):
+            bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+    finally:
+        if template:
+            template.use_fake_user = False
+
+def bake_meshes(context, single_pass, **options):
+    """Bake every visible mesh under the rig; options go to mesh.individual_bake"""
+    rig = registry.get_rig()
+    if not rig:
+        raise RuntimeError("CharRig not found after spawn")
+    bpy.ops.object.select_all(action='DESELECT')
+    meshes = [o for o in rig.children_recursive if o.type == 'MESH' and o.visible_get()]
+    for obj in meshes:
+        obj.select_set(True)
+    if meshes:
+        context.view_layer.objects.active = meshes[0]
+        result = bpy.ops.mesh.individual_bake(single_pass=single_pass, **options)
+        if 'FINISHED' not in result:
+            raise RuntimeError(f"Bake returned {result}")
+
+def write_result(context, prefix, out_dir, fmt):
+    if fmt == 'blend':
+        # Baked PNGs are named after the template meshes, so the next character
+        # overwrites them on disk; pack them into this character's file.
+        for img in bpy.data.images:
+            if img.source in ('FILE', 'GENERATED') and img.filepath and not img.packed_file and img.has_data:
+                img.pack()
+        path = os.path.join(out_dir, f"{prefix}.blend")
+        # A real save would free the template cache (see template_cache) and
+        # make every later row re-read the library; write the data without it
+        library_link.write_ids(path)
+        leaked = template_cache.saved_template_names(path)
+        if leaked:
+            raise RuntimeError(f"template data written to {path}: {', '.join(leaked[:5])}")
+        return path, os.path.getsize(path)
+
+    col = bpy.data.collections.get(f"{prefix}_Collection")
+    if not col:
+        raise RuntimeError(f"{prefix}_Collection not found after finalize")
+    return export_stream.export_collection(context, col, prefix, out_dir, fmt.upper())
+
+def build_character(context, row, out_dir, fmt='blend', bake=True, single_pass=False):
+    """Spawn, configure, bake, finalize and write one character. Returns a result dict, never raises."""
+    prefix = row.get("prefix") or "NewChar"
+    result = {"prefix": prefix, "ok": False, "stages": {}, "output": None, "bytes": 0, "error": None}
+    t_start = time.perf_counter()
+    stage = "clear"
+
+    def timed(name, fn, *args):
+        nonlocal stage
+        stage = name
+        t = time.perf_counter()
+        with instrument.stage(f"batch.{name}", prefix):
+            value = fn(*args)
+        result["stages"][name] = round(time.perf_counter() - t, 4)
+        return value
+
+    try:
+        timed("clear", clear_scene)
+        spawned = timed("spawn", bpy.ops.hychar.spawn_character)
+        if 'FINISHED' not in spawned:
+            raise RuntimeError("Spawn failed (is resources/CharLibrary.blend present?)")
+        timed("configure", configure, context, row)
+        if bake:
+            timed("bake", bake_meshes, context, single_pass)
+        context.scene.custom_rig_prefix = prefix
+        finalized = timed("finalize", bpy.ops.mesh.clone_factory_final)
+        if 'FINISHED' not in finalized:
+            raise RuntimeError("Finalize failed")
+        result["output"], result["bytes"] = timed("write", write_result, context, prefix, out_dir, fmt)
+        result["ok"] = True
+    except Exception as e:
+        instrument.swallowed(f"batch.{stage}", e)
+        result["error"] = f"{stage}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["seconds"] = round(time.perf_counter() - t_start, 4)
+    return result
+
+def run(spec_path, out_dir, fmt='blend', bake=True, single_pass=False):
+    """Build every character in the spec and write summary.json next to the outputs"""
+    os.makedirs(out_dir, exist_ok=True)
+    rows = load_spec(spec_path)
+    context = bpy.context
+    results = []
+    t_start = time.perf_counter()
+
+    for i, row in enumerate(rows):
+        result = build_character(context, row, out_dir, fmt, bake, single_pass)
+        results.append(result)
+        status = "OK" if result["ok"] else f"FAILED ({result['error']})"
+        print(f"HyTailor Batch: [{i + 1}/{len(rows)}] {result['prefix']} {result['seconds']:.2f}s {status}")
+
+    clear_scene()
+    template_cache.free()
+    failures = [r for r in results if not r["ok"]]
+    summary = {
+        "spec": os.path.abspath(spec_path),
+        "format": fmt,
+        "total": len(results),
+        "succeeded": len(results) - len(failures),
+        "failed": len(failures),
+        "seconds": round(time.perf_counter() - t_start, 4),
+        "characters": results,
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"HyTailor Batch: {summary['succeeded']}/{summary['total']} characters in {summary['seconds']:.1f}s")
+    for r in failures:
+        print(f"  FAILED {r['prefix']}: {r['error']}")
+    return summary
@@ -0,0 +1,58 @@
+"""Headless batch character generation.
+
+    blender --background --factory-startup --python batch_cli.py -- --spec npcs.json --out ./out
+
+The spec is a JSON list (or CSV with a header row) with one character per entry:
+
+    {"prefix": "Guard01", "body_type": "Muscular", "skintone": 12, "hair": 3, "beard": 0,
+     "overshirt": 2, "materials": {"Overshirt/HyOvershirt/Material Selection": "Fantasy Cotton"}}
+
+See batch.GN_FIELDS and batch.MAT_FIELDS for the recognised keys.
+"""
+import os
+import sys
+import argparse
+import importlib.util
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE = "hychar_customizer"
+
+def load_addon():
+    """Import this folder as a package and register it, for scripts run with --python"""
+    if PACKAGE in sys.modules:
+        return sys.modules[PACKAGE]
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR]
+    )
+    pkg = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = pkg
+    spec.loader.exec_module(pkg)
+    pkg.register()
+    return pkg
+
+def parse_args(argv):
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="batch_cli.py", description="Build HyTailor characters from a spec file")
+    parser.add_argument("--spec", required=True, help="JSON or CSV file, one character per row")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--format", choices=("blend", "glb", "gltf", "fbx"), default="blend")
+    parser.add_argument("--no-bake", action="store_true", help="Skip texture baking")
+    parser.add_argument("--single-pass", action="store_true", help="Bake all meshes in one Cycles call")
+    parser.add_argument("--trace", help="Record stage timings and write a Chrome trace here "
+                                        "(a JSON summary is written next to it)")
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args(sys.argv)
+    pkg = load_addon()
+    if args.trace:
+        pkg.instrument.set_enabled(True)
+    summary = pkg.batch.run(args.spec, args.out, fmt=args.format,
+                            bake=not args.no_bake, single_pass=args.single_pass)
+    if args.trace:
+        pkg.instrument.export(args.trace, 'TRACE')
+        pkg.instrument.export(os.path.splitext(args.trace)[0] + ".summary.json", 'JSON')
+    sys.exit(1 if summary["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
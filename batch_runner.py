@@ -0,0 +1,194 @@
+"""Parallel batch driver: splits a character spec across several background Blender processes.
+
+    python batch_runner.py --blender /path/to/blender --spec npcs.json --out ./out --workers 8
+
+Runs with a plain Python interpreter (no bpy). Each shard runs batch_cli.py in its
+own Blender process with a private HYTAILOR_BAKE_DIR, so workers never write the
+same {obj.name}_{tile}.png. Crashed shards (no summary.json) are retried, the
+per-shard summaries are merged into out/summary.json and throughput is reported.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI_PATH = os.path.join(ADDON_DIR, "batch_cli.py")
+
+# --- SHARDING ---
+def read_rows(spec_path):
+    """Raw rows plus what's needed to write them back in the same format"""
+    if spec_path.lower().endswith(".csv"):
+        with open(spec_path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            return list(reader), reader.fieldnames
+    with open(spec_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("characters", [])
+    return data, None
+
+def write_rows(path, rows, fieldnames):
+    if fieldnames is not None:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+def split_rows(rows, count):
+    """Contiguous, near-equal chunks; never more chunks than rows"""
+    count = max(1, min(count, len(rows)))
+    size, extra = divmod(len(rows), count)
+    shards, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(rows[start:end])
+        start = end
+    return shards
+
+# --- WORKERS ---
+def run_shard(args, index, spec_path, shard_dir, log):
+    shard_out = os.path.join(shard_dir, "out")
+    os.makedirs(shard_out, exist_ok=True)
+    bake_dir = tempfile.mkdtemp(prefix=f"hytailor_bake_{index:03d}_")
+    env = dict(os.environ, HYTAILOR_BAKE_DIR=bake_dir)
+
+    cmd = [args.blender, "--background", "--factory-startup", "--python", CLI_PATH, "--",
+           "--spec", spec_path, "--out", shard_out, "--format", args.format]
+    if args.no_bake:
+        cmd.append("--no-bake")
+    if args.single_pass:
+        cmd.append("--single-pass")
+
+    summary_path = os.path.join(shard_out, "summary.json")
+    attempts, summary, t_start = 0, None, time.perf_counter()
+    try:
+        while attempts <= args.retries and summary is None:
+            attempts += 1
+            if os.path.exists(summary_path):
+                os.remove(summary_path)
+            with open(os.path.join(shard_dir, f"attempt_{attempts}.log"), "w") as log_file:
+                proc = subprocess.run(cmd, stdout=log_file, stderr=subprocess.STDOUT, env=env)
+            # batch_cli exits 1 when some characters failed; only a missing summary is a crash
+            if os.path.exists(summary_path):
+                with open(summary_path, "r", encoding="utf-8") as f:
+                    summary = json.load(f)
+            else:
+                log(f"shard {index} crashed (exit {proc.returncode}), attempt {attempts}/{args.retries + 1}")
+    finally:
+        if not args.keep_temp:
+            shutil.rmtree(bake_dir, ignore_errors=True)
+
+    return {
+        "shard": index,
+        "attempts": attempts,
+        "crashed": summary is None,
+        "seconds": round(time.perf_counter() - t_start, 4),
+        "summary": summary,
+    }
+
+def merge(results, shards, out_dir):
+    """Move shard outputs into out_dir and build one combined summary"""
+    characters = []
+    for res in results:
+        if res["summary"] is None:
+            # Every character of a shard that never finished counts as failed
+            for row in shards[res["shard"]]:
+                characters.append({"prefix": row.get("prefix") or "NewChar", "ok": False,
+                                   "error": f"shard {res['shard']} crashed", "output": None})
+            continue
+        for char in res["summary"]["characters"]:
+            if char.get("output") and os.path.exists(char["output"]):
+                folder = os.path.dirname(char["output"])
+                if os.path.basename(folder) == char["prefix"]:
+                    # .gltf with its .bin and textures: move the character's whole folder
+                    dst_dir = os.path.join(out_dir, char["prefix"])
+                    shutil.rmtree(dst_dir, ignore_errors=True)
+                    shutil.move(folder, dst_dir)
+                    dst = os.path.join(dst_dir, os.path.basename(char["output"]))
+                else:
+                    dst = os.path.join(out_dir, os.path.basename(char["output"]))
+                    os.replace(char["output"], dst)
+                char["output"] = dst
+            characters.append(char)
+    return characters
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build HyTailor characters with several Blender processes")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    parser.add_argument("--spec", required=True, help="JSON or CSV file, one character per row")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shards", type=int, default=0, help="Number of shards (default: one per worker)")
+    parser.add_argument("--retries", type=int, default=1, help="Re-runs for a crashed shard")
+    parser.add_argument("--format", choices=("blend", "glb", "gltf", "fbx"), default="blend")
+    parser.add_argument("--no-bake", action="store_true")
+    parser.add_argument("--single-pass", action="store_true")
+    parser.add_argument("--keep-temp", action="store_true", help="Keep per-worker bake folders")
+    args = parser.parse_args(argv)
+
+    rows, fieldnames = read_rows(args.spec)
+    if not rows:
+        print("HyTailor Runner: spec has no characters")
+        return 1
+
+    out_dir = os.path.abspath(args.out)
+    work_dir = os.path.join(out_dir, "shards")
+    os.makedirs(work_dir, exist_ok=True)
+    shards = split_rows(rows, args.shards or args.workers)
+    workers = max(1, min(args.workers, len(shards)))
+
+    jobs = []
+    for i, shard_rows in enumerate(shards):
+        shard_dir = os.path.join(work_dir, f"shard_{i:03d}")
+        os.makedirs(shard_dir, exist_ok=True)
+        spec_path = os.path.join(shard_dir, "spec.csv" if fieldnames is not None else "spec.json")
+        write_rows(spec_path, shard_rows, fieldnames)
+        jobs.append((i, spec_path, shard_dir))
+
+    print(f"HyTailor Runner: {len(rows)} characters, {len(shards)} shards, {workers} workers")
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_shard, args, i, spec, shard_dir, print) for i, spec, shard_dir in jobs]
+        results = [f.result() for f in futures]
+    wall = time.perf_counter() - t_start
+
+    characters = merge(results, shards, out_dir)
+    succeeded = sum(1 for c in characters if c["ok"])
+    per_minute = succeeded / (wall / 60.0) if wall else 0.0
+    summary = {
+        "spec": os.path.abspath(args.spec),
+        "workers": workers,
+        "shards": len(shards),
+        "total": len(characters),
+        "succeeded": succeeded,
+        "failed": len(characters) - succeeded,
+        "seconds": round(wall, 4),
+        "characters_per_minute": round(per_minute, 2),
+        "shard_runs": [{k: v for k, v in r.items() if k != "summary"} for r in results],
+        "characters": characters,
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"HyTailor Runner: {succeeded}/{len(characters)} characters in {wall:.1f}s "
+          f"= {per_minute:.1f} chars/min with {workers} workers")
+    for r in results:
+        if r["crashed"]:
+            print(f"  shard {r['shard']} crashed after {r['attempts']} attempt(s), see {work_dir}")
+    for c in characters:
+        if not c["ok"]:
+            print(f"  FAILED {c['prefix']}: {c['error']}")
+    return 0 if succeeded == len(characters) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
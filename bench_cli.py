@@ -0,0 +1,198 @@
+"""Headless HyTailor benchmark.
+
+    blender --background --factory-startup --python bench_cli.py -- --out bench.json [--baseline old.json]
+
+For each scene size (default 1, 10 and 50 finalized characters, plus filler
+objects) this times spawn, bake, finalize, skintone updates and repeated
+panel draws, then writes the results as JSON. With --baseline, every
+operation's mean is compared against a previous run and the exit code is 1
+when any of them got slower than --tolerance allows.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import batch_cli
+
+def parse_args(argv):
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="bench_cli.py", description="Benchmark HyTailor operators headlessly")
+    parser.add_argument("--out", required=True, help="Results JSON")
+    parser.add_argument("--sizes", default="1,10,50", help="Finalized characters per scene, comma separated")
+    parser.add_argument("--filler", type=int, default=500, help="Unrelated mesh objects added to every scene")
+    parser.add_argument("--bake-count", type=int, default=1,
+                        help="Characters baked per scene (the rest are finalized unbaked to keep runs short)")
+    parser.add_argument("--cycles-only", action="store_true", help="Disable the direct texture transfer path")
+    parser.add_argument("--shared-materials", action="store_true", help="Finalize in shared-material mode")
+    parser.add_argument("--crowd", action="store_true", help="Finalize in crowd mode (shared mesh/armature data)")
+    parser.add_argument("--draws", type=int, default=200, help="Panel draws timed per scene")
+    parser.add_argument("--skintones", type=int, default=20, help="Skintone updates timed per scene")
+    parser.add_argument("--skintone-scope", choices=("LIVE", "SELECTED", "ALL"), default="ALL",
+                        help="Which characters each skintone update reaches")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+# --- HEADLESS PANEL DRAW ---
+# There is no UI in background mode, so draw() gets a layout that accepts
+# every call and does nothing. What's measured is the panel's own work:
+# object/socket lookups and value reads.
+class NullLayout:
+    def __getattr__(self, name):
+        return self._call
+
+    def __setattr__(self, name, value):
+        pass
+
+    def _call(self, *args, **kwargs):
+        return self
+
+class PanelProxy:
+    """Stands in for a panel instance so draw() can run without a region"""
+
+    def __init__(self, panel_cls):
+        self.layout = NullLayout()
+        self._cls = panel_cls
+
+    def __getattr__(self, name):
+        attr = getattr(self._cls, name)
+        return attr.__get__(self) if hasattr(attr, "__get__") and callable(attr) else attr
+
+# --- SCENE SETUP ---
+def reset_scene(bpy):
+    bpy.ops.wm.read_homefile(use_empty=True)
+    scene = bpy.context.scene
+    scene.render.engine = 'CYCLES'
+    scene.cycles.device = 'CPU'
+
+def add_filler(bpy, count):
+    """Plain cubes in their own collection, so scans over bpy.data.objects have something to wade through"""
+    coll = bpy.data.collections.new("Bench_Filler")
+    bpy.context.scene.collection.children.link(coll)
+    verts = [(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    for i in range(count):
+        mesh = bpy.data.meshes.new(f"Filler_{i}")
+        mesh.from_pydata(verts, [], faces)
+        obj = bpy.data.objects.new(f"Filler_{i}", mesh)
+        obj.location = (i % 50 * 2.0, i // 50 * 2.0, -10.0)
+        coll.objects.link(obj)
+
+# --- MEASUREMENT ---
+def timed(samples, name, fn, *args, **kwargs):
+    t = time.perf_counter()
+    value = fn(*args, **kwargs)
+    samples.setdefault(name, []).append(time.perf_counter() - t)
+    return value
+
+def check(result, what):
+    if 'FINISHED' not in result:
+        raise RuntimeError(f"{what} returned {result}")
+
+def stats(values):
+    return {
+        "n": len(values),
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "min": min(values),
+        "max": max(values),
+    }
+
+def run_size(bpy, pkg, size, args):
+    reset_scene(bpy)
+    add_filler(bpy, args.filler)
+    context = bpy.context
+    samples = {}
+
+    for i in range(size):
+        check(timed(samples, "spawn", bpy.ops.hychar.spawn_character), "spawn")
+        if i < args.bake_count:
+            timed(samples, "bake", pkg.batch.bake_meshes, context, False,
+                  use_cache=False, use_direct_transfer=not args.cycles_only)
+        context.scene.custom_rig_prefix = f"Bench{i:03d}"
+        check(timed(samples, "finalize", bpy.ops.mesh.clone_factory_final, use_geometry_cache=False,
+                    material_mode='SHARED' if args.shared_materials else 'UNIQUE',
+                    crowd_mode=args.crowd), "finalize")
+
+    # Mesh memory of the finalized characters, as built and as if nothing were shared
+    memory = pkg.crowd.memory_report()
+
+    # One live (unfinalized) character for the panel and skintone to work on
+    check(bpy.ops.hychar.spawn_character(), "spawn")
+    scene = context.scene
+    scene.hy_skintone_scope = args.skintone_scope
+    for i in range(args.skintones):
+        timed(samples, "skintone", setattr, scene, "hy_skintone_master", i % 49 + 1)
+
+    panel = PanelProxy(pkg.UI_PT_CharacterCustomizer)
+    for use_cache, name in ((True, "draw"), (False, "draw_uncached")):
+        scene.hy_use_ui_cache = use_cache
+        for _ in range(args.draws):
+            timed(samples, name, pkg.UI_PT_CharacterCustomizer.draw, panel, context)
+    scene.hy_use_ui_cache = True
+
+    return {
+        "characters": size,
+        "objects": len(bpy.data.objects),
+        "memory": memory,
+        "ops": {name: stats(values) for name, values in samples.items()},
+    }
+
+def compare(results, baseline, tolerance):
+    """Print mean-vs-baseline per operation. Returns the list of regressions."""
+    regressions = []
+    for size, entry in results["sizes"].items():
+        base_ops = baseline.get("sizes", {}).get(size, {}).get("ops", {})
+        for name, current in entry["ops"].items():
+            base = base_ops.get(name)
+            if not base or not base["mean"]:
+                continue
+            ratio = current["mean"] / base["mean"]
+            flag = "REGRESSION" if ratio > 1 + tolerance else ""
+            print(f"HyTailor Bench: [{size}] {name:14s} {current['mean'] * 1000:9.2f}ms "
+                  f"vs {base['mean'] * 1000:9.2f}ms  x{ratio:.2f} {flag}")
+            if flag:
+                regressions.append({"size": size, "op": name, "ratio": round(ratio, 3)})
+    return regressions
+
+def main():
+    args = parse_args(sys.argv)
+    import bpy
+    pkg = batch_cli.load_addon()
+
+    results = {
+        "blender": bpy.app.version_string,
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "created": time.time(),
+        "filler": args.filler,
+        "crowd": args.crowd,
+        "sizes": {},
+    }
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        t_size = time.perf_counter()
+        entry = results["sizes"][str(size)] = run_size(bpy, pkg, size, args)
+        memory = entry["memory"]
+        print(f"HyTailor Bench: {size} character(s) done in {time.perf_counter() - t_size:.1f}s, "
+              f"mesh data {memory['shared_bytes'] / (1024 * 1024):.1f} MB "
+              f"({memory['independent_bytes'] / (1024 * 1024):.1f} MB unshared)")
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        results["regressions"] = compare(results, baseline, args.tolerance)
+        failed = bool(results["regressions"])
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    print(f"HyTailor Bench: results written to {args.out}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
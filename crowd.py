@@ -0,0 +1,193 @@
+import bpy
+import numpy as np
+from . import hash_utils
+from . import template_cache
+
+# --- CROWD MODE: SHARED DATA-BLOCKS ---
+# An independent finalize gives every character its own armature data, its
+# own widget meshes and its own evaluated meshes, even when two NPCs wear the
+# same body and clothes. In crowd mode each of those is hashed after it is
+# built and swapped for an identical data-block an earlier crowd character
+# already owns. Shared meshes get object-linked material slots, so each
+# character keeps its own materials on top of the one mesh.
+# Meshes only match when topology, coordinates, every attribute (UV maps
+# included) and the vertex-group weights are equal; armatures when bones,
+# their B-Bone/inherit/envelope settings and bone-collection membership are.
+# Editing a shared mesh or armature in Edit Mode changes every character using it.
+DATA_HASH_KEY = "hy_data_hash"
+
+# foreach_get field and components per element for each attribute data type
+_ATTR_FIELDS = {
+    'FLOAT': ("value", 1, np.float32),
+    'INT': ("value", 1, np.int32),
+    'INT8': ("value", 1, np.int8),
+    'BOOLEAN': ("value", 1, bool),
+    'FLOAT2': ("vector", 2, np.float32),
+    'INT32_2D': ("value", 2, np.int32),
+    'FLOAT_VECTOR': ("vector", 3, np.float32),
+    'FLOAT_COLOR': ("color", 4, np.float32),
+    'BYTE_COLOR': ("color", 4, np.float32),
+    'QUATERNION': ("value", 4, np.float32),
+    'FLOAT4X4': ("value", 16, np.float32),
+}
+
+# Per-bone settings that change how the rig deforms or inherits transforms
+BONE_NUMBERS = (
+    ("bbone_segments", np.int32), ("bbone_x", np.float32), ("bbone_z", np.float32),
+    ("bbone_easein", np.float32), ("bbone_easeout", np.float32),
+    ("bbone_rollin", np.float32), ("bbone_rollout", np.float32),
+    ("bbone_curveinx", np.float32), ("bbone_curveinz", np.float32),
+    ("bbone_curveoutx", np.float32), ("bbone_curveoutz", np.float32),
+    ("envelope_distance", np.float32), ("envelope_weight", np.float32),
+    ("head_radius", np.float32), ("tail_radius", np.float32),
+    ("use_inherit_rotation", bool), ("use_local_location", bool), ("use_relative_parent", bool),
+    ("use_envelope_multiply", bool), ("use_endroll_as_inroll", bool),
+)
+BONE_SETTINGS = ("inherit_scale", "bbone_handle_type_start", "bbone_handle_type_end")
+
+def _feed(h, collection, attr, count, dtype):
+    buf = np.empty(count, dtype=dtype)
+    collection.foreach_get(attr, buf)
+    h.update(buf.tobytes())
+
+def _hash_attributes(mesh, h):
+    """Feed the name, domain, type and data of every attribute (UV maps included) into h"""
+    for attr in sorted(mesh.attributes, key=lambda a: a.name):
+        if attr.is_internal:
+            continue
+        h.update(f"{attr.name}:{attr.domain}:{attr.data_type};".encode())
+        field = _ATTR_FIELDS.get(attr.data_type)
+        if field is None:
+            # STRING attributes can't be read in bulk
+            h.update(repr([d.value for d in attr.data]).encode())
+            continue
+        name, width, dtype = field
+        _feed(h, attr.data, name, len(attr.data) * width, dtype)
+
+def _hash_weights(mesh, h):
+    """Feed every vertex's (group index, weight) pairs into h"""
+    counts = np.fromiter((len(v.groups) for v in mesh.vertices), dtype=np.int32, count=len(mesh.vertices))
+    h.update(counts.tobytes())
+    if counts.any():
+        groups = np.fromiter((g.group for v in mesh.vertices for g in v.groups), dtype=np.int32)
+        weights = np.fromiter((g.weight for v in mesh.vertices for g in v.groups), dtype=np.float32)
+        h.update(groups.tobytes())
+        h.update(weights.tobytes())
+
+def mesh_key(mesh, obj=None):
+    h = hash_utils.new_hash()
+    h.update(f"{len(mesh.materials)}:{len(mesh.edges)}".encode())
+    if obj is not None:
+        # Deform weights live on the mesh but their names on the object
+        h.update(repr([g.name for g in obj.vertex_groups]).encode())
+    h.update(repr([(uv.name, uv.active, uv.active_render) for uv in mesh.uv_layers]).encode())
+    hash_utils.hash_topology(mesh, h)
+    _feed(h, mesh.edges, "vertices", len(mesh.edges) * 2, np.int32)
+    hash_utils.hash_coords(mesh, h)
+    _hash_attributes(mesh, h)
+    _hash_weights(mesh, h)
+    return h.hexdigest()
+
+def armature_key(arm):
+    bones = arm.bones
+    h = hash_utils.new_hash()
+    h.update(repr([(b.name, b.parent.name if b.parent else None, b.use_deform, b.use_connect) for b in bones]).encode())
+    for attr in ("head_local", "tail_local"):
+        _feed(h, bones, attr, len(bones) * 3, np.float32)
+    _feed(h, bones, "matrix_local", len(bones) * 16, np.float32)
+    for attr, dtype in BONE_NUMBERS:
+        _feed(h, bones, attr, len(bones), dtype)
+    h.update(repr([[getattr(b, attr) for attr in BONE_SETTINGS] for b in bones]).encode())
+    h.update(repr([(b.bbone_custom_handle_start.name if b.bbone_custom_handle_start else None,
+                    b.bbone_custom_handle_end.name if b.bbone_custom_handle_end else None) for b in bones]).encode())
+    h.update(repr(sorted(c.name for c in arm.collections_all)).encode())
+    # Which collections each bone sits in, not only which collections exist
+    h.update(repr([sorted(c.name for c in b.collections) for b in bones]).encode())
+    return h.hexdigest()
+
+class CrowdSharer:
+    """Per-finalize index of crowd-tagged meshes and armatures (hash -> data-block)"""
+
+    def __init__(self):
+        self.index = {}
+        for coll in (bpy.data.meshes, bpy.data.armatures):
+            for data in coll:
+                key = data.get(DATA_HASH_KEY)
+                if key and not data.library:
+                    self.index.setdefault(key, data)
+        self.shared = {"meshes": 0, "widgets": 0, "armatures": 0}
+        self.bytes_saved = 0
+
+    def _find(self, data, key):
+        existing = self.index.get(key)
+        if existing is None or existing == data:
+            data[DATA_HASH_KEY] = key
+            self.index[key] = data
+            return None
+        return existing
+
+    def share_armature(self, rig):
+        old = rig.data
+        existing = self._find(old, "arm:" + armature_key(old))
+        if existing:
+            rig.data = existing
+            if old.users == 0:
+                bpy.data.armatures.remove(old)
+            self.shared["armatures"] += 1
+
+    def widget_mesh(self, mesh):
+        """Existing identical widget mesh, or a new tagged copy of mesh"""
+        key = "wgt:" + mesh_key(mesh)
+        existing = self.index.get(key)
+        if existing:
+            self.shared["widgets"] += 1
+            return existing
+        copy = mesh.copy()
+        copy[DATA_HASH_KEY] = key
+        self.index[key] = copy
+        return copy
+
+    def share_mesh(self, obj):
+        old = obj.data
+        if old.shape_keys:
+            return
+        existing = self._find(old, "mesh:" + mesh_key(old, obj))
+        if not existing:
+            return
+        materials = [s.material for s in obj.material_slots]
+        obj.data = existing
+        # The shared mesh carries the first character's materials; link this one's to the object
+        for slot, mat in zip(obj.material_slots, materials):
+            slot.link = 'OBJECT'
+            slot.material = mat
+        if old.users == 0:
+            self.bytes_saved += template_cache.mesh_bytes(old)
+            bpy.data.meshes.remove(old)
+        self.shared["meshes"] += 1
+
+    def summary(self):
+        text = (f"crowd shared {self.shared['meshes']} mesh(es), {self.shared['widgets']} widget(s), "
+                f"{self.shared['armatures']} armature(s)")
+        if self.bytes_saved:
+            text += f", ~{self.bytes_saved / (1024 * 1024):.1f} MB mesh data saved"
+        return text
+
+def memory_report():
+    """Estimated mesh memory now vs. if every mesh object (widgets included) had its own copy"""
+    shared = independent = 0
+    users = {}
+    for obj in bpy.data.objects:
+        if obj.type == 'MESH' and obj.data:
+            users[obj.data] = users.get(obj.data, 0) + 1
+    for mesh, count in users.items():
+        size = template_cache.mesh_bytes(mesh)
+        shared += size
+        independent += size * count
+    return {
+        "meshes": len(users),
+        "mesh_objects": sum(users.values()),
+        "shared_bytes": shared,
+        "independent_bytes": independent,
+        "armatures": len(bpy.data.armatures),
+        "armature_objects": sum(1 for o in bpy.data.objects if o.type == 'ARMATURE'),
+    }
@@ -0,0 +1,143 @@
+import bpy
+import os
+import json
+import time
+from . import modal_steps
+from . import finalize_logic
+from . import instrument
+
+# --- STREAMING CHARACTER EXPORT ---
+# Writes every finalized {PREFIX}_Collection (rig, meshes, BAKED_RESULT
+# textures) to its own glTF/GLB or FBX file, one character per step. With
+# "Free After Export" each character's objects and the data only they use are
+# removed as soon as its file is written, so memory stays flat however many
+# characters are queued. Per-character time and size go to
+# export_summary.json next to the files.
+COLLECTION_SUFFIX = "_Collection"
+RIG_SUFFIX = "_CharRig"
+FORMATS = [
+    ('GLB', "glTF Binary (.glb)", "One file per character, textures embedded"),
+    ('GLTF', "glTF Separate (.gltf)", "A folder per character: .gltf, .bin and the PNG textures"),
+    ('FBX', "FBX (.fbx)", "One file per character, textures embedded or copied next to it"),
+]
+
+def find_characters():
+    """[(prefix, collection)] for every finalized character: a {PREFIX}_Collection holding {PREFIX}_CharRig"""
+    found = []
+    for coll in bpy.data.collections:
+        if coll.library or not coll.name.endswith(COLLECTION_SUFFIX):
+            continue
+        prefix = coll.name[:-len(COLLECTION_SUFFIX)]
+        if any(o.name == prefix + RIG_SUFFIX for o in coll.all_objects):
+            found.append((prefix, coll))
+    return found
+
+def _folder_bytes(folder):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _dirs, files in os.walk(folder) for f in files)
+
+def export_collection(context, coll, prefix, out_dir, fmt='GLB', embed_textures=True):
+    """Write the visible objects of coll. Returns (path, bytes written)."""
+    bpy.ops.object.select_all(action='DESELECT')
+    objects = [o for o in coll.all_objects if o.visible_get()]
+    if not objects:
+        raise RuntimeError(f"{coll.name} has no visible objects")
+    for obj in objects:
+        obj.select_set(True)
+    context.view_layer.objects.active = objects[0]
+
+    # Referenced textures are named after the template meshes, so characters
+    # that write them next to the model each get their own folder
+    separate = fmt == 'GLTF' or (fmt == 'FBX' and not embed_textures)
+    folder = os.path.join(out_dir, prefix) if separate else out_dir
+    os.makedirs(folder, exist_ok=True)
+
+    if fmt == 'FBX':
+        path = os.path.join(folder, f"{prefix}.fbx")
+        bpy.ops.export_scene.fbx(filepath=path, use_selection=True, path_mode='COPY', embed_textures=embed_textures)
+    else:
+        path = os.path.join(folder, f"{prefix}.{'gltf' if fmt == 'GLTF' else 'glb'}")
+        bpy.ops.export_scene.gltf(filepath=path, use_selection=True,
+                                  export_format='GLTF_SEPARATE' if fmt == 'GLTF' else 'GLB')
+    size = _folder_bytes(folder) if separate else os.path.getsize(path)
+    return path, size
+
+def free_character(coll):
+    """Remove a finalized character and everything only it uses. Returns the removed ID count."""
+    # Same targeted removal finalize uses for the spawned template
+    removed, _seconds = finalize_logic.cleanup_template(coll)
+    return removed
+
+class HYCHAR_OT_export_characters(modal_steps.StepOperator, bpy.types.Operator):
+    bl_idname = "hychar.export_characters"
+    bl_label = "Export Characters"
+    bl_description = "Write every finalized character to its own glTF/FBX file, one at a time"
+    # No UNDO: an undo step would keep everything Free After Export removed alive in memory
+    bl_options = {'REGISTER'}
+
+    directory: bpy.props.StringProperty(name="Folder", subtype='DIR_PATH', default="//export/")
+    format: bpy.props.EnumProperty(name="Format", items=FORMATS, default='GLB')
+    embed_textures: bpy.props.BoolProperty(
+        name="Embed Textures",
+        description="FBX only: pack the baked PNGs into the file instead of copying them next to it",
+        default=True
+    )
+    free_after: bpy.props.BoolProperty(
+        name="Free After Export",
+        description="Remove each character from the file once it is written, keeping memory flat for large batches",
+        default=False
+    )
+
+    def steps(self, context):
+        out_dir = bpy.path.abspath(self.directory)
+        # Names, not collection references: each step looks its collection up again
+        characters = [(prefix, coll.name) for prefix, coll in find_characters()]
+        if not characters:
+            self.report({'ERROR'}, "No finalized characters ({PREFIX}_Collection with a rig) found")
+            return {'CANCELLED'}
+        os.makedirs(out_dir, exist_ok=True)
+        self.progress_total = len(characters)
+
+        results = []
+        t_start = time.perf_counter()
+        try:
+            for prefix, coll_name in characters:
+                entry = {"prefix": prefix, "path": None, "bytes": 0, "seconds": 0.0, "freed": 0, "error": None}
+                t_char = time.perf_counter()
+                try:
+                    coll = bpy.data.collections.get((coll_name, None))
+                    if coll is None:
+                        raise RuntimeError(f"{coll_name} was removed before it was exported")
+                    with instrument.stage("export.write", prefix):
+                        entry["path"], entry["bytes"] = export_collection(
+                            context, coll, prefix, out_dir, self.format, self.embed_textures)
+                except Exception as e:
+                    instrument.swallowed("export.write", e)
+                    entry["error"] = str(e)
+                entry["seconds"] = round(time.perf_counter() - t_char, 4)
+                if self.free_after and not entry["error"]:
+                    with instrument.stage("export.free", prefix):
+                        entry["freed"] = free_character(coll)
+                results.append(entry)
+                status = entry["error"] or f"{entry['bytes'] / (1024 * 1024):.1f} MB"
+                print(f"HyTailor Export: {prefix} {entry['seconds']:.2f}s {status}")
+                yield prefix
+        except modal_steps.Cancelled:
+            self.report({'WARNING'}, f"Export cancelled after {len(results)} of {len(characters)}")
+            return {'FINISHED'}
+        finally:
+            self.write_summary(out_dir, results, time.perf_counter() - t_start)
+
+        failed = [r for r in results if r["error"]]
+        total_mb = sum(r["bytes"] for r in results) / (1024 * 1024)
+        msg = (f"Exported {len(results) - len(failed)}/{len(results)} characters, {total_mb:.1f} MB "
+               f"in {time.perf_counter() - t_start:.1f}s")
+        self.report({'WARNING'} if failed else {'INFO'}, msg + (f" | {len(failed)} failed, see console" if failed else ""))
+        return {'FINISHED'}
+
+    def write_summary(self, out_dir, results, seconds):
+        summary = {"format": self.format, "seconds": round(seconds, 4), "characters": results}
+        try:
+            with open(os.path.join(out_dir, "export_summary.json"), "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+        except OSError as e:
+            instrument.swallowed("export.summary", e)
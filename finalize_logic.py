@@ -0,0 +1,230 @@
+import bpy
+import json
+import time
+from . import template_cache
+from . import gn_cache
+from . import hash_utils
+from . import material_dedup
+from . import modal_steps
+from . import instrument
+
+# --- TARGETED TEMPLATE CLEANUP ---
+# Finalize used to end with a recursive orphans_purge, which walks every ID in
+# the file and also deletes unrelated orphan data the user may want to keep.
+# Instead, gather exactly what the spawned template brought in and remove the
+# part of it nothing outside the template still uses, in one batch_remove.
+
+def _is_template_cache(id_data):
+    return id_data.get(template_cache.NAME_KEY) is not None
+
+def _walk_node_tree(tree, found):
+    for node in tree.nodes:
+        image = getattr(node, "image", None)
+        if image:
+            found.add(image)
+        group = getattr(node, "node_tree", None)
+        if group and group not in found:
+            found.add(group)
+            _walk_node_tree(group, found)
+
+def collect_template_ids(orig_coll):
+    """(objects and collections of the template, other IDs they reference)"""
+    owned = {orig_coll} | set(orig_coll.children_recursive) | set(orig_coll.all_objects)
+    referenced = set()
+    for obj in orig_coll.all_objects:
+        if obj.data:
+            referenced.add(obj.data)
+        if obj.override_library and obj.override_library.reference:
+            referenced.add(obj.override_library.reference)
+        referenced.update(s.material for s in obj.material_slots if s.material)
+        for mod in obj.modifiers:
+            if getattr(mod, "node_group", None):
+                referenced.add(mod.node_group)
+        if obj.pose:
+            for pbone in obj.pose.bones:
+                widget = pbone.custom_shape
+                if widget:
+                    referenced.add(widget)
+                    if widget.data:
+                        referenced.add(widget.data)
+
+    # Embedded material node trees aren't IDs themselves; walk them for groups and images
+    for id_data in list(referenced):
+        if isinstance(id_data, bpy.types.Material) and id_data.node_tree:
+            _walk_node_tree(id_data.node_tree, referenced)
+        elif isinstance(id_data, bpy.types.NodeTree):
+            _walk_node_tree(id_data, referenced)
+
+    referenced -= owned
+    referenced = {i for i in referenced if not _is_template_cache(i)}
+    return owned, referenced
+
+def removable_ids(owned, referenced):
+    """owned plus every referenced ID whose users are all being removed too"""
+    users = bpy.data.user_map(subset=referenced)
+    removable = owned | referenced
+    changed = True
+    while changed:
+        changed = False
+        for id_data in list(removable & referenced):
+            if id_data.use_fake_user or any(u not in removable for u in users.get(id_data, ())):
+                removable.discard(id_data)
+                changed = True
+    return removable
+
+def remove_partial_clone(objects, collections, materials):
+    """Undo a cancelled finalize: remove the copies made so far and the data only they use"""
+    owned = set(objects) | set(collections)
+    referenced = {o.data for o in objects if o.data} | set(materials)
+    to_remove = removable_ids(owned, referenced - owned)
+    bpy.data.batch_remove(to_remove)
+    return len(to_remove)
+
+def cleanup_template(orig_coll):
+    """Remove the spawned template. Returns (removed ID count, seconds)."""
+    t_start = time.perf_counter()
+    owned, referenced = collect_template_ids(orig_coll)
+    to_remove = removable_ids(owned, referenced)
+    bpy.data.batch_remove(to_remove)
+    return len(to_remove), time.perf_counter() - t_start
+
+# --- DATA-LEVEL MODIFIER APPLY ---
+# bpy.ops.object.modifier_apply re-evaluates the depsgraph on every call and
+# needs the object active. Evaluate once and build each mesh from the result.
+
+def apply_modifiers(obj, depsgraph, new_mesh=None):
+    """Swap obj's mesh for its evaluated result (or new_mesh, e.g. from the geometry cache)
+    and drop the non-Armature modifiers that went into it. Returns the number of modifiers applied."""
+    mods = [m for m in obj.modifiers if m.type != 'ARMATURE' and m.show_viewport]
+    if not mods:
+        return 0
+    # modifier_apply refuses these too; leave the object untouched
+    if obj.data.shape_keys:
+        raise RuntimeError("mesh has shape keys, modifiers kept")
+
+    if new_mesh is None:
+        new_mesh = bpy.data.meshes.new_from_object(
+            obj.evaluated_get(depsgraph), preserve_all_data_layers=True, depsgraph=depsgraph
+        )
+    old_mesh = obj.data
+    mesh_name = old_mesh.name
+    obj.data = new_mesh
+    for mod in mods:
+        obj.modifiers.remove(mod)
+    if old_mesh.users == 0:
+        bpy.data.meshes.remove(old_mesh)
+    new_mesh.name = mesh_name
+    return len(mods)
+
+def apply_modifiers_all(context, meshes, geometry_cache=None):
+    """Apply every non-Armature modifier on meshes from one depsgraph evaluation.
+    Meshes found in geometry_cache are swapped in first so they aren't evaluated at all.
+    Returns ({name: seconds}, [(name, error)], evaluation seconds)."""
+    timings, errors = {}, []
+    eval_time = modal_steps.drain(iter_apply_modifiers(context, meshes, geometry_cache, timings, errors))
+    return timings, errors, eval_time
+
+def iter_apply_modifiers(context, meshes, geometry_cache, timings, errors):
+    """Step generator behind apply_modifiers_all: yields each mesh name once it's applied,
+    fills timings and errors, and returns the evaluation seconds"""
+    if geometry_cache:
+        for obj in meshes:
+            key = gn_cache.geometry_key(obj)
+            if not key:
+                continue
+            t_obj = time.perf_counter()
+            with instrument.stage("finalize.geometry_cache", obj.name):
+                cached_mesh = geometry_cache.load(key)
+                if cached_mesh:
+                    name = obj.name
+                    apply_modifiers(obj, None, cached_mesh)
+                    timings[name] = time.perf_counter() - t_obj
+        # Record the hits so the LRU trim keeps what finalize actually reuses
+        if geometry_cache.hits:
+            geometry_cache.save()
+
+    # Armature deformation stays live on the clone, so keep it out of the evaluated mesh
+    arm_mods = [m for o in meshes for m in o.modifiers if m.type == 'ARMATURE' and m.show_viewport]
+    for mod in arm_mods:
+        mod.show_viewport = False
+    try:
+        t_eval = time.perf_counter()
+        with instrument.stage("finalize.depsgraph_eval"):
+            depsgraph = context.evaluated_depsgraph_get()
+        eval_time = time.perf_counter() - t_eval
+
+        for obj in meshes:
+            name = obj.name
+            skipped = [m.name for m in obj.modifiers if m.type != 'ARMATURE' and not m.show_viewport]
+            if skipped:
+                errors.append((name, f"disabled modifiers kept: {', '.join(skipped)}"))
+            t_obj = time.perf_counter()
+            try:
+                with instrument.stage("finalize.modifier_apply", name):
+                    apply_modifiers(obj, depsgraph)
+            except Exception as e:
+                instrument.swallowed("finalize.modifier_apply", e)
+                errors.append((name, str(e)))
+            timings[name] = time.perf_counter() - t_obj
+            yield name
+    finally:
+        for mod in arm_mods:
+            mod.show_viewport = True
+    return eval_time
+
+# --- FINALIZE MANIFEST ---
+# Stored as JSON on {PREFIX}_Collection: per piece (template mesh base name)
+# the finalized object and two keys, one for what shapes the mesh (modifier
+# inputs, topology, UVs, rest positions) and one for its materials (node trees,
+# socket values and baked image checksums). Finalizing the same prefix again
+# compares fresh keys against these and only redoes the pieces that differ.
+MANIFEST_KEY = "hy_manifest"
+MANIFEST_VERSION = 1
+
+def piece_name(obj):
+    return obj.name.split(".")[0]
+
+def geometry_key(obj):
+    h = hash_utils.new_hash()
+    h.update(piece_name(obj).encode())
+    h.update(repr([round(v, 5) for row in obj.matrix_local for v in row]).encode())
+    for mod in obj.modifiers:
+        if mod.type == 'ARMATURE':
+            continue
+        h.update(f"|{mod.type}:{mod.name}:{mod.show_viewport};".encode())
+        if mod.type == 'NODES' and mod.node_group:
+            gn_cache.hash_modifier(mod, h)
+    mesh = obj.data
+    h.update(f"shape_keys={bool(mesh.shape_keys)}".encode())
+    hash_utils.hash_topology(mesh, h, mesh.uv_layers.active)
+    hash_utils.hash_coords(mesh, h)
+    return h.hexdigest()
+
+def materials_key(obj):
+    h = hash_utils.new_hash()
+    for slot in obj.material_slots:
+        h.update(f"|{material_dedup.fingerprint(slot.material) if slot.material else None}".encode())
+    return h.hexdigest()
+
+def baked_objects(objs):
+    """Names of meshes with a BAKED_RESULT image in any of their materials"""
+    return [o.name for o in objs if o.type == 'MESH'
+            and any(s.material and material_dedup.baked_nodes(s.material) for s in o.material_slots)]
+
+def piece_keys(meshes):
+    """{piece name: (geometry key, materials key)} for template meshes"""
+    with instrument.stage("finalize.manifest"):
+        return {piece_name(o): (geometry_key(o), materials_key(o)) for o in meshes}
+
+def read_manifest(coll):
+    raw = coll.get(MANIFEST_KEY) if coll else None
+    if not raw:
+        return None
+    try:
+        manifest = json.loads(raw)
+    except ValueError:
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+def write_manifest(coll, rig_name, pieces):
+    coll[MANIFEST_KEY] = json.dumps({"version": MANIFEST_VERSION, "rig": rig_name, "pieces": pieces})
@@ -0,0 +1,304 @@
+import bpy
+import os
+import json
+import time
+from bpy.app.handlers import persistent
+from . import hash_utils
+from . import bake_cache
+from . import registry
+
+# --- GEOMETRY NODES OUTPUT CACHE ---
+# Evaluated *_GN meshes written to small .blend files keyed by everything that
+# feeds the modifier: its node tree, its socket values and the base mesh.
+# Blender's own GN bake needs Bake nodes inside the trees, which the library
+# trees don't have, so the cache works at the mesh level instead. Finalize
+# swaps in cached meshes so those modifiers don't have to be evaluated again.
+# The folder is trimmed least-recently-used first, like the bake cache.
+DEFAULT_LIMIT_MB = 256
+
+# Node tree digests, keyed by session_uid (unique for the session, unlike the
+# pointer) and dropped whenever a node tree, material or image is edited, a
+# file loads or undo/redo runs.
+_TREE_HASHES = {}
+
+def invalidate(*_args):
+    _TREE_HASHES.clear()
+
+def get_cache_dir():
+    override = os.environ.get("HYTAILOR_GN_CACHE_DIR")
+    if override:
+        return override
+    addon_dir = os.path.dirname(os.path.dirname(__file__))
+    return os.path.join(addon_dir, "library", "gn_cache")
+
+def _tree_hash(tree):
+    key = tree.session_uid
+    digest = _TREE_HASHES.get(key)
+    if digest is None:
+        h = hash_utils.new_hash()
+        hash_utils.hash_node_tree(tree, h)
+        digest = _TREE_HASHES[key] = h.hexdigest()
+    return digest
+
+def cacheable_modifier(obj):
+    """The object's only enabled non-Armature modifier, if it is Geometry Nodes"""
+    mods = [m for m in obj.modifiers if m.type != 'ARMATURE' and m.show_viewport]
+    if len(mods) == 1 and mods[0].type == 'NODES' and mods[0].node_group:
+        return mods[0]
+    return None
+
+def hash_id_input(data, h, _depth=0):
+    """Feed what an Object/Collection/Material/Image modifier input contributes into h,
+    not just its name: transform and base mesh, member objects, node tree, pixels"""
+    h.update(f"{type(data).__name__}:{data.name};".encode())
+    if isinstance(data, bpy.types.Object):
+        h.update(repr([round(v, 6) for row in data.matrix_world for v in row]).encode())
+        if data.type == 'MESH' and data.data:
+            hash_utils.hash_topology(data.data, h, data.data.uv_layers.active)
+            hash_utils.hash_coords(data.data, h)
+    elif isinstance(data, bpy.types.Collection) and _depth < 4:
+        for obj in sorted(data.all_objects, key=lambda o: o.name):
+            hash_id_input(obj, h, _depth + 1)
+    elif isinstance(data, bpy.types.Material):
+        if data.node_tree:
+            h.update(_tree_hash(data.node_tree).encode())
+    elif isinstance(data, bpy.types.Image):
+        h.update(hash_utils.hash_image(data).encode())
+
+def hash_modifier(mod, h):
+    """Feed a Geometry Nodes modifier's node tree and socket values into h"""
+    h.update(_tree_hash(mod.node_group).encode())
+    for key in sorted(mod.keys()):
+        val = mod[key]
+        if isinstance(val, bpy.types.ID):
+            h.update(f"{key}=".encode())
+            hash_id_input(val, h)
+            continue
+        if hasattr(val, "to_list"):
+            val = val.to_list()
+        h.update(f"{key}={val!r};".encode())
+
+def geometry_key(obj):
+    mod = cacheable_modifier(obj)
+    if not mod or obj.data.shape_keys:
+        return None
+    h = hash_utils.new_hash()
+    h.update(obj.name.split(".")[0].encode())
+    hash_modifier(mod, h)
+    mesh = obj.data
+    hash_utils.hash_topology(mesh, h, mesh.uv_layers.active)
+    hash_utils.hash_coords(mesh, h)
+    return h.hexdigest()
+
+class GeometryCache:
+    """Index of cached GN meshes: key -> {mesh name, material names, evaluation seconds, size, last use},
+    trimmed least-recently-used first"""
+
+    def __init__(self, cache_dir=None, limit_bytes=DEFAULT_LIMIT_MB * 1024 * 1024):
+        self.cache_dir = cache_dir or get_cache_dir()
+        self.limit_bytes = limit_bytes
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.saved_seconds = 0.0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index = self._read_index()
+        # Merged into the on-disk index on save, as in BakeCache
+        self._touched = set()
+        self._removed = set()
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.blend")
+
+    def has(self, key):
+        return key in self.index and os.path.exists(self._path(key))
+
+    def store(self, key, mesh, eval_seconds):
+        """Write mesh without its materials (they're re-linked by name on load)"""
+        tmp = mesh.copy()
+        tmp.name = f"HyGeo_{key[:12]}"
+        tmp.materials.clear()
+        # Read back: the name gets a suffix if it's already taken in this file
+        mesh_name = tmp.name
+        try:
+            bpy.data.libraries.write(self._path(key), {tmp}, fake_user=True)
+        finally:
+            bpy.data.meshes.remove(tmp)
+        self.index[key] = {
+            "mesh": mesh_name,
+            "materials": [m.name if m else None for m in mesh.materials],
+            "eval_seconds": eval_seconds,
+            "created": time.time(),
+            "last_used": time.time(),
+            "size": os.path.getsize(self._path(key)),
+        }
+        self._touched.add(key)
+        self._removed.discard(key)
+
+    def load(self, key):
+        """Append the cached mesh and restore its material list. None on a miss."""
+        if not self.has(key):
+            if self.index.pop(key, None):
+                self._removed.add(key)
+            self.misses += 1
+            return None
+        entry = self.index[key]
+        with bpy.data.libraries.load(self._path(key), link=False) as (data_from, data_to):
+            data_to.meshes = [entry["mesh"]]
+        mesh = data_to.meshes[0] if data_to.meshes else None
+        if not mesh:
+            self.misses += 1
+            return None
+        mesh.use_fake_user = False
+        for name in entry["materials"]:
+            mesh.materials.append(bpy.data.materials.get(name) if name else None)
+        entry["last_used"] = time.time()
+        self._touched.add(key)
+        self.hits += 1
+        self.saved_seconds += entry.get("eval_seconds", 0.0)
+        return mesh
+
+    def evict(self):
+        # Entries written before the size cap have no size/last_used; treat them as oldest
+        total = sum(e.get("size", 0) for e in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda kv: kv[1].get("last_used", 0.0)):
+            if total <= self.limit_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            total -= entry.get("size", 0)
+            del self.index[key]
+            self._removed.add(key)
+            self.evicted += 1
+
+    def save(self):
+        with bake_cache.index_lock(self.index_path):
+            merged = self._read_index()
+            for key in self._removed:
+                merged.pop(key, None)
+            for key in self._touched:
+                if key in self.index:
+                    merged[key] = self.index[key]
+            self.index = merged
+            self.evict()
+            tmp = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.index, f)
+            os.replace(tmp, self.index_path)
+        self._touched.clear()
+        self._removed.clear()
+
+    def summary(self):
+        return (f"geometry cache {self.hits} hit(s), {self.misses} miss(es), ~{self.saved_seconds:.2f}s evaluation saved"
+                + (f", {self.evicted} evicted" if self.evicted else ""))
+
+def bake_geometry(context, objs, cache):
+    """Evaluate the uncached GN objects in one depsgraph pass and store their meshes.
+    Returns (stored count, already cached count, evaluation seconds)."""
+    pending = []
+    cached = 0
+    for obj in objs:
+        key = geometry_key(obj)
+        if not key:
+            continue
+        if cache.has(key):
+            cached += 1
+        else:
+            pending.append((obj, key))
+    if not pending:
+        return 0, cached, 0.0
+
+    # Cache the rest-pose shape, as finalize sees it
+    arm_mods = [m for o, _ in pending for m in o.modifiers if m.type == 'ARMATURE' and m.show_viewport]
+    for mod in arm_mods:
+        mod.show_viewport = False
+    try:
+        t_eval = time.perf_counter()
+        depsgraph = context.evaluated_depsgraph_get()
+        eval_time = time.perf_counter() - t_eval
+
+        meshes = []
+        for obj, key in pending:
+            t_obj = time.perf_counter()
+            mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph), preserve_all_data_layers=True,
+                                                   depsgraph=depsgraph)
+            meshes.append((key, mesh, time.perf_counter() - t_obj))
+    finally:
+        for mod in arm_mods:
+            mod.show_viewport = True
+
+    # The depsgraph evaluates all modifiers together (in parallel where it can);
+    # attribute that shared time to each object by output vertex count.
+    total_verts = sum(len(m.vertices) for _, m, _ in meshes) or 1
+    for key, mesh, build_time in meshes:
+        share = eval_time * len(mesh.vertices) / total_verts
+        cache.store(key, mesh, share + build_time)
+        bpy.data.meshes.remove(mesh)
+    cache.save()
+    return len(meshes), cached, eval_time
+
+class HYCHAR_OT_bake_geometry(bpy.types.Operator):
+    bl_idname = "hychar.bake_geometry"
+    bl_label = "Bake Geometry"
+    bl_description = "Store the evaluated Geometry Nodes output for the current style choices so finalize can reuse it"
+
+    cache_limit_mb: bpy.props.IntProperty(
+        name="Cache Size (MB)",
+        description="Least recently used geometry is deleted once the cache grows past this size",
+        min=1,
+        default=DEFAULT_LIMIT_MB
+    )
+
+    def execute(self, context):
+        objs = [registry.get_object(prefix) for prefix in registry.GN_OBJECTS]
+        objs = [o for o in objs if o and o.visible_get()]
+        if not objs:
+            self.report({'WARNING'}, "No visible *_GN objects found")
+            return {'CANCELLED'}
+        cache = GeometryCache(limit_bytes=self.cache_limit_mb * 1024 * 1024)
+        stored, cached, eval_time = bake_geometry(context, objs, cache)
+        self.report({'INFO'}, f"Geometry baked: {stored} new, {cached} already cached ({eval_time * 1000:.1f}ms evaluation)")
+        return {'FINISHED'}
+
+# --- INVALIDATION HANDLERS ---
+@persistent
+def _on_depsgraph_update(scene, depsgraph):
+    if not _TREE_HASHES:
+        return
+    for update in depsgraph.updates:
+        if isinstance(update.id, (bpy.types.NodeTree, bpy.types.Material, bpy.types.Image)):
+            invalidate()
+            return
+
+@persistent
+def _on_file_or_undo(*_args):
+    invalidate()
+
+_HANDLERS = (
+    (bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update),
+    (bpy.app.handlers.load_post, _on_file_or_undo),
+    (bpy.app.handlers.undo_post, _on_file_or_undo),
+    (bpy.app.handlers.redo_post, _on_file_or_undo),
+)
+
+def register():
+    for handlers, fn in _HANDLERS:
+        if fn not in handlers:
+            handlers.append(fn)
+    invalidate()
+
+def unregister():
+    for handlers, fn in _HANDLERS:
+        if fn in handlers:
+            handlers.remove(fn)
+    invalidate()
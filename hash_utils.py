@@ -0,0 +1,104 @@
+import os
+import hashlib
+import numpy as np
+
+# (path, mtime, size) -> sha1 of the file, so unchanged source tiles are read once per session
+_FILE_HASHES = {}
+# Set on baked images by shared-material finalize; their PNG on disk is
+# overwritten by the next character's bake, so the pixels are what identify them
+PIXEL_HASH_KEY = "hy_pixel_hash"
+
+def new_hash():
+    return hashlib.sha1()
+
+def _feed_array(h, collection, attr, count, dtype):
+    buf = np.empty(count, dtype=dtype)
+    collection.foreach_get(attr, buf)
+    h.update(buf.tobytes())
+
+def hash_topology(mesh, h, uv_layer=None):
+    """Feed polygon/loop layout and UVs into h. Vertex positions don't affect a color bake and are skipped."""
+    h.update(f"{len(mesh.vertices)}:{len(mesh.polygons)}:{len(mesh.loops)}".encode())
+    _feed_array(h, mesh.polygons, "loop_total", len(mesh.polygons), np.int32)
+    _feed_array(h, mesh.polygons, "material_index", len(mesh.polygons), np.int32)
+    _feed_array(h, mesh.loops, "vertex_index", len(mesh.loops), np.int32)
+    if uv_layer:
+        _feed_array(h, uv_layer.data, "uv", len(uv_layer.data) * 2, np.float32)
+
+def hash_coords(mesh, h):
+    _feed_array(h, mesh.vertices, "co", len(mesh.vertices) * 3, np.float32)
+
+def hash_file(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    stamp = (path, st.st_mtime_ns, st.st_size)
+    digest = _FILE_HASHES.get(stamp)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _FILE_HASHES[stamp] = digest
+    return digest
+
+def hash_pixels(img):
+    """sha1 of the loaded float pixels (loads the image if needed)"""
+    buf = np.empty(len(img.pixels), dtype=np.float32)
+    img.pixels.foreach_get(buf)
+    h = hashlib.sha1(f"{tuple(img.size)}:{img.channels}".encode())
+    h.update(buf.tobytes())
+    return h.hexdigest()
+
+def hash_image(img):
+    """Checksum of the pixels an image would load: every UDIM tile file, the packed data or its generator settings"""
+    if PIXEL_HASH_KEY in img:
+        return f"px:{img[PIXEL_HASH_KEY]}"
+    if img.packed_file:
+        return hashlib.sha1(img.packed_file.data).hexdigest()
+    # Baked results stay GENERATED in memory but are backed by their PNG
+    if img.source == 'GENERATED' and not img.filepath:
+        return f"gen:{img.generated_type}:{tuple(img.size)}:{tuple(img.generated_color)}"
+    # Imported here so the rest of the module loads outside Blender (tests)
+    import bpy
+    path = bpy.path.abspath(img.filepath, library=img.library)
+    if img.source == 'TILED':
+        return ",".join(
+            f"{t.number}={hash_file(path.replace('<UDIM>', str(t.number)))}" for t in img.tiles
+        )
+    return hash_file(path)
+
+def _socket_value(sock):
+    val = getattr(sock, "default_value", None)
+    if val is None or isinstance(val, (str, int, float, bool)):
+        return val
+    try:
+        return tuple(round(v, 6) for v in val)
+    except TypeError:
+        return str(val)
+
+def hash_node_tree(tree, h, _seen=None):
+    """Feed node types, unlinked socket values, image checksums and links into h, recursing into groups"""
+    seen = _seen if _seen is not None else set()
+    if tree.name in seen:
+        return
+    seen.add(tree.name)
+    for node in sorted(tree.nodes, key=lambda n: n.name):
+        h.update(f"|{node.bl_idname}:{node.name}".encode())
+        for sock in node.inputs:
+            if not sock.is_linked:
+                h.update(f"{sock.identifier}={_socket_value(sock)!r};".encode())
+        image = getattr(node, "image", None)
+        if image:
+            h.update(f"img={hash_image(image)};interp={getattr(node, 'interpolation', '')}".encode())
+        for attr in ("uv_map", "blend_type", "data_type", "operation"):
+            if hasattr(node, attr):
+                h.update(f"{attr}={getattr(node, attr)};".encode())
+        if node.type == 'GROUP' and node.node_tree:
+            h.update(f"group={node.node_tree.name}".encode())
+            hash_node_tree(node.node_tree, h, seen)
+    for link in tree.links:
+        h.update(f"{link.from_node.name}.{link.from_socket.identifier}>"
+                 f"{link.to_node.name}.{link.to_socket.identifier}".encode())
@@ -0,0 +1,25 @@
+"""Build the style variant index for resources/CharLibrary.blend.
+
+    blender --background --factory-startup --python index_cli.py -- [--out resources/variant_index.json]
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import batch_cli
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="index_cli.py", description="Index every GN style variant")
+    parser.add_argument("--out", default=None, help="Output JSON (default: resources/variant_index.json)")
+    args = parser.parse_args(argv)
+
+    import bpy
+    pkg = batch_cli.load_addon()
+    index = pkg.variant_index.build_index(bpy.context, pkg.LIB_PATH, args.out)
+    total = sum(len(v) for sockets in index["objects"].values() for v in sockets.values())
+    print(f"HyTailor Index: {total} variants across {len(index['objects'])} objects in {index['seconds']:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import bpy
+import json
+import time
+import cProfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from bpy.app.handlers import persistent
+
+# --- OPT-IN INSTRUMENTATION ---
+# Stage timings, swallowed-exception counts and ID counts created/removed for
+# spawn, bake, finalize, skintone and panel draw. Off by default: every hook is
+# one flag check until "Record" is switched on in the Performance subpanel.
+# Results export as JSON (summary), Chrome trace (chrome://tracing, Perfetto)
+# or a cProfile .prof of everything that ran inside a stage.
+MAX_EVENTS = 20000
+# ID types counted around each stage
+ID_TYPES = ("objects", "meshes", "materials", "images", "node_groups", "collections", "armatures", "actions", "libraries")
+
+_state = {"enabled": False, "profile": None, "depth": 0, "t0": time.perf_counter()}
+STAGES = {}
+SWALLOWED = {}
+EVENTS = deque(maxlen=MAX_EVENTS)
+# Panel draw readout, shown whether or not recording is on
+DRAW_STATS = {"avg": 0.0, "last": 0.0}
+
+def enabled():
+    return _state["enabled"]
+
+def set_enabled(on, profile=False):
+    _state["enabled"] = on
+    _state["profile"] = cProfile.Profile() if on and profile else None
+
+def reset():
+    STAGES.clear()
+    SWALLOWED.clear()
+    EVENTS.clear()
+    if _state["profile"]:
+        _state["profile"] = cProfile.Profile()
+
+def _id_counts():
+    return [len(getattr(bpy.data, t)) for t in ID_TYPES]
+
+def _id_uids():
+    # session_uid is unique for the session, so an ID removed and another created
+    # during the same stage count as one of each instead of cancelling out
+    return {id_data.session_uid for t in ID_TYPES for id_data in getattr(bpy.data, t)}
+
+def _stats(name):
+    entry = STAGES.get(name)
+    if entry is None:
+        entry = STAGES[name] = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0, "created": 0, "removed": 0}
+    return entry
+
+def record(name, seconds, created=0, removed=0, start=None, detail=None):
+    entry = _stats(name)
+    entry["count"] += 1
+    entry["total"] += seconds
+    entry["last"] = seconds
+    entry["max"] = max(entry["max"], seconds)
+    entry["created"] += created
+    entry["removed"] += removed
+    if start is not None:
+        event = {"name": name, "ph": "X", "pid": 0, "tid": threading.get_ident(), "cat": name.split(".")[0],
+                 "ts": (start - _state["t0"]) * 1e6, "dur": seconds * 1e6}
+        if detail:
+            event["args"] = {"detail": detail}
+        EVENTS.append(event)
+
+@contextmanager
+def stage(name, detail=None):
+    """Time a block as stage name (e.g. "finalize.cleanup"); detail goes into the trace event"""
+    if not _state["enabled"]:
+        yield
+        return
+    profile = _state["profile"]
+    outermost = _state["depth"] == 0
+    # Only outermost stages pay for the per-ID scan; nested ones (often one per
+    # object) compare counts, which nets out a removal and a creation of one type
+    before = _id_uids() if outermost else _id_counts()
+    _state["depth"] += 1
+    if profile and outermost:
+        profile.enable()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if profile and outermost:
+            profile.disable()
+        _state["depth"] -= 1
+        if outermost:
+            after = _id_uids()
+            created, removed = len(after - before), len(before - after)
+        else:
+            deltas = [b - a for a, b in zip(before, _id_counts())]
+            created = sum(d for d in deltas if d > 0)
+            removed = -sum(d for d in deltas if d < 0)
+        record(name, seconds, created, removed, start, detail)
+
+def swallowed(where, error=None):
+    """Count an exception that was handled and not re-raised"""
+    if not _state["enabled"]:
+        return
+    SWALLOWED[where] = SWALLOWED.get(where, 0) + 1
+    if error is not None:
+        print(f"HyTailor Instrument: {where}: {type(error).__name__}: {error}")
+
+def record_draw_time(seconds):
+    # Exponential moving average so the readout settles instead of flickering
+    DRAW_STATS["last"] = seconds
+    DRAW_STATS["avg"] = seconds if not DRAW_STATS["avg"] else DRAW_STATS["avg"] * 0.9 + seconds * 0.1
+    # Panel redraws are far too frequent for the trace; keep them to the summary
+    if _state["enabled"]:
+        record("panel.draw", seconds)
+
+# --- EXPORT ---
+def summary():
+    return {
+        "stages": {name: dict(entry, avg=entry["total"] / entry["count"]) for name, entry in sorted(STAGES.items())},
+        "swallowed": dict(sorted(SWALLOWED.items())),
+        "ids": dict(zip(ID_TYPES, _id_counts())),
+    }
+
+def export(path, fmt):
+    if fmt == 'PROFILE':
+        if not _state["profile"]:
+            raise RuntimeError("Profiling was not enabled while recording")
+        _state["profile"].dump_stats(path)
+        return
+    data = summary() if fmt == 'JSON' else {"traceEvents": list(EVENTS), "displayTimeUnit": "ms"}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+
+# --- UI ---
+def _on_toggle(self, context):
+    set_enabled(self.hy_instrument, self.hy_instrument_profile)
+
+@persistent
+def _on_load(*_args):
+    scene = bpy.context.scene
+    if scene:
+        set_enabled(scene.hy_instrument, scene.hy_instrument_profile)
+
+class HYCHAR_OT_perf_export(bpy.types.Operator):
+    bl_idname = "hychar.perf_export"
+    bl_label = "Export Performance Data"
+    bl_description = "Write the recorded stages as a JSON summary, a Chrome trace or a cProfile file"
+
+    format: bpy.props.EnumProperty(
+        name="Format",
+        items=[
+            ('JSON', "JSON Summary", "Per-stage counts and timings, swallowed exceptions, ID counts"),
+            ('TRACE', "Chrome Trace", "Timeline for chrome://tracing or Perfetto"),
+            ('PROFILE', "cProfile", "Python profile of everything run inside a stage (.prof)"),
+        ],
+        default='JSON'
+    )
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH')
+
+    def invoke(self, context, event):
+        ext = {'JSON': "json", 'TRACE': "trace.json", 'PROFILE': "prof"}[self.format]
+        self.filepath = bpy.path.abspath(f"//hytailor_perf.{ext}") if bpy.data.filepath else f"hytailor_perf.{ext}"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        try:
+            export(self.filepath, self.format)
+        except (OSError, RuntimeError) as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Wrote {self.filepath}")
+        return {'FINISHED'}
+
+class HYCHAR_OT_perf_reset(bpy.types.Operator):
+    bl_idname = "hychar.perf_reset"
+    bl_label = "Reset Performance Data"
+
+    def execute(self, context):
+        reset()
+        return {'FINISHED'}
+
+class UI_PT_HyTailorPerformance(bpy.types.Panel):
+    bl_label = "Performance"
+    bl_idname = "UI_PT_hytailor_performance"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'HyTailor'
+    bl_parent_id = "UI_PT_character_customizer"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        row = layout.row(align=True)
+        row.prop(scene, "hy_instrument", text="Record", toggle=True)
+        row.prop(scene, "hy_instrument_profile", text="cProfile", toggle=True)
+        row.operator("hychar.perf_reset", text="", icon='TRASH')
+
+        if STAGES:
+            col = layout.column(align=True)
+            for name, entry in sorted(STAGES.items()):
+                split = col.split(factor=0.5)
+                split.label(text=name)
+                split.label(text=f"{entry['count']}x {entry['total'] / entry['count'] * 1000:.1f} / "
+                                 f"{entry['max'] * 1000:.1f} ms")
+                if entry["created"] or entry["removed"]:
+                    col.label(text=f"    IDs +{entry['created']} -{entry['removed']}")
+        elif scene.hy_instrument:
+            layout.label(text="Nothing recorded yet", icon='INFO')
+
+        if SWALLOWED:
+            box = layout.box()
+            box.label(text="Handled exceptions", icon='ERROR')
+            for where, count in sorted(SWALLOWED.items()):
+                box.label(text=f"{where}: {count}")
+
+        row = layout.row(align=True)
+        row.operator("hychar.perf_export", text="JSON").format = 'JSON'
+        row.operator("hychar.perf_export", text="Trace").format = 'TRACE'
+        row.operator("hychar.perf_export", text="Profile").format = 'PROFILE'
+
+classes = (HYCHAR_OT_perf_export, HYCHAR_OT_perf_reset, UI_PT_HyTailorPerformance)
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.Scene.hy_instrument = bpy.props.BoolProperty(
+        name="Record Performance",
+        description="Time HyTailor stages and count handled exceptions and created/removed data-blocks",
+        default=False,
+        update=_on_toggle
+    )
+    bpy.types.Scene.hy_instrument_profile = bpy.props.BoolProperty(
+        name="cProfile",
+        description="Also run the Python profiler inside recorded stages (slower)",
+        default=False,
+        update=_on_toggle
+    )
+    if _on_load not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(_on_load)
+
+def unregister():
+    if _on_load in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_on_load)
+    del bpy.types.Scene.hy_instrument
+    del bpy.types.Scene.hy_instrument_profile
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+    set_enabled(False)
@@ -0,0 +1,79 @@
+import bpy
+import os
+import tempfile
+from . import template_cache
+
+# --- LINKED SPAWN ---
+# Linking the library collection and overriding it avoids copying every mesh,
+# material, node group and image (including hidden clothing variants) into the
+# file. Only what finalize actually clones is made local, right before cloning.
+
+def is_linked(id_data):
+    return bool(id_data and (id_data.library or id_data.override_library))
+
+def link_collection(context, filepath, coll_name):
+    """Link coll_name from filepath and instance it as an editable library override hierarchy"""
+    with bpy.data.libraries.load(filepath, link=True) as (data_from, data_to):
+        if coll_name in data_from.collections:
+            data_to.collections = [coll_name]
+
+    coll = next((c for c in data_to.collections if c), None)
+    if not coll:
+        return None
+    # Fully editable so the panel can change GN sockets and material values
+    override = coll.override_hierarchy_create(context.scene, context.view_layer, do_fully_editable=True)
+    if not context.scene.collection.children.get(override.name):
+        context.scene.collection.children.link(override)
+    return override
+
+def localize(id_data):
+    """Turn an override or linked ID into a local one; returns the ID to use from now on"""
+    if not is_linked(id_data):
+        return id_data
+    if id_data.override_library:
+        return id_data.make_local(clear_liboverride=True)
+    return id_data.make_local()
+
+def localize_objects(objs):
+    """Make the given objects and the data/materials finalize copies local. Returns the localized ID count."""
+    count = 0
+    for obj in objs:
+        if is_linked(obj):
+            localize(obj)
+            count += 1
+        if obj.data and is_linked(obj.data):
+            obj.data = localize(obj.data)
+            count += 1
+        for slot in obj.material_slots:
+            if slot.material and is_linked(slot.material):
+                slot.material = localize(slot.material)
+                count += 1
+    return count
+
+# UI state, and libraries (written as references by the IDs linked from them)
+_SKIP_ID_TYPES = {'WINDOWMANAGER', 'SCREEN', 'WORKSPACE', 'LIBRARY'}
+
+def file_ids():
+    """Every used local ID a save would write, minus UI data and the in-memory spawn template.
+    Scenes are kept even without users (headless sessions have no window holding one)."""
+    skip = template_cache.template_ids()
+    return {id_data for id_data in bpy.data.user_map()
+            if (id_data.users or id_data.id_type == 'SCENE') and not id_data.library
+            and id_data.id_type not in _SKIP_ID_TYPES and id_data not in skip}
+
+def write_ids(filepath):
+    """Write file_ids() to a .blend without running the save handlers (which would free the template)"""
+    bpy.data.libraries.write(filepath, file_ids(), fake_user=False)
+
+def measure_file_size():
+    """Bytes the file's data takes on disk, by writing every used ID to a throwaway .blend.
+    libraries.write rather than save_as_mainfile(copy=True): a save would run the save
+    handlers (e.g. bake_logic's, which switches baked images to FILE) just to measure."""
+    fd, path = tempfile.mkstemp(suffix=".blend")
+    os.close(fd)
+    try:
+        write_ids(path)
+        return os.path.getsize(path)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
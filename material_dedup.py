@@ -0,0 +1,107 @@
+import bpy
+from . import hash_utils
+
+# --- SHARED-MATERIAL FINALIZE ---
+# Finalize normally gives every character its own {PREFIX}_ copy of every
+# material, so a crowd carries one near-identical node tree (and baked image)
+# per NPC. In shared mode each material is fingerprinted by its node tree and
+# socket values; if a character finalized earlier in shared mode already owns
+# an identical one it is reused instead of copied. Baked images are matched
+# by pixel hash first, so two identical bakes also end up as one image and
+# the materials using them fingerprint the same.
+FINGERPRINT_KEY = "hy_fingerprint"
+
+# Material settings outside the node tree that change how it renders
+MATERIAL_ATTRS = ("surface_render_method", "blend_method", "use_backface_culling",
+                  "use_transparency_overlap", "diffuse_color", "metallic", "roughness", "pass_index")
+
+def fingerprint(mat):
+    h = hash_utils.new_hash()
+    for attr in MATERIAL_ATTRS:
+        val = getattr(mat, attr, None)
+        if hasattr(val, "__len__") and not isinstance(val, str):
+            val = tuple(round(v, 6) for v in val)
+        h.update(f"{attr}={val!r};".encode())
+    if mat.node_tree:
+        hash_utils.hash_node_tree(mat.node_tree, h)
+    return h.hexdigest()
+
+def image_bytes(img):
+    w, h = img.size
+    return w * h * img.channels * (4 if img.is_float else 1)
+
+def baked_nodes(mat):
+    if not mat.node_tree:
+        return []
+    return [n for n in mat.node_tree.nodes if n.name.startswith("BAKED_RESULT") and getattr(n, "image", None)]
+
+class MaterialDeduper:
+    """Per-finalize index of shared materials (fingerprint -> material) and baked images (pixel hash -> image)"""
+
+    def __init__(self):
+        self.materials = {}
+        self.images = {}
+        for mat in bpy.data.materials:
+            fp = mat.get(FINGERPRINT_KEY)
+            if fp and not mat.library:
+                self.materials.setdefault(fp, mat)
+        for img in bpy.data.images:
+            px = img.get(hash_utils.PIXEL_HASH_KEY)
+            if px:
+                self.images.setdefault(px, img)
+        self.reused = 0
+        self.images_shared = 0
+        self.images_removed = 0
+        self.bytes_saved = 0
+
+    def share_images(self, mat):
+        """Point mat's baked image nodes at existing identical images, removing the duplicates
+        nothing else uses. Edits mat itself: finalize passes the spawned template's material,
+        which is removed afterwards, so sharing before the copy saves fingerprinting it twice."""
+        for node in baked_nodes(mat):
+            img = node.image
+            if hash_utils.PIXEL_HASH_KEY in img:
+                continue
+            if not (img.has_data or img.filepath):
+                continue
+            px = hash_utils.hash_pixels(img)
+            existing = self.images.get(px)
+            if existing is None or existing == img:
+                img[hash_utils.PIXEL_HASH_KEY] = px
+                self.images[px] = img
+                continue
+            node.image = existing
+            self.images_shared += 1
+            if img.users == 0:
+                self.bytes_saved += image_bytes(img)
+                bpy.data.images.remove(img)
+                self.images_removed += 1
+
+    def find(self, mat):
+        """(existing identical material or None, fingerprint of mat)"""
+        self.share_images(mat)
+        fp = fingerprint(mat)
+        existing = self.materials.get(fp)
+        # The stored fingerprint goes stale if someone edited the shared material since
+        if existing and existing != mat:
+            current = fingerprint(existing)
+            if current != fp:
+                existing[FINGERPRINT_KEY] = current
+                del self.materials[fp]
+                self.materials.setdefault(current, existing)
+                existing = None
+        if existing:
+            self.reused += 1
+        return existing, fp
+
+    def remember(self, mat, fp):
+        mat[FINGERPRINT_KEY] = fp
+        self.materials[fp] = mat
+
+    def summary(self):
+        # Reused materials were never copied; shared images only count once actually removed
+        text = (f"shared {self.reused} material(s), {self.images_shared} image(s), "
+                f"{self.reused + self.images_removed} fewer IDs")
+        if self.bytes_saved:
+            text += f", {self.bytes_saved / (1024 * 1024):.1f} MB pixels saved"
+        return text
@@ -0,0 +1,139 @@
+import bpy
+import time
+
+# --- MODAL STEP RUNNER ---
+# Long operators are written as generators that yield a label after each unit
+# of work (usually one object). execute() drains the generator in one go, as
+# scripts and batch runs expect; invoke() runs it from a timer instead, one
+# step per tick, so the UI keeps redrawing, shows progress and Esc can cancel.
+# Cancelling throws Cancelled into the generator at its current yield, so the
+# generator's own try/finally blocks do the restoring.
+# While a run is modal only view navigation reaches the rest of the UI, so the
+# user can't edit or delete what the steps are working on; each step gets the
+# current context through StepContext, and IDs a run registers with watch()
+# are checked before every step.
+TICK_SECONDS = 0.01
+NAVIGATION_EVENTS = {
+    'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+    'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE', 'MOUSESMARTZOOM', 'NDOF_MOTION',
+}
+
+class Cancelled(Exception):
+    """Thrown into a step generator when the user presses Esc"""
+
+def drain(gen):
+    """Run a step generator to the end and return its return value"""
+    try:
+        while True:
+            next(gen)
+    except StopIteration as e:
+        return e.value
+
+class StepContext:
+    """Stands in for the context a step generator was started with; attribute reads go to
+    the context of the current tick (the invoke-time one isn't valid once invoke returns)"""
+
+    def __init__(self, context):
+        self.current = context
+
+    def __getattr__(self, name):
+        return getattr(self.current, name)
+
+class StepOperator:
+    """Operator mixin: define steps(context) as a generator returning the operator result.
+    Steps may set self.progress_total (and read self.progress_done) to drive the progress bar."""
+
+    def _start(self):
+        self.progress_total = 0
+        self.progress_done = 0
+        self.step_times = []
+        self._watched = []
+        self._t_step = time.perf_counter()
+
+    def watch(self, *ids):
+        """IDs the steps rely on; the run is cancelled if one is removed between steps"""
+        self._watched.extend(i for i in ids if i is not None)
+
+    def _removed_id(self):
+        for id_data in self._watched:
+            try:
+                id_data.name
+            except ReferenceError:
+                return True
+        return False
+
+    def _record(self, label):
+        now = time.perf_counter()
+        self.step_times.append((label, now - self._t_step))
+        self._t_step = now
+        self.progress_done += 1
+
+    def _print_times(self):
+        for label, seconds in self.step_times:
+            print(f"HyTailor {self.bl_label}: {label} {seconds * 1000:.1f}ms")
+
+    def execute(self, context):
+        self._start()
+        gen = self.steps(context)
+        try:
+            while True:
+                self._record(next(gen))
+        except StopIteration as e:
+            result = e.value
+        self._print_times()
+        return result or {'FINISHED'}
+
+    def invoke(self, context, event):
+        if bpy.app.background or context.window is None:
+            return self.execute(context)
+        self._start()
+        self._context = StepContext(context)
+        self._gen = self.steps(self._context)
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(TICK_SECONDS, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 100)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            return self._advance(context, cancel=True)
+        if event.type == 'TIMER':
+            return self._advance(context)
+        if event.type in NAVIGATION_EVENTS or event.type.startswith('TIMER'):
+            return {'PASS_THROUGH'}
+        # Editing (clicks, shortcuts, undo) waits until the run ends
+        return {'RUNNING_MODAL'}
+
+    def _advance(self, context, cancel=False):
+        self._context.current = context
+        if not cancel and self._removed_id():
+            self.report({'WARNING'}, f"{self.bl_label}: data it was working on was removed, stopping")
+            cancel = True
+        try:
+            label = self._gen.throw(Cancelled()) if cancel else next(self._gen)
+        except StopIteration as e:
+            self._end(context)
+            return e.value or {'FINISHED'}
+        except Cancelled:
+            # Cancelled before the generator started, or it didn't handle it
+            self._end(context)
+            return {'CANCELLED'}
+        except Exception:
+            self._end(context)
+            raise
+        self._record(label)
+        total = max(self.progress_total, self.progress_done, 1)
+        context.window_manager.progress_update(int(100 * self.progress_done / total))
+        if context.workspace:
+            context.workspace.status_text_set(
+                f"{self.bl_label}: {label} ({self.progress_done}/{total}) - Esc to cancel")
+        return {'RUNNING_MODAL'}
+
+    def _end(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        if context.workspace:
+            context.workspace.status_text_set(None)
+        self._print_times()
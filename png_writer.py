@@ -0,0 +1,66 @@
+import os
+import zlib
+import time
+import struct
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# --- BACKGROUND PNG WRITER ---
+# Image.save() encoded every baked texture on the main thread, and the result
+# node then loaded the same file straight back. Baked pixels are now copied out
+# once with foreach_get and encoded here on worker threads (zlib releases the
+# GIL), so the next bake starts while the previous PNG is still compressing.
+DEFAULT_LEVEL = 6
+
+def _chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+def encode_png(rgba, level=DEFAULT_LEVEL):
+    """PNG bytes of an (h, w, 4) uint8 array, top row first"""
+    h, w = rgba.shape[:2]
+    rows = np.zeros((h, w * 4 + 1), dtype=np.uint8)  # leading 0 per row: no filter
+    rows[:, 1:] = rgba.reshape(h, w * 4)
+    header = struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", header)
+            + _chunk(b"IDAT", zlib.compress(rows.tobytes(), level)) + _chunk(b"IEND", b""))
+
+def to_bytes(pixels, width, height):
+    """Blender float pixels (bottom row first) as an (h, w, 4) uint8 array, top row first"""
+    rgba = np.clip(np.rint(pixels.reshape(height, width, 4) * 255.0), 0, 255).astype(np.uint8)
+    return rgba[::-1]
+
+class PngWriter:
+    """Thread pool writing RGBA float buffers to PNG files"""
+
+    def __init__(self, level=DEFAULT_LEVEL, workers=None):
+        self.level = level
+        self._pool = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1))
+        # (path, future) per submission: the same path can be queued twice
+        self._futures = []
+
+    def _write(self, path, pixels, width, height):
+        t_start = time.perf_counter()
+        data = encode_png(to_bytes(pixels, width, height), self.level)
+        # Atomic so the bake cache never copies a half-written file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return time.perf_counter() - t_start
+
+    def submit(self, path, pixels, width, height):
+        self._futures.append((path, self._pool.submit(self._write, path, pixels, width, height)))
+
+    def wait(self):
+        """Block until every queued PNG is written. Returns (encode seconds, {path: error})."""
+        seconds, errors = 0.0, {}
+        for path, future in self._futures:
+            try:
+                seconds += future.result()
+            except Exception as e:
+                # A later successful write to the same path doesn't hide this one
+                errors.setdefault(path, str(e))
+        self._futures.clear()
+        self._pool.shutdown()
+        return seconds, errors
@@ -0,0 +1,186 @@
+import bpy
+from bpy.app.handlers import persistent
+
+# --- GN OBJECT REGISTRY ---
+# The panel redraws constantly, and scanning bpy.data.objects for every *_GN
+# object on each redraw gets slow in big scenes. Resolve them all in one pass,
+# keep the result until objects are added/removed, a file loads or undo/redo runs.
+GN_OBJECTS = (
+    "Beard_GN", "Cape_GN", "Earrings_GN", "FaceAcc_GN", "Gloves_GN", "Hair_GN",
+    "HeadAcc_GN", "Overpants_GN", "Overshirt_GN", "Pants_GN", "Shoes_GN", "Undershirt_GN",
+)
+GN_MODIFIER = "GeometryNodes"
+# Integer style sockets on each GN modifier: {object prefix: {spec key: socket}}.
+# The panel, batch specs (the keys) and the variant index all read these.
+STYLE_SOCKETS = {
+    "Beard_GN": {"beard": "Socket_4"},
+    "Cape_GN": {"cape": "Socket_17", "cape_neck": "Socket_18"},
+    "Earrings_GN": {"earrings": "Socket_19", "earring_side": "Socket_20"},
+    "FaceAcc_GN": {"face_acc": "Socket_21"},
+    "Gloves_GN": {"gloves": "Socket_4"},
+    "Hair_GN": {"hair": "Socket_2"},
+    "HeadAcc_GN": {"head_acc": "Socket_22"},
+    "Overpants_GN": {"overpants": "Socket_4"},
+    "Overshirt_GN": {"overshirt": "Socket_4"},
+    "Pants_GN": {"pants": "Socket_4"},
+    "Shoes_GN": {"shoes": "Socket_15"},
+    "Undershirt_GN": {"undershirt": "Socket_4"},
+}
+RIG_NAME = "CharRig"
+
+def style_path(prefix, key):
+    """Property path of a style socket on its GN modifier, for layout.prop"""
+    return f'["{STYLE_SOCKETS[prefix][key]}"]'
+
+_cache = {"valid": False, "object_count": -1, "objects": {}, "rig": None}
+
+def invalidate(*_args):
+    _cache["valid"] = False
+    _sockets.clear()
+
+def _rebuild():
+    found = {}
+    rig = None
+    for obj in bpy.data.objects:
+        # Linked spawns keep the read-only library objects next to their
+        # overrides under the same names; only the local ones are editable.
+        if obj.library:
+            continue
+        name = obj.name
+        if name == RIG_NAME:
+            rig = obj
+        # Same "first match in bpy.data order" rule as the old per-prefix scans
+        for prefix in GN_OBJECTS:
+            if prefix not in found and name.startswith(prefix):
+                found[prefix] = obj
+    _cache["objects"] = {p: (o, o.modifiers.get(GN_MODIFIER)) for p, o in found.items()}
+    _cache["rig"] = rig
+    _cache["object_count"] = len(bpy.data.objects)
+    _cache["valid"] = True
+
+def _still_named(obj, check):
+    # Cached objects can be renamed or deleted behind our back (finalize does both)
+    try:
+        return check(obj.name)
+    except ReferenceError:
+        return False
+
+def get_gn(prefix):
+    """(object, GeometryNodes modifier) for a *_GN prefix, (None, None) if it isn't in the file"""
+    if not _cache["valid"]:
+        _rebuild()
+    entry = _cache["objects"].get(prefix)
+    if entry and not _still_named(entry[0], lambda n: n.startswith(prefix)):
+        _rebuild()
+        entry = _cache["objects"].get(prefix)
+    return entry or (None, None)
+
+def get_object(prefix):
+    return get_gn(prefix)[0]
+
+def get_modifier(prefix):
+    return get_gn(prefix)[1]
+
+def get_rig():
+    if not _cache["valid"]:
+        _rebuild()
+    rig = _cache["rig"]
+    if rig and not _still_named(rig, lambda n: n == RIG_NAME):
+        _rebuild()
+        rig = _cache["rig"]
+    return rig
+
+# --- MATERIAL SOCKET RESOLVER ---
+# (material prefix, group node, socket) -> (socket, property name) on the Body
+# materials, or None when it doesn't resolve. The panel asks for ~50 of these
+# per draw. Only the slot search is cached, as (material, node name, socket
+# name, property): sockets aren't IDs, so a held one dangles silently once its
+# node is freed, while a held material raises ReferenceError. The node and
+# input are fetched again on every call.
+BODY_NAME = "Body"
+SOCKET_PROPS = ("index", "value", "default_value", "enum_value")
+
+_sockets = {}
+_MISSING = object()
+
+def _find_path(mat_prefix, grp, sock):
+    """(material, node name, socket name, property) for the first Body material starting with mat_prefix"""
+    obj = bpy.data.objects.get((BODY_NAME, None))
+    if not obj:
+        return None
+    slot = next((s for s in obj.material_slots if s.material and s.material.name.startswith(mat_prefix)), None)
+    if not slot or not slot.material.node_tree:
+        return None
+    node = slot.material.node_tree.nodes.get(grp)
+    if not node:
+        return None
+    s = node.inputs.get(sock)
+    if not s:
+        return None
+    prop = next((p for p in SOCKET_PROPS if hasattr(s, p)), None)
+    return (slot.material, grp, sock, prop) if prop else None
+
+def _fetch(path):
+    mat, grp, sock, prop = path
+    node = mat.node_tree.nodes.get(grp) if mat.node_tree else None
+    s = node.inputs.get(sock) if node else None
+    return (s, prop) if s else None
+
+def find_socket(mat_prefix, grp, sock):
+    """Uncached lookup: first Body material starting with mat_prefix -> group node -> input"""
+    path = _find_path(mat_prefix, grp, sock)
+    return _fetch(path) if path else None
+
+def resolve_socket(mat_prefix, grp, sock):
+    key = (mat_prefix, grp, sock)
+    path = _sockets.get(key, _MISSING)
+    if path is _MISSING:
+        path = _sockets[key] = _find_path(mat_prefix, grp, sock)
+    if path is None:
+        return None
+    try:
+        return _fetch(path)
+    except ReferenceError:
+        # The material was removed since the lookup was cached
+        path = _sockets[key] = _find_path(mat_prefix, grp, sock)
+        return _fetch(path) if path else None
+
+# --- INVALIDATION HANDLERS ---
+@persistent
+def _on_depsgraph_update(scene, depsgraph):
+    # Only adding/removing objects changes what the GN lookups resolve to;
+    # renames and deletions of cached objects are caught on access.
+    if _cache["valid"] and len(bpy.data.objects) != _cache["object_count"]:
+        invalidate()
+    # Socket lookups go stale when a material or node tree is edited (nodes
+    # added or deleted) or the Body's slots are reassigned
+    if _sockets:
+        for update in depsgraph.updates:
+            data = update.id
+            if isinstance(data, (bpy.types.Material, bpy.types.NodeTree)) or (
+                    isinstance(data, bpy.types.Object) and data.name == BODY_NAME):
+                _sockets.clear()
+                break
+
+@persistent
+def _on_file_or_undo(*_args):
+    invalidate()
+
+_HANDLERS = (
+    (bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update),
+    (bpy.app.handlers.load_post, _on_file_or_undo),
+    (bpy.app.handlers.undo_post, _on_file_or_undo),
+    (bpy.app.handlers.redo_post, _on_file_or_undo),
+)
+
+def register():
+    for handlers, fn in _HANDLERS:
+        if fn not in handlers:
+            handlers.append(fn)
+    invalidate()
+
+def unregister():
+    for handlers, fn in _HANDLERS:
+        if fn in handlers:
+            handlers.remove(fn)
+    invalidate()
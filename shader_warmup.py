@@ -0,0 +1,257 @@
+import bpy
+import time
+from bpy.app.handlers import persistent
+from . import registry
+from . import instrument
+
+# --- EEVEE SHADER WARM-UP ---
+# Switching a Material Selection / Style menu on a Hy* group changes the
+# generated shader, and Eevee stalls the viewport while it compiles the new
+# variant. Warm-up walks the menu options of every Hy* group on the spawned
+# character once, right after spawning: each option is set, the viewport is
+# redrawn so Eevee compiles it, and the original value is put back at the end.
+# Blender keeps compiled passes in its own shader cache, so toggling to one of
+# those options later reuses the pass instead of compiling from scratch.
+# Runs from a timer so the UI stays responsive; materials are stepped in
+# parallel (one socket change per material per step) so a step is one wait.
+# Sockets are queued as (material name, node name, input identifier) and
+# looked up again on every tick. Undo/redo or an edit elsewhere in the scene
+# stops the run, and a socket the user changed meanwhile keeps the user's value.
+TICK_SECONDS = 0.05
+STEP_TIMEOUT = 30.0
+GROUP_PREFIX = "Hy"
+
+# "variants" counts menu options that were set and waited on, not confirmed compiles
+STATUS = {"running": False, "steps": 0, "total": 0, "variants": 0, "seconds": 0.0, "wait": 0.0, "message": ""}
+_run = {}
+
+def _menu_options(tree, identifier, _depth=0):
+    """Item names of the Menu Switch nodes a group's menu input drives (through nested groups)"""
+    options = []
+    for link in tree.links:
+        if link.from_node.type != 'GROUP_INPUT' or link.from_socket.identifier != identifier:
+            continue
+        node = link.to_node
+        if node.type == 'MENU_SWITCH' and link.to_socket == node.inputs[0]:
+            options += [s.name for s in node.inputs[1:] if s.name not in options]
+        elif node.type == 'GROUP' and node.node_tree and _depth < 4:
+            for name in _menu_options(node.node_tree, link.to_socket.identifier, _depth + 1):
+                if name not in options:
+                    options.append(name)
+    return options
+
+def character_materials(rig):
+    mats = []
+    for obj in rig.children_recursive:
+        if obj.type == 'MESH':
+            for slot in obj.material_slots:
+                if slot.material and slot.material.node_tree and slot.material not in mats:
+                    mats.append(slot.material)
+    return mats
+
+def collect_variants(materials, limit=0):
+    """({material name: [(socket key, option), ...]}, {socket key: current value}) for every unlinked
+    menu input of every Hy* group, skipping the value each socket already has. A socket key is
+    (material name, node name, input identifier). limit caps options per socket (0 = all)."""
+    queues, originals = {}, {}
+    for mat in materials:
+        queue = []
+        for node in mat.node_tree.nodes:
+            if node.type != 'GROUP' or not node.node_tree or not node.node_tree.name.startswith(GROUP_PREFIX):
+                continue
+            for sock in node.inputs:
+                if sock.type != 'MENU' or sock.is_linked:
+                    continue
+                options = [o for o in _menu_options(node.node_tree, sock.identifier) if o != sock.default_value]
+                if not options:
+                    continue
+                key = (mat.name, node.name, sock.identifier)
+                originals[key] = sock.default_value
+                queue += [(key, o) for o in (options[:limit] if limit else options)]
+        if queue:
+            queues[mat.name] = queue
+    return queues, originals
+
+def _socket(key):
+    """The live socket for a socket key, or None if its material or node is gone"""
+    mat_name, node_name, identifier = key
+    mat = bpy.data.materials.get((mat_name, None))
+    node = mat.node_tree.nodes.get(node_name) if mat and mat.node_tree else None
+    if node is None:
+        return None
+    return next((s for s in node.inputs if s.identifier == identifier), None)
+
+def _redraw():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+def _compiling():
+    return bpy.app.is_job_running('SHADER_COMPILATION')
+
+def _put_back(key):
+    """Restore a socket's original value, unless it no longer holds what the warm-up wrote"""
+    written = _run["written"].pop(key, None)
+    sock = _socket(key)
+    if written is not None and sock is not None and sock.default_value == written:
+        sock.default_value = _run["originals"][key]
+
+def _restore():
+    for key in list(_run.get("written", {})):
+        _put_back(key)
+
+def _finish(message):
+    _restore()
+    _redraw()
+    STATUS["running"] = False
+    STATUS["seconds"] = time.perf_counter() - _run["t_start"]
+    STATUS["message"] = message
+    if instrument.enabled():
+        instrument.record("warmup.total", STATUS["seconds"])
+    print(f"HyTailor Warm-up: {message}")
+    _run.clear()
+
+def _tick():
+    if not STATUS["running"]:
+        return None
+    # Updates from the spawn that started the run have been handled by now
+    _run["armed"] = True
+    if _run["waiting"]:
+        elapsed = time.perf_counter() - _run["t_step"]
+        # Give the redraw one tick to start compiling, then wait for Eevee to finish
+        if _run["ticks"] == 0 or (_compiling() and elapsed < STEP_TIMEOUT):
+            _run["ticks"] += 1
+            return TICK_SECONDS
+        STATUS["wait"] += elapsed
+        STATUS["variants"] += _run["pending"]
+        if instrument.enabled():
+            instrument.record("warmup.step", elapsed)
+        _run["waiting"] = False
+
+    step = STATUS["steps"]
+    if step >= _run["longest"]:
+        _finish(f"stepped through {STATUS['variants']} shader variants in {step} steps, "
+                f"{time.perf_counter() - _run['t_start']:.1f}s ({STATUS['wait']:.1f}s waiting on Eevee)")
+        return None
+    pending = 0
+    for queue in _run["queues"].values():
+        if step >= len(queue):
+            continue
+        key, option = queue[step]
+        prev = queue[step - 1][0] if step > 0 else None
+        # Only one socket per material differs from its original at a time
+        if prev is not None and prev != key:
+            _put_back(prev)
+        sock = _socket(key)
+        if sock is None:
+            _finish("stopped, character changed")
+            return None
+        if prev == key and sock.default_value != _run["written"].get(key):
+            # The user picked a value for this socket meanwhile; leave it alone
+            continue
+        sock.default_value = option
+        _run["written"][key] = option
+        pending += 1
+    STATUS["steps"] += 1
+    _run.update(waiting=pending > 0, ticks=0, pending=pending, t_step=time.perf_counter())
+    if pending:
+        _redraw()
+    return TICK_SECONDS
+
+def start(rig, limit=0):
+    """Begin warming the rig's materials. Returns the number of variants queued (0 = nothing to do)."""
+    if bpy.app.background or STATUS["running"]:
+        return 0
+    queues, originals = collect_variants(character_materials(rig), limit)
+    total = sum(len(q) for q in queues.values())
+    if not total:
+        return 0
+    _run.clear()
+    _run.update(
+        queues=queues, originals=originals, written={},
+        longest=max(len(q) for q in queues.values()), armed=False,
+        waiting=False, ticks=0, pending=0, t_start=time.perf_counter(),
+    )
+    STATUS.update(running=True, steps=0, total=total, variants=0, seconds=0.0, wait=0.0, message="")
+    bpy.app.timers.register(_tick, first_interval=TICK_SECONDS)
+    return total
+
+def stop():
+    if STATUS["running"]:
+        _finish(f"cancelled after {STATUS['variants']} of {STATUS['total']} variants")
+
+class HYCHAR_OT_warm_shaders(bpy.types.Operator):
+    bl_idname = "hychar.warm_shaders"
+    bl_label = "Warm Up Shaders"
+    bl_description = "Compile the Eevee shader for every Hy* material option now, so switching options later doesn't stall"
+
+    limit: bpy.props.IntProperty(
+        name="Options per Menu",
+        description="Most options compiled per menu socket (0 = all)",
+        min=0,
+        default=0
+    )
+    cancel: bpy.props.BoolProperty(default=False, options={'SKIP_SAVE'})
+
+    def execute(self, context):
+        if self.cancel:
+            stop()
+            return {'FINISHED'}
+        if bpy.app.background:
+            self.report({'WARNING'}, "Shader warm-up needs a viewport")
+            return {'CANCELLED'}
+        rig = registry.get_rig()
+        if not rig:
+            self.report({'ERROR'}, "Spawn a character first")
+            return {'CANCELLED'}
+        queued = start(rig, self.limit)
+        if not queued:
+            self.report({'INFO'}, "Nothing to warm up" if not STATUS["running"] else "Warm-up already running")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Warming up {queued} shader variants")
+        return {'FINISHED'}
+
+@persistent
+def _on_load(*_args):
+    # Sockets from the old file are gone
+    if STATUS["running"]:
+        STATUS["running"] = False
+        _run.clear()
+
+@persistent
+def _on_undo(*_args):
+    if STATUS["running"]:
+        _finish("stopped by undo/redo")
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph):
+    # The warm-up's own writes only change shading; anything moved or reshaped is the user editing
+    if not STATUS["running"] or not _run.get("armed"):
+        return
+    for update in depsgraph.updates:
+        if update.is_updated_geometry or update.is_updated_transform:
+            _finish("stopped, scene edited")
+            return
+
+_HANDLERS = (
+    (bpy.app.handlers.load_pre, _on_load),
+    (bpy.app.handlers.undo_pre, _on_undo),
+    (bpy.app.handlers.redo_pre, _on_undo),
+    (bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update),
+)
+
+def register():
+    bpy.utils.register_class(HYCHAR_OT_warm_shaders)
+    for handlers, fn in _HANDLERS:
+        if fn not in handlers:
+            handlers.append(fn)
+
+def unregister():
+    for handlers, fn in _HANDLERS:
+        if fn in handlers:
+            handlers.remove(fn)
+    stop()
+    if bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.unregister(_tick)
+    bpy.utils.unregister_class(HYCHAR_OT_warm_shaders)
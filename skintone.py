@@ -0,0 +1,135 @@
+import re
+import bpy
+from bpy.app.handlers import persistent
+from . import instrument
+
+# --- SKINTONE PROPAGATION ---
+# The master skintone slider drives the Skintone input of the Hy* group in the
+# Body/Ears/Mouth/Face materials. Those inputs are indexed once across every
+# material in the file (spawned and finalized {PREFIX}_ copies alike), along
+# with whether each one takes the value as a menu string or a number, so a
+# change is a flat loop of writes instead of a per-slot name/node/type search.
+# The index holds the material and the node name and input identifier, not the
+# socket itself (sockets aren't IDs, so a held one dangles once its node is
+# freed); the socket is looked up again when it's written.
+# Unchanged sockets are skipped; Eevee then recompiles only the materials that
+# changed, once, on the next redraw.
+SYNC_GROUPS = {
+    "Body": "HyBody",
+    "Ears": "HyEars",
+    "Mouth": "HyMouth",
+    "Face": "HyFace",
+}
+SOCKET_NAME = "Skintone"
+# "Body", "Body.001", "{PREFIX}_Body", "{PREFIX}_Body.001"; not "Bodysuit" or "Hair_Bodysuit"
+_NAME_PATTERNS = {prefix: re.compile(rf"^(?:.+_)?{re.escape(prefix)}(?:\.\d+)?$") for prefix in SYNC_GROUPS}
+
+# material -> [(node name, input identifier, takes_string)]
+_index = {"key": None, "materials": {}}
+
+def invalidate(*_args):
+    _index["key"] = None
+
+def _signature():
+    return (len(bpy.data.materials), len(bpy.data.node_groups))
+
+def _group_for(mat_name):
+    for prefix, group in SYNC_GROUPS.items():
+        if _NAME_PATTERNS[prefix].match(mat_name):
+            return group
+    return None
+
+def _rebuild():
+    found = {}
+    for mat in bpy.data.materials:
+        if mat.library or not mat.use_nodes or not mat.node_tree:
+            continue
+        group = _group_for(mat.name)
+        node = mat.node_tree.nodes.get(group) if group else None
+        if not node or not node.inputs:
+            continue
+        sock = node.inputs.get(SOCKET_NAME) or node.inputs[0]
+        found[mat] = [(node.name, sock.identifier, isinstance(sock.default_value, str))]
+    _index["materials"] = found
+    _index["key"] = _signature()
+
+def get_index():
+    if _index["key"] != _signature():
+        _rebuild()
+    return _index["materials"]
+
+def scope_materials(context, scope):
+    """Materials a skintone change should reach: the live (spawned) character, the selection or everything"""
+    if scope == 'ALL':
+        return None
+    if scope == 'SELECTED':
+        objects = set()
+        for obj in context.selected_objects:
+            objects.add(obj)
+            if obj.type == 'ARMATURE':
+                objects.update(obj.children_recursive)
+    else:
+        body = bpy.data.objects.get(("Body", None)) or context.active_object
+        objects = {body} if body else set()
+    return {s.material for o in objects if o.type == 'MESH' for s in o.material_slots if s.material}
+
+def _write(mat, entries, value):
+    changed = 0
+    for node_name, identifier, takes_string in entries:
+        node = mat.node_tree.nodes.get(node_name) if mat.node_tree else None
+        sock = next((s for s in node.inputs if s.identifier == identifier), None) if node else None
+        if sock is None:
+            # Node or input deleted since indexing; picked up again on the next rebuild
+            invalidate()
+            continue
+        new = str(value) if takes_string else value
+        if sock.default_value != new:
+            sock.default_value = new
+            changed += 1
+    return changed
+
+def propagate(context, value, scope='LIVE'):
+    """Set the skintone on every indexed socket in scope. Returns (sockets changed, materials in scope)."""
+    with instrument.stage("skintone.index"):
+        index = get_index()
+    wanted = scope_materials(context, scope)
+    targets = [(mat, entries) for mat, entries in index.items() if wanted is None or mat in wanted]
+    changed = 0
+    try:
+        for mat, entries in targets:
+            changed += _write(mat, entries, value)
+    except ReferenceError:
+        # A material went away without changing the counts (undo, rename-and-delete); index again
+        instrument.swallowed("skintone.stale_index")
+        invalidate()
+        return propagate(context, value, scope)
+
+    # One redraw for the whole batch
+    if changed and context.screen:
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+    return changed, len(targets)
+
+# --- INVALIDATION HANDLERS ---
+@persistent
+def _on_file_or_undo(*_args):
+    invalidate()
+
+_HANDLERS = (
+    bpy.app.handlers.load_post,
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+)
+
+def register():
+    for handlers in _HANDLERS:
+        if _on_file_or_undo not in handlers:
+            handlers.append(_on_file_or_undo)
+    invalidate()
+
+def unregister():
+    for handlers in _HANDLERS:
+        if _on_file_or_undo in handlers:
+            handlers.remove(_on_file_or_undo)
+    invalidate()
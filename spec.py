@@ -0,0 +1,52 @@
+import csv
+import json
+
+# --- CHARACTER SPEC FILES ---
+# Batch builds read one character per row. Kept free of bpy so the parsing can
+# be tested (and reused by tools) outside Blender.
+
+# Any other material socket can be set with "Prefix/Group/Socket" keys under
+# "materials" in JSON, or as "mat:Prefix/Group/Socket" columns in CSV.
+CSV_MAT_PREFIX = "mat:"
+
+def parse_value(text):
+    """CSV cells are strings: ints, floats and "r,g,b,a" colors are converted, anything else stays an enum name"""
+    if not isinstance(text, str):
+        return text
+    text = text.strip()
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    if "," in text:
+        try:
+            return tuple(float(v) for v in text.split(","))
+        except ValueError:
+            pass
+    return text
+
+def load_spec(path):
+    """One dict per character from a .json list (or {"characters": [...]}) or a .csv with a header row"""
+    if path.lower().endswith(".csv"):
+        rows = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for raw in csv.DictReader(f):
+                row = {"materials": {}}
+                for key, val in raw.items():
+                    if val is None or val.strip() == "":
+                        continue
+                    if key.startswith(CSV_MAT_PREFIX):
+                        row["materials"][key[len(CSV_MAT_PREFIX):]] = parse_value(val)
+                    elif key == "prefix":
+                        row[key] = val.strip()
+                    else:
+                        row[key] = parse_value(val)
+                rows.append(row)
+        return rows
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("characters", [])
+    return data
@@ -0,0 +1,222 @@
+import bpy
+from bpy.app.handlers import persistent
+
+# --- SESSION TEMPLATE CACHE ---
+# A hidden, pristine copy of Master_Character_Collection kept in memory so
+# repeated spawns duplicate from it instead of re-reading CharLibrary.blend.
+# Template IDs are renamed with TEMPLATE_PREFIX so spawned copies get the
+# names the rest of the add-on looks for ("Body", "CharRig", "*_GN"...).
+# Only the template collection has no users; its HyT_* objects, meshes,
+# armatures and materials do, so a save would write all of them as a hidden
+# copy of the character. The template is freed right before every save and
+# the next spawn reads the library again and stores a fresh one. Template IDs
+# found in a freshly loaded file (older versions saved them) are freed too, so
+# spawns never start from a stale copy.
+TEMPLATE_COLLECTION = "HyTailor_Template"
+TEMPLATE_PREFIX = "HyT_"
+NAME_KEY = "hy_template_name"
+
+# bpy.data collections copy_hierarchy can put template IDs in
+_ID_TYPES = ("collections", "objects", "meshes", "armatures", "curves", "lattices", "materials")
+
+def get_template():
+    return bpy.data.collections.get((TEMPLATE_COLLECTION, None))
+
+def has_template():
+    return get_template() is not None
+
+def mesh_bytes(mesh):
+    # Rough in-memory size: positions, loop data per UV layer, face offsets
+    return (len(mesh.vertices) * 16
+            + len(mesh.loops) * (8 + 8 * len(mesh.uv_layers))
+            + len(mesh.polygons) * 8)
+
+def estimate_bytes(coll=None):
+    coll = coll or get_template()
+    if not coll:
+        return 0
+    meshes = {o.data for o in coll.all_objects if o.type == 'MESH' and o.data}
+    return sum(mesh_bytes(m) for m in meshes)
+
+# --- DEEP COPY ---
+def _remap_pointers(struct, id_map):
+    """Point any writable ID pointer on struct at its copy, if it was copied"""
+    for prop in struct.bl_rna.properties:
+        if prop.type != 'POINTER' or prop.is_readonly:
+            continue
+        val = getattr(struct, prop.identifier, None)
+        if val is not None and val in id_map:
+            setattr(struct, prop.identifier, id_map[val])
+
+def _remap_drivers(id_data, id_map):
+    anim = getattr(id_data, "animation_data", None)
+    if not anim:
+        return
+    for fcurve in anim.drivers:
+        for var in fcurve.driver.variables:
+            for target in var.targets:
+                if target.id in id_map:
+                    target.id = id_map[target.id]
+
+def _rename(new_id, src_id, to_template):
+    if to_template:
+        new_id[NAME_KEY] = src_id.name
+        new_id.name = TEMPLATE_PREFIX + src_id.name
+    else:
+        new_id.name = src_id.get(NAME_KEY, src_id.name)
+        if NAME_KEY in new_id:
+            del new_id[NAME_KEY]
+
+def copy_hierarchy(src_coll, to_template):
+    """Duplicate a collection tree with its objects, object data and materials, rewiring
+    parents, modifiers, constraints, drivers and bone widgets to the copies."""
+    id_map = {}
+
+    def copy_collection(col):
+        new_col = bpy.data.collections.new(col.name)
+        _rename(new_col, col, to_template)
+        id_map[col] = new_col
+        for child in col.children:
+            new_col.children.link(copy_collection(child))
+        return new_col
+
+    new_root = copy_collection(src_coll)
+
+    objs = list(src_coll.all_objects)
+    for obj in objs:
+        new = obj.copy()
+        _rename(new, obj, to_template)
+        if obj.data:
+            data = id_map.get(obj.data)
+            if data is None:
+                data = id_map[obj.data] = obj.data.copy()
+                _rename(data, obj.data, to_template)
+            new.data = data
+        id_map[obj] = new
+
+    # Materials are edited per character through the panel, so they're copied too;
+    # node groups and images stay shared.
+    for obj in objs:
+        new = id_map[obj]
+        for i, slot in enumerate(obj.material_slots):
+            mat = slot.material
+            if not mat:
+                continue
+            new_mat = id_map.get(mat)
+            if new_mat is None:
+                new_mat = id_map[mat] = mat.copy()
+                _rename(new_mat, mat, to_template)
+            new.material_slots[i].material = new_mat
+
+    for obj in objs:
+        new = id_map[obj]
+        if obj.parent in id_map:
+            new.parent = id_map[obj.parent]
+        for mod in new.modifiers:
+            _remap_pointers(mod, id_map)
+            # Geometry Nodes inputs are ID properties, not RNA pointers
+            for key in mod.keys():
+                val = mod[key]
+                if isinstance(val, bpy.types.ID) and val in id_map:
+                    mod[key] = id_map[val]
+        for con in new.constraints:
+            _remap_pointers(con, id_map)
+        if new.pose:
+            for pbone in new.pose.bones:
+                if pbone.custom_shape in id_map:
+                    pbone.custom_shape = id_map[pbone.custom_shape]
+                for con in pbone.constraints:
+                    _remap_pointers(con, id_map)
+        _remap_drivers(new, id_map)
+
+    # Object data and shape keys (corrective shapes driven by bones) carry drivers too
+    for data in {id_map[o.data] for o in objs if o.data}:
+        _remap_drivers(data, id_map)
+        _remap_drivers(getattr(data, "shape_keys", None), id_map)
+
+    # Link objects last so each collection holds the copies, not the sources
+    for col, new_col in [(c, id_map[c]) for c in [src_coll] + list(src_coll.children_recursive)]:
+        for obj in col.objects:
+            new_col.objects.link(id_map[obj])
+
+    return new_root, id_map
+
+# --- PUBLIC API ---
+def store(src_coll, budget_bytes):
+    """Keep a pristine copy of a freshly loaded character. Returns False if it's over budget."""
+    free()
+    if estimate_bytes(src_coll) > budget_bytes:
+        return False
+    template, _ = copy_hierarchy(src_coll, to_template=True)
+    template.name = TEMPLATE_COLLECTION
+    return True
+
+def instantiate(context):
+    """New character collection duplicated from the template and linked to the scene"""
+    template = get_template()
+    if not template:
+        return None
+    coll, _ = copy_hierarchy(template, to_template=False)
+    context.scene.collection.children.link(coll)
+    return coll
+
+def template_ids():
+    """Every template ID (they carry NAME_KEY), including ones the template collection no longer reaches"""
+    ids = {i for attr in _ID_TYPES for i in getattr(bpy.data, attr) if i.get(NAME_KEY) is not None}
+    template = get_template()
+    if template:
+        ids.add(template)
+    return ids
+
+def free():
+    """Remove the template and everything that only it uses"""
+    ids = template_ids()
+    if ids:
+        bpy.data.batch_remove(ids)
+    return len(ids)
+
+def saved_template_names(filepath):
+    """Names of template IDs written into a .blend; empty when the save kept the template out"""
+    names = []
+    with bpy.data.libraries.load(filepath) as (data_from, _data_to):
+        for attr in _ID_TYPES:
+            names += [n for n in getattr(data_from, attr, ()) if n.startswith(TEMPLATE_PREFIX) or n == TEMPLATE_COLLECTION]
+    return names
+
+class HYCHAR_OT_free_template_cache(bpy.types.Operator):
+    bl_idname = "hychar.free_template_cache"
+    bl_label = "Free Template Cache"
+    bl_description = "Remove the in-memory character template; the next spawn reads CharLibrary.blend again"
+
+    def execute(self, context):
+        count = free()
+        self.report({'INFO'}, f"Freed template cache ({count} data-blocks)" if count else "Template cache is empty")
+        return {'FINISHED'}
+
+@persistent
+def _on_load(*_args):
+    # Only older versions saved template IDs, with or without the collection
+    # holding them; they may not match the library any more
+    free()
+
+@persistent
+def _on_save_pre(*_args):
+    # Everything but the template collection has users and would be written
+    count = free()
+    if count:
+        print(f"HyTailor Debug: freed template cache ({count} data-blocks) before saving")
+
+_HANDLERS = (
+    (bpy.app.handlers.load_post, _on_load),
+    (bpy.app.handlers.save_pre, _on_save_pre),
+)
+
+def register():
+    for handlers, fn in _HANDLERS:
+        if fn not in handlers:
+            handlers.append(fn)
+
+def unregister():
+    for handlers, fn in _HANDLERS:
+        if fn in handlers:
+            handlers.remove(fn)
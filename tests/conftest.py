@@ -0,0 +1,16 @@
+import os
+import sys
+import types
+
+# The add-on's __init__ imports bpy, so the package is registered as a bare
+# namespace here: submodules that don't need Blender (spec, png_writer,
+# bake_cache, batch_runner, texture_transfer) then import normally.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "hychar_customizer" not in sys.modules:
+    package = types.ModuleType("hychar_customizer")
+    package.__path__ = [ROOT]
+    sys.modules["hychar_customizer"] = package
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
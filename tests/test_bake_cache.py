@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import threading
+
+from hychar_customizer import bake_cache
+
+def make_png(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+def test_lookup_miss_then_hit(tmp_path):
+    cache = bake_cache.BakeCache(str(tmp_path / "cache"), limit_bytes=1000)
+    assert cache.lookup("a") is None
+    cache.store("a", make_png(tmp_path, "a.png", 10))
+    assert cache.lookup("a") == os.path.join(cache.cache_dir, "a.png")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_evict_least_recently_used(tmp_path):
+    cache = bake_cache.BakeCache(str(tmp_path / "cache"), limit_bytes=25)
+    for key in ("old", "mid", "new"):
+        cache.store(key, make_png(tmp_path, f"{key}.png", 10))
+    cache.index["old"]["last_used"] = 1.0
+    cache.index["mid"]["last_used"] = 2.0
+    cache.index["new"]["last_used"] = 3.0
+    cache.evict()
+    assert sorted(cache.index) == ["mid", "new"]
+    assert not os.path.exists(os.path.join(cache.cache_dir, "old.png"))
+    assert cache.evicted == 1
+
+def test_save_merges_other_workers(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = bake_cache.BakeCache(cache_dir, limit_bytes=1000)
+    second = bake_cache.BakeCache(cache_dir, limit_bytes=1000)
+    first.store("a", make_png(tmp_path, "a.png", 10))
+    second.store("b", make_png(tmp_path, "b.png", 10))
+    first.save()
+    second.save()
+    with open(os.path.join(cache_dir, "index.json")) as f:
+        assert sorted(json.load(f)) == ["a", "b"]
+
+def test_concurrent_saves_keep_every_entry(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    src = make_png(tmp_path, "src.png", 4)
+    caches = [bake_cache.BakeCache(cache_dir, limit_bytes=10 ** 6) for _ in range(8)]
+    for i, cache in enumerate(caches):
+        cache.store(f"k{i}", src)
+    threads = [threading.Thread(target=cache.save) for cache in caches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with open(os.path.join(cache_dir, "index.json")) as f:
+        assert sorted(json.load(f)) == sorted(f"k{i}" for i in range(8))
+
+def test_leftover_lock_file_does_not_block(tmp_path):
+    # A worker that crashed leaves the file behind but not the OS lock on it
+    index_path = str(tmp_path / "index.json")
+    open(f"{index_path}.lock", "w").close()
+    with bake_cache.index_lock(index_path):
+        pass
+
+def test_competing_waiters_take_turns(tmp_path):
+    index_path = str(tmp_path / "index.json")
+    counter = tmp_path / "counter"
+    counter.write_text("0")
+    holders = []
+    overlaps = []
+
+    def bump():
+        for _ in range(20):
+            with bake_cache.index_lock(index_path):
+                holders.append(1)
+                if len(holders) > 1:
+                    overlaps.append(len(holders))
+                # Read-modify-write that loses updates unless the lock is exclusive
+                value = int(counter.read_text())
+                time.sleep(0.001)
+                counter.write_text(str(value + 1))
+                holders.pop()
+
+    # Both waiters queue up behind a held lock, then race for it when it's released
+    with bake_cache.index_lock(index_path):
+        threads = [threading.Thread(target=bump) for _ in range(2)]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)
+        assert counter.read_text() == "0"
+    for t in threads:
+        t.join()
+    assert not overlaps
+    assert counter.read_text() == "40"
@@ -0,0 +1,39 @@
+import os
+
+import batch_runner
+
+def test_split_rows():
+    shards = batch_runner.split_rows(list(range(7)), 3)
+    assert shards == [[0, 1, 2], [3, 4], [5, 6]]
+    assert batch_runner.split_rows([1, 2], 8) == [[1], [2]]
+
+def test_merge_moves_outputs_and_fails_crashed_shard(tmp_path):
+    out_dir = tmp_path / "out"
+    shard_dir = out_dir / "shards" / "shard_000"
+    shard_dir.mkdir(parents=True)
+    glb = shard_dir / "Guard01.glb"
+    glb.write_bytes(b"glb")
+    # A .gltf export lives in a folder named after the character
+    folder = shard_dir / "Guard02"
+    folder.mkdir()
+    (folder / "Guard02.gltf").write_text("{}")
+    (folder / "Guard02.bin").write_bytes(b"bin")
+
+    results = [
+        {"shard": 0, "summary": {"characters": [
+            {"prefix": "Guard01", "ok": True, "output": str(glb)},
+            {"prefix": "Guard02", "ok": True, "output": str(folder / "Guard02.gltf")},
+        ]}},
+        {"shard": 1, "summary": None},
+    ]
+    shards = [[{"prefix": "Guard01"}, {"prefix": "Guard02"}], [{"prefix": "Guard03"}, {}]]
+    characters = batch_runner.merge(results, shards, str(out_dir))
+
+    assert [c["prefix"] for c in characters] == ["Guard01", "Guard02", "Guard03", "NewChar"]
+    assert characters[0]["output"] == str(out_dir / "Guard01.glb")
+    assert os.path.exists(characters[0]["output"])
+    assert characters[1]["output"] == str(out_dir / "Guard02" / "Guard02.gltf")
+    assert (out_dir / "Guard02" / "Guard02.bin").exists()
+    assert not folder.exists()
+    assert [c["ok"] for c in characters[2:]] == [False, False]
+    assert characters[2]["error"] == "shard 1 crashed"
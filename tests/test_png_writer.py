@@ -0,0 +1,61 @@
+import struct
+import zlib
+
+import numpy as np
+
+from hychar_customizer import png_writer
+
+def decode(data):
+    """(width, height, rows) of an unfiltered 8-bit RGBA PNG"""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    pos, chunks = 8, {}
+    while pos < len(data):
+        length, = struct.unpack(">I", data[pos:pos + 4])
+        tag, body = data[pos + 4:pos + 8], data[pos + 8:pos + 8 + length]
+        crc, = struct.unpack(">I", data[pos + 8 + length:pos + 12 + length])
+        assert crc == zlib.crc32(tag + body) & 0xFFFFFFFF
+        chunks[tag] = body
+        pos += 12 + length
+    w, h, depth, color, _comp, _filter, _interlace = struct.unpack(">IIBBBBB", chunks[b"IHDR"])
+    assert (depth, color) == (8, 6)
+    assert chunks[b"IEND"] == b""
+    raw = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8).reshape(h, w * 4 + 1)
+    assert not raw[:, 0].any()
+    return w, h, raw[:, 1:].reshape(h, w, 4)
+
+def test_encode_png_roundtrip():
+    rgba = np.arange(3 * 5 * 4, dtype=np.uint8).reshape(3, 5, 4)
+    w, h, pixels = decode(png_writer.encode_png(rgba, level=1))
+    assert (w, h) == (5, 3)
+    assert np.array_equal(pixels, rgba)
+
+def test_to_bytes_flips_and_clamps():
+    # Blender rows are bottom first; the PNG's are top first
+    pixels = np.array([[0.0, 0.0, 0.0, 1.0], [1.5, -0.2, 0.5, 1.0]], dtype=np.float32)
+    rgba = png_writer.to_bytes(pixels.ravel(), 1, 2)
+    assert rgba.shape == (2, 1, 4)
+    assert rgba[0, 0].tolist() == [255, 0, 128, 255]
+    assert rgba[1, 0].tolist() == [0, 0, 0, 255]
+
+def test_writer_writes_files(tmp_path):
+    writer = png_writer.PngWriter(workers=2)
+    pixels = np.full(4 * 4 * 4, 0.5, dtype=np.float32)
+    paths = [str(tmp_path / f"img_{i}.png") for i in range(3)]
+    for path in paths:
+        writer.submit(path, pixels, 4, 4)
+    seconds, errors = writer.wait()
+    assert errors == {}
+    for path in paths:
+        with open(path, "rb") as f:
+            w, h, rgba = decode(f.read())
+        assert (w, h) == (4, 4)
+        assert (rgba == 128).all()
+
+def test_writer_keeps_every_submission_error(tmp_path):
+    writer = png_writer.PngWriter(workers=1)
+    path = str(tmp_path / "same.png")
+    # Wrong pixel count: the first write fails, the second to the same path succeeds
+    writer.submit(path, np.zeros(3, dtype=np.float32), 4, 4)
+    writer.submit(path, np.zeros(4 * 4 * 4, dtype=np.float32), 4, 4)
+    _seconds, errors = writer.wait()
+    assert list(errors) == [path]
@@ -0,0 +1,31 @@
+import json
+
+from hychar_customizer import spec
+
+def test_parse_value_types():
+    assert spec.parse_value("3") == 3
+    assert spec.parse_value(" 0.5 ") == 0.5
+    assert spec.parse_value("1,0.5,0,1") == (1.0, 0.5, 0.0, 1.0)
+    assert spec.parse_value("Lizard") == "Lizard"
+    assert spec.parse_value("a,b") == "a,b"
+    assert spec.parse_value(7) == 7
+
+def test_load_spec_csv(tmp_path):
+    path = tmp_path / "spec.csv"
+    path.write_text("prefix,skin_tone,mat:Hair/HyHair/Color\n"
+                    " Guard01 ,12,\"0.1,0.2,0.3,1\"\n"
+                    "Guard02,,\n", encoding="utf-8")
+    rows = spec.load_spec(str(path))
+    assert rows == [
+        {"prefix": "Guard01", "skin_tone": 12, "materials": {"Hair/HyHair/Color": (0.1, 0.2, 0.3, 1.0)}},
+        {"prefix": "Guard02", "materials": {}},
+    ]
+
+def test_load_spec_json_list_and_dict(tmp_path):
+    chars = [{"prefix": "A"}, {"prefix": "B", "materials": {"Body/HyBody/Skintone": 3}}]
+    listed = tmp_path / "list.json"
+    listed.write_text(json.dumps(chars), encoding="utf-8")
+    wrapped = tmp_path / "wrapped.json"
+    wrapped.write_text(json.dumps({"characters": chars}), encoding="utf-8")
+    assert spec.load_spec(str(listed)) == chars
+    assert spec.load_spec(str(wrapped)) == chars
@@ -0,0 +1,151 @@
+import types
+
+import numpy as np
+import pytest
+
+from hychar_customizer import texture_transfer
+
+def brute_force(tri_uv, res):
+    """{pixel: (triangle, barycentric)} by testing every texel center against every triangle in order"""
+    found = {}
+    for t, tri in enumerate(tri_uv.astype(np.float64) * res):
+        (ax, ay), (bx, by), (cx, cy) = tri
+        det = (by - cy) * (ax - cx) + (cx - bx) * (ay - cy)
+        if abs(det) < 1e-12:
+            continue
+        for y in range(res):
+            for x in range(res):
+                px, py = x + 0.5, y + 0.5
+                l0 = ((by - cy) * (px - cx) + (cx - bx) * (py - cy)) / det
+                l1 = ((cy - ay) * (px - cx) + (ax - cx) * (py - cy)) / det
+                l2 = 1.0 - l0 - l1
+                if min(l0, l1, l2) >= -1e-6:
+                    found[y * res + x] = (t, (l0, l1, l2))
+    return found
+
+def test_rasterize_half_square():
+    tri = np.array([[[0, 0], [1, 0], [0, 1]]], dtype=np.float32)
+    pix, tris, bary = texture_transfer.rasterize(tri, 4)
+    # Texel centers (x + 0.5, y + 0.5) / 4 lie inside when x + y <= 3
+    assert sorted(pix.tolist()) == sorted(y * 4 + x for y in range(4) for x in range(4) if x + y <= 3)
+    assert not tris.any()
+    assert np.allclose(bary.sum(axis=1), 1.0)
+    # The weights put each texel back at its center
+    centers = np.stack([pix % 4 + 0.5, pix // 4 + 0.5], axis=1) / 4
+    assert np.allclose(bary @ tri[0], centers, atol=1e-6)
+
+def test_rasterize_matches_per_triangle_loop():
+    rng = np.random.default_rng(7)
+    # Mixed sizes so several bounding-box buckets are used
+    anchors = rng.random((40, 1, 2))
+    tri_uv = (anchors + (rng.random((40, 3, 2)) - 0.5) * rng.choice([0.05, 0.3, 1.0], (40, 1, 1))).astype(np.float32)
+    pix, tris, bary = texture_transfer.rasterize(tri_uv, 32)
+
+    # Later triangles win where they overlap, as with the assignment in transfer_pixels
+    last = {}
+    for p, t, b in zip(pix.tolist(), tris.tolist(), bary):
+        last[p] = (t, b)
+    expected = brute_force(tri_uv, 32)
+    assert sorted(last) == sorted(expected)
+    for p, (t, b) in last.items():
+        assert t == expected[p][0]
+        assert np.allclose(b, expected[p][1], atol=1e-4)
+    assert np.all(np.diff(tris) >= 0)
+
+def test_rasterize_skips_degenerate_and_outside():
+    tris = np.array([
+        [[0.1, 0.1], [0.5, 0.5], [0.9, 0.9]],  # zero area
+        [[1.5, 1.5], [2.0, 1.5], [1.5, 2.0]],  # off the tile
+    ], dtype=np.float32)
+    pix, tri_ids, bary = texture_transfer.rasterize(tris, 8)
+    assert len(pix) == len(tri_ids) == len(bary) == 0
+
+def test_dilate_grows_by_margin():
+    rgba = np.zeros((7, 7, 4), dtype=np.float32)
+    mask = np.zeros((7, 7), dtype=bool)
+    rgba[3, 3] = (0.25, 0.5, 0.75, 1.0)
+    mask[3, 3] = True
+    out = texture_transfer.dilate(rgba, mask, margin=2)
+    # Eight neighbors per pass: two passes fill the 5x5 square around the texel
+    filled = out[..., 3] > 0
+    assert filled[1:6, 1:6].all()
+    assert filled.sum() == 25
+    assert np.allclose(out[1, 5], (0.25, 0.5, 0.75, 1.0))
+
+def test_dilate_keeps_covered_texels():
+    rgba = np.zeros((4, 4, 4), dtype=np.float32)
+    mask = np.zeros((4, 4), dtype=bool)
+    rgba[1, 1] = (1, 0, 0, 1)
+    rgba[1, 2] = (0, 0, 1, 1)
+    mask[1, 1:3] = True
+    out = texture_transfer.dilate(rgba, mask, margin=1)
+    assert out[1, 1].tolist() == [1, 0, 0, 1]
+    assert out[1, 2].tolist() == [0, 0, 1, 1]
+    assert out[0, 0].tolist() == [1, 0, 0, 1]
+    assert out[0, 3].tolist() == [0, 0, 1, 1]
+
+# --- transfer_pixels on a stand-in mesh ---
+class Collection(list):
+    """List with the foreach_get Blender collections have"""
+
+    def __init__(self, items=(), **arrays):
+        super().__init__(items)
+        self.arrays = arrays
+
+    def foreach_get(self, attr, buf):
+        buf[:] = np.ravel(self.arrays[attr])
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values()))) if self.arrays else super().__len__()
+
+class UVLayers(list):
+    def get(self, name):
+        return next((l for l in self if l.name == name), None)
+
+def quad_job(mat, res):
+    """A job whose evaluated mesh is one quad covering the left half of the UV tile"""
+    uvs = np.array([[0, 0], [0.5, 0], [0.5, 1], [0, 1]], dtype=np.float32)
+    layer = types.SimpleNamespace(name="UVMap", active_render=True, data=Collection(uv=uvs))
+    mesh = types.SimpleNamespace(
+        uv_layers=UVLayers([layer]),
+        calc_loop_triangles=lambda: None,
+        loop_triangles=Collection(loops=np.array([[0, 1, 2], [0, 2, 3]]), material_index=np.zeros(2)),
+    )
+    obj_eval = types.SimpleNamespace(
+        to_mesh=lambda: mesh,
+        to_mesh_clear=lambda: None,
+        material_slots=[types.SimpleNamespace(material=types.SimpleNamespace(original=mat))],
+    )
+    obj = types.SimpleNamespace(data=types.SimpleNamespace(uv_layers=[layer]), evaluated_get=lambda _dg: obj_eval)
+    return types.SimpleNamespace(obj=obj, mat=mat, resolution=res, original_uv=layer,
+                                 uv_offset=np.zeros(2, dtype=np.float32))
+
+class FlatGraph:
+    """NodeGraph stand-in: linear color is (u, v, 0) of the default UV map"""
+
+    def __init__(self, n, uv, default_uv, sampler):
+        self.uv, self.default_uv = uv, default_uv
+
+    def surface(self, mat):
+        uv = self.uv(self.default_uv)
+        return np.concatenate([uv, np.zeros((len(uv), 1), dtype=np.float32)], axis=1)
+
+def test_transfer_pixels_fills_and_dilates(monkeypatch):
+    monkeypatch.setattr(texture_transfer, "NodeGraph", FlatGraph)
+    mat = object()
+    out = texture_transfer.transfer_pixels(quad_job(mat, 8), None, None).reshape(8, 8, 4)
+    # Columns 0-3 are covered; MARGIN more columns are dilated copies of column 3
+    covered = 4 + texture_transfer.MARGIN
+    assert (out[:, :covered, 3] == 1.0).all()
+    assert (out[:, covered:] == 0).all()
+    assert np.allclose(out[:, 4:covered, :3], out[:, 3:4, :3])
+    # Red follows u at the texel centers, stored as sRGB
+    u = (np.arange(4) + 0.5) / 8
+    assert np.allclose(out[0, :4, 0], texture_transfer.linear_to_srgb(u), atol=1e-5)
+
+def test_transfer_pixels_rejects_other_materials(monkeypatch):
+    monkeypatch.setattr(texture_transfer, "NodeGraph", FlatGraph)
+    job = quad_job(object(), 8)
+    job.mat = object()
+    with pytest.raises(texture_transfer.Unsupported):
+        texture_transfer.transfer_pixels(job, None, None)
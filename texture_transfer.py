@@ -0,0 +1,484 @@
+import os
+import numpy as np
+
+# --- DIRECT TEXTURE TRANSFER ---
+# Most library materials only pick pixel-art images through their Hy* groups
+# (Menu Switch) and tint them with Mix nodes. Their diffuse color can be worked
+# out from the source pixels directly, so those meshes skip Cycles: the
+# evaluated mesh is rasterized in bake UV space, every covered texel is traced
+# back to its source UVs and the node graph runs on all texels at once in
+# NumPy. Anything outside the small node set below raises Unsupported and the
+# mesh goes through the regular Cycles bake instead.
+MARGIN = 2
+_EPS = 1e-6
+_NEIGHBORS = ((0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1))
+_LUMA = np.array((0.2126, 0.7152, 0.0722), dtype=np.float32)
+
+class Unsupported(Exception):
+    """The material or mesh uses something the direct path can't reproduce"""
+
+# --- COLOR SPACE ---
+def srgb_to_linear(c):
+    return np.where(c <= 0.04045, c / 12.92, ((np.maximum(c, 0.0) + 0.055) / 1.055) ** 2.4)
+
+def linear_to_srgb(c):
+    c = np.clip(c, 0.0, 1.0)
+    return np.where(c <= 0.0031308, c * 12.92, 1.055 * c ** (1.0 / 2.4) - 0.055)
+
+# --- SOURCE IMAGES ---
+def _fetch(pixels, xi, yi, extension):
+    h, w = pixels.shape[:2]
+    if extension == 'REPEAT':
+        return pixels[yi % h, xi % w]
+    if extension == 'EXTEND':
+        return pixels[np.clip(yi, 0, h - 1), np.clip(xi, 0, w - 1)]
+    if extension == 'CLIP':
+        inside = (xi >= 0) & (xi < w) & (yi >= 0) & (yi < h)
+        out = pixels[np.clip(yi, 0, h - 1), np.clip(xi, 0, w - 1)]
+        return out * inside[:, None]
+    raise Unsupported(f"{extension} image extension")
+
+def _sample(pixels, uv, interpolation, extension):
+    h, w = pixels.shape[:2]
+    x = uv[:, 0] * w
+    y = uv[:, 1] * h
+    if interpolation == 'Closest':
+        return _fetch(pixels, np.floor(x).astype(np.int64), np.floor(y).astype(np.int64), extension)
+    # Bilinear between the four nearest texel centers
+    x -= 0.5
+    y -= 0.5
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = (x - x0)[:, None]
+    fy = (y - y0)[:, None]
+    x0 = x0.astype(np.int64)
+    y0 = y0.astype(np.int64)
+    top = _fetch(pixels, x0, y0, extension) * (1 - fx) + _fetch(pixels, x0 + 1, y0, extension) * fx
+    bottom = _fetch(pixels, x0, y0 + 1, extension) * (1 - fx) + _fetch(pixels, x0 + 1, y0 + 1, extension) * fx
+    return top * (1 - fy) + bottom * fy
+
+class ImageSampler:
+    """Scene-linear RGBA arrays of source images (one per UDIM tile), read once per bake run"""
+
+    def __init__(self):
+        self._pixels = {}
+
+    def _read(self, pixel_src, settings):
+        w, h = pixel_src.size
+        if not w or not h:
+            raise Unsupported(f"image {settings.name} has no pixels")
+        pixels = np.empty(len(pixel_src.pixels), dtype=np.float32)
+        pixel_src.pixels.foreach_get(pixels)
+        channels = len(pixels) // (w * h)
+        if channels not in (3, 4):
+            raise Unsupported(f"{channels}-channel image {settings.name}")
+        pixels = pixels.reshape(h, w, channels)
+        if channels == 3:
+            pixels = np.concatenate([pixels, np.ones((h, w, 1), dtype=np.float32)], axis=2)
+        # Float buffers are already linear; byte buffers are in the image's color space
+        space = settings.colorspace_settings.name
+        if not pixel_src.is_float:
+            if space == 'sRGB':
+                pixels[..., :3] = srgb_to_linear(pixels[..., :3])
+            elif space not in ('Non-Color', 'Raw') and not space.startswith('Linear'):
+                raise Unsupported(f"{space} color space on {settings.name}")
+        if settings.alpha_mode == 'NONE':
+            pixels[..., 3] = 1.0
+        elif settings.alpha_mode == 'PREMUL':
+            raise Unsupported(f"premultiplied alpha on {settings.name}")
+        return pixels
+
+    def _load(self, image, tile_num):
+        if image.source != 'TILED':
+            if image.source not in ('FILE', 'GENERATED'):
+                raise Unsupported(f"{image.source} image {image.name}")
+            return self._read(image, image)
+        if image.packed_file:
+            raise Unsupported(f"packed UDIM image {image.name}")
+        # Imported here so the rasterizing and node math load outside Blender (tests)
+        import bpy
+        path = bpy.path.abspath(image.filepath_raw, library=image.library).replace("<UDIM>", str(tile_num))
+        if not os.path.exists(path):
+            raise Unsupported(f"missing tile {tile_num} of {image.name}")
+        tmp = bpy.data.images.load(path, check_existing=False)
+        try:
+            tmp.colorspace_settings.name = image.colorspace_settings.name
+            return self._read(tmp, image)
+        finally:
+            bpy.data.images.remove(tmp)
+
+    def tile(self, image, tile_num=0):
+        key = (image.as_pointer(), tile_num)
+        pixels = self._pixels.get(key)
+        if pixels is None:
+            pixels = self._pixels[key] = self._load(image, tile_num)
+        return pixels
+
+    def sample(self, image, uv, interpolation, extension):
+        """RGBA (n, 4) of image at uv (n, 2)"""
+        if image.source != 'TILED':
+            return _sample(self.tile(image), uv, interpolation, extension)
+        out = np.zeros((len(uv), 4), dtype=np.float32)
+        cell = np.floor(uv).astype(np.int64)
+        tiles = 1001 + cell[:, 0] + 10 * cell[:, 1]
+        valid = (cell[:, 0] >= 0) & (cell[:, 0] < 10) & (cell[:, 1] >= 0)
+        for tile_num in np.unique(tiles[valid]):
+            sel = valid & (tiles == tile_num)
+            out[sel] = _sample(self.tile(image, int(tile_num)), uv[sel] - cell[sel], interpolation, extension)
+        return out
+
+# --- NODE EVALUATION ---
+# Values are NumPy arrays broadcastable to (texels, channels): colors RGBA,
+# vectors XYZ, floats one channel, and shaders their diffuse color (what a
+# DIFFUSE/COLOR bake records). Menu sockets carry their item name.
+def _const(sock):
+    t = sock.type
+    if t == 'MENU':
+        return sock.default_value
+    if t == 'SHADER':
+        return np.zeros(3, dtype=np.float32)
+    if t in ('RGBA', 'VECTOR'):
+        return np.array(sock.default_value, dtype=np.float32)
+    if t in ('VALUE', 'INT', 'BOOLEAN'):
+        return np.array([float(sock.default_value)], dtype=np.float32)
+    raise Unsupported(f"{t} socket {sock.name}")
+
+def _convert(value, from_type, to_type):
+    if from_type == to_type or to_type == 'CUSTOM':
+        return value
+    if isinstance(value, str) or from_type == 'SHADER' or to_type == 'MENU':
+        raise Unsupported(f"{from_type} to {to_type} link")
+    if to_type == 'SHADER':
+        # A color plugged straight into a shader socket renders as emission: no diffuse
+        return np.zeros(3, dtype=np.float32)
+    k = value.shape[-1]
+    if to_type == 'RGBA':
+        if k == 4:
+            return value
+        rgb = value if k == 3 else np.repeat(value, 3, axis=-1)
+        return np.concatenate([rgb, np.ones(rgb.shape[:-1] + (1,), dtype=np.float32)], axis=-1)
+    if to_type == 'VECTOR':
+        return value[..., :3] if k >= 3 else np.repeat(value, 3, axis=-1)
+    if to_type in ('VALUE', 'INT', 'BOOLEAN'):
+        if k == 1:
+            return value
+        if k == 4:
+            return value[..., :3] @ _LUMA[:, None]
+        return value.mean(axis=-1, keepdims=True)
+    raise Unsupported(f"{from_type} to {to_type} link")
+
+def _with_alpha(rgb, alpha_src):
+    shape = np.broadcast_shapes(rgb.shape[:-1], alpha_src.shape[:-1])
+    out = np.empty(shape + (4,), dtype=np.float32)
+    out[..., :3] = rgb
+    out[..., 3:] = alpha_src[..., 3:]
+    return out
+
+def _blend(mode, f, a, b):
+    a3, b3 = a[..., :3], b[..., :3]
+    if mode == 'MIX':
+        rgb = a3 + (b3 - a3) * f
+    elif mode == 'MULTIPLY':
+        rgb = a3 * (1 - f + f * b3)
+    elif mode == 'ADD':
+        rgb = a3 + f * b3
+    elif mode == 'SUBTRACT':
+        rgb = a3 - f * b3
+    elif mode == 'SCREEN':
+        rgb = 1 - (1 - f + f * (1 - b3)) * (1 - a3)
+    elif mode == 'DARKEN':
+        rgb = a3 + (np.minimum(a3, b3) - a3) * f
+    elif mode == 'LIGHTEN':
+        rgb = a3 + (np.maximum(a3, b3) - a3) * f
+    elif mode == 'DIFFERENCE':
+        rgb = a3 + (np.abs(a3 - b3) - a3) * f
+    else:
+        raise Unsupported(f"{mode} color blend")
+    return _with_alpha(rgb, a)
+
+class NodeGraph:
+    """Evaluates material sockets over a set of texels. uv(name) gives (n, 2) coordinates of a UV map."""
+
+    def __init__(self, n, uv, default_uv, sampler):
+        self.n = n
+        self.uv = uv
+        self.default_uv = default_uv
+        self.sampler = sampler
+        self._memo = {}
+
+    def input(self, sock, scope=()):
+        link = next((l for l in sock.links if l.is_valid and not l.is_muted), None)
+        if link is None:
+            return _const(sock)
+        return _convert(self.output(link.from_socket, scope), link.from_socket.type, sock.type)
+
+    def output(self, sock, scope):
+        key = (sock.as_pointer(), tuple(g.as_pointer() for g in scope))
+        value = self._memo.get(key)
+        if value is None:
+            node = sock.node
+            if node.mute:
+                raise Unsupported(f"muted node {node.name}")
+            handler = getattr(self, f"_node_{node.type.lower()}", None)
+            if handler is None:
+                raise Unsupported(f"{node.bl_idname} node")
+            value = self._memo[key] = handler(node, sock, scope)
+        return value
+
+    def _uv3(self, name):
+        uv = self.uv(name or self.default_uv)
+        return np.concatenate([uv, np.zeros((len(uv), 1), dtype=np.float32)], axis=1)
+
+    # Structure
+    def _node_group(self, node, sock, scope):
+        tree = node.node_tree
+        out = tree and next((n for n in tree.nodes if n.type == 'GROUP_OUTPUT' and n.is_active_output), None)
+        target = out and next((s for s in out.inputs if s.identifier == sock.identifier), None)
+        if target is None:
+            raise Unsupported(f"group {node.name} has no output {sock.name}")
+        return self.input(target, scope + (node,))
+
+    def _node_group_input(self, node, sock, scope):
+        parent = scope[-1] if scope else None
+        target = parent and next((s for s in parent.inputs if s.identifier == sock.identifier), None)
+        if target is None:
+            raise Unsupported(f"unresolved group input {sock.name}")
+        return self.input(target, scope[:-1])
+
+    def _node_reroute(self, node, sock, scope):
+        return self.input(node.inputs[0], scope)
+
+    def _node_menu_switch(self, node, sock, scope):
+        menu = self.input(node.inputs[0], scope)
+        target = next((s for s in node.inputs[1:] if s.name == menu), None)
+        if target is None:
+            raise Unsupported(f"menu item {menu!r} on {node.name}")
+        return self.input(target, scope)
+
+    # Values and coordinates
+    def _node_rgb(self, node, sock, scope):
+        return np.array(sock.default_value, dtype=np.float32)
+
+    def _node_value(self, node, sock, scope):
+        return np.array([sock.default_value], dtype=np.float32)
+
+    def _node_uvmap(self, node, sock, scope):
+        return self._uv3(node.uv_map)
+
+    def _node_tex_coord(self, node, sock, scope):
+        if sock.identifier != 'UV':
+            raise Unsupported(f"{sock.name} texture coordinate")
+        return self._uv3(None)
+
+    def _node_tex_image(self, node, sock, scope):
+        image = node.image
+        if image is None or node.projection != 'FLAT' or node.interpolation not in ('Closest', 'Linear'):
+            raise Unsupported(f"image node {node.name}")
+        key = ("rgba", node.as_pointer(), tuple(g.as_pointer() for g in scope))
+        rgba = self._memo.get(key)
+        if rgba is None:
+            vector = node.inputs['Vector']
+            uv = self.input(vector, scope) if vector.is_linked else self._uv3(None)
+            uv = np.broadcast_to(uv, (self.n, 3))[:, :2]
+            rgba = self._memo[key] = self.sampler.sample(image, uv, node.interpolation, node.extension)
+        if sock.identifier == 'Alpha':
+            return rgba[:, 3:]
+        color = rgba.copy()
+        color[:, 3] = 1.0
+        return color
+
+    # Color math
+    def _node_mix(self, node, sock, scope):
+        inputs = {s.identifier: s for s in node.inputs}
+        dt = node.data_type
+        suffix = {'RGBA': "Color", 'FLOAT': "Float", 'VECTOR': "Vector"}.get(dt)
+        if suffix is None:
+            raise Unsupported(f"{dt} mix")
+        uniform = dt != 'VECTOR' or node.factor_mode == 'UNIFORM'
+        f = self.input(inputs["Factor_Float" if uniform else "Factor_Vector"], scope)
+        if node.clamp_factor:
+            f = np.clip(f, 0.0, 1.0)
+        a = self.input(inputs[f"A_{suffix}"], scope)
+        b = self.input(inputs[f"B_{suffix}"], scope)
+        if dt != 'RGBA':
+            return a + (b - a) * f
+        out = _blend(node.blend_type, f, a, b)
+        if node.clamp_result:
+            out[..., :3] = np.clip(out[..., :3], 0.0, 1.0)
+        return out
+
+    def _node_mix_rgb(self, node, sock, scope):
+        f = np.clip(self.input(node.inputs['Fac'], scope), 0.0, 1.0)
+        out = _blend(node.blend_type, f, self.input(node.inputs['Color1'], scope), self.input(node.inputs['Color2'], scope))
+        if node.use_clamp:
+            out[..., :3] = np.clip(out[..., :3], 0.0, 1.0)
+        return out
+
+    # Shaders (diffuse color only)
+    def _node_bsdf_principled(self, node, sock, scope):
+        for name in ("Subsurface Weight", "Coat Weight"):
+            s = node.inputs.get(name)
+            if s and (s.is_linked or s.default_value > 0.0):
+                raise Unsupported(f"{name} on {node.name}")
+        color = self.input(node.inputs['Base Color'], scope)[..., :3]
+        for name in ("Metallic", "Transmission Weight"):
+            s = node.inputs.get(name)
+            if s:
+                color = color * (1.0 - self.input(s, scope))
+        return color
+
+    def _node_bsdf_diffuse(self, node, sock, scope):
+        return self.input(node.inputs['Color'], scope)[..., :3]
+
+    def _node_bsdf_transparent(self, node, sock, scope):
+        return np.zeros(3, dtype=np.float32)
+
+    _node_emission = _node_bsdf_transparent
+    _node_holdout = _node_bsdf_transparent
+
+    def _node_mix_shader(self, node, sock, scope):
+        f = np.clip(self.input(node.inputs[0], scope), 0.0, 1.0)
+        a = self.input(node.inputs[1], scope)
+        b = self.input(node.inputs[2], scope)
+        return a + (b - a) * f
+
+    def _node_add_shader(self, node, sock, scope):
+        return self.input(node.inputs[0], scope) + self.input(node.inputs[1], scope)
+
+    def surface(self, mat):
+        """Diffuse color (n, 3) of mat's Cycles surface"""
+        if not mat.use_nodes or not mat.node_tree:
+            raise Unsupported(f"{mat.name} has no node tree")
+        outputs = [n for n in mat.node_tree.nodes if n.type == 'OUTPUT_MATERIAL' and n.target in ('ALL', 'CYCLES')]
+        out = next((n for n in outputs if n.is_active_output), outputs[0] if outputs else None)
+        if out is None:
+            raise Unsupported(f"{mat.name} has no material output")
+        return np.broadcast_to(self.input(out.inputs['Surface']), (self.n, 3))
+
+# --- RASTERIZATION ---
+# Triangles are grouped by bounding-box size (rounded up to the next step of
+# _BOX_STEPS, so a box wastes at most ~1.5x its area) and each group is tested
+# against its texel grids in one batched edge-function pass, instead of one
+# meshgrid per triangle.
+_RASTER_CHUNK = 1 << 20  # texels tested per batch
+_BOX_STEPS = np.unique(np.ceil(1.25 ** np.arange(64)).astype(np.int64))
+
+def rasterize(tri_uv, res):
+    """Texels whose centers fall inside UV triangles (T, 3, 2) in 0-1 space.
+    Returns (flat pixel index, triangle index, barycentric weights (n, 3))."""
+    pts = tri_uv * res
+    x_min = np.clip(np.ceil(pts[:, :, 0].min(axis=1) - 0.5), 0, res - 1).astype(np.int64)
+    x_max = np.clip(np.floor(pts[:, :, 0].max(axis=1) - 0.5), 0, res - 1).astype(np.int64)
+    y_min = np.clip(np.ceil(pts[:, :, 1].min(axis=1) - 0.5), 0, res - 1).astype(np.int64)
+    y_max = np.clip(np.floor(pts[:, :, 1].max(axis=1) - 0.5), 0, res - 1).astype(np.int64)
+
+    ax, ay = pts[:, 0, 0], pts[:, 0, 1]
+    bx, by = pts[:, 1, 0], pts[:, 1, 1]
+    cx, cy = pts[:, 2, 0], pts[:, 2, 1]
+    det = (by - cy) * (ax - cx) + (cx - bx) * (ay - cy)
+    width = x_max - x_min + 1
+    height = y_max - y_min + 1
+    tri_ids = np.nonzero((width > 0) & (height > 0) & (np.abs(det) >= 1e-12))[0]
+    if not len(tri_ids):
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty((0, 3), np.float32)
+
+    step_w = np.searchsorted(_BOX_STEPS, width[tri_ids])
+    step_h = np.searchsorted(_BOX_STEPS, height[tri_ids])
+    buckets = step_w * len(_BOX_STEPS) + step_h
+
+    pix, tris, bary = [], [], []
+    for bucket in np.unique(buckets):
+        members = tri_ids[buckets == bucket]
+        bw = int(_BOX_STEPS[bucket // len(_BOX_STEPS)])
+        bh = int(_BOX_STEPS[bucket % len(_BOX_STEPS)])
+        chunk = max(1, _RASTER_CHUNK // (bw * bh))
+        for i in range(0, len(members), chunk):
+            t = members[i:i + chunk]
+            t3 = t[:, None, None]
+            gx = x_min[t3] + np.arange(bw)[None, None, :]
+            gy = y_min[t3] + np.arange(bh)[None, :, None]
+            px, py = gx + 0.5, gy + 0.5
+            l0 = ((by[t3] - cy[t3]) * (px - cx[t3]) + (cx[t3] - bx[t3]) * (py - cy[t3])) / det[t3]
+            l1 = ((cy[t3] - ay[t3]) * (px - cx[t3]) + (ax[t3] - cx[t3]) * (py - cy[t3])) / det[t3]
+            l2 = 1.0 - l0 - l1
+            inside = ((gx <= x_max[t3]) & (gy <= y_max[t3])
+                      & (l0 >= -_EPS) & (l1 >= -_EPS) & (l2 >= -_EPS))
+            k, yy, xx = np.nonzero(inside)
+            if not len(k):
+                continue
+            pix.append((y_min[t[k]] + yy) * res + x_min[t[k]] + xx)
+            tris.append(t[k])
+            bary.append(np.stack([l0[k, yy, xx], l1[k, yy, xx], l2[k, yy, xx]], axis=1))
+    if not pix:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty((0, 3), np.float32)
+    pix, tris, bary = np.concatenate(pix), np.concatenate(tris), np.concatenate(bary)
+    # Triangle order, so where UV islands overlap the later triangle still wins
+    order = np.argsort(tris, kind="stable")
+    return pix[order], tris[order], bary[order].astype(np.float32)
+
+def dilate(rgba, mask, margin=MARGIN):
+    """Grow covered texels outward by margin pixels, like the bake margin"""
+    h, w = mask.shape
+    for _ in range(margin):
+        padded_mask = np.pad(mask, 1)
+        padded = np.pad(rgba, ((1, 1), (1, 1), (0, 0)))
+        grown = mask.copy()
+        for dy, dx in _NEIGHBORS:
+            take = padded_mask[1 + dy:1 + dy + h, 1 + dx:1 + dx + w] & ~grown
+            rgba[take] = padded[1 + dy:1 + dy + h, 1 + dx:1 + dx + w][take]
+            grown |= take
+        mask = grown
+    return rgba
+
+# --- PUBLIC API ---
+def transfer_pixels(job, depsgraph, sampler):
+    """Byte-image pixel buffer (res * res * 4, sRGB) of job's diffuse color, or Unsupported"""
+    obj = job.obj
+    res = job.resolution
+    default_uv = next((l.name for l in obj.data.uv_layers if l.active_render), job.original_uv.name)
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    try:
+        if mesh.uv_layers.get(job.original_uv.name) is None:
+            raise Unsupported("UV map missing after modifiers")
+        mesh.calc_loop_triangles()
+        n_tris = len(mesh.loop_triangles)
+        loops = np.empty(n_tris * 3, dtype=np.int32)
+        mat_index = np.empty(n_tris, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("loops", loops)
+        mesh.loop_triangles.foreach_get("material_index", mat_index)
+
+        slots = obj_eval.material_slots
+        used = {slots[i].material.original if i < len(slots) and slots[i].material else None
+                for i in np.unique(mat_index)}
+        if used != {job.mat}:
+            raise Unsupported("mesh uses more than the baked material")
+
+        def layer_uvs(name):
+            layer = mesh.uv_layers.get(name)
+            if layer is None:
+                raise Unsupported(f"UV map {name} missing")
+            uvs = np.empty(len(layer.data) * 2, dtype=np.float32)
+            layer.data.foreach_get("uv", uvs)
+            return uvs.reshape(-1, 2)[loops].reshape(-1, 3, 2)
+
+        tri_uv = layer_uvs(job.original_uv.name)
+        pix, tris, bary = rasterize(tri_uv - job.uv_offset, res)
+        uv_cache = {}
+
+        def texel_uv(name):
+            if name not in uv_cache:
+                uv_cache[name] = np.einsum('nk,nkd->nd', bary, layer_uvs(name)[tris])
+            return uv_cache[name]
+
+        graph = NodeGraph(len(pix), texel_uv, default_uv, sampler)
+        rgb = graph.surface(job.mat)
+    finally:
+        obj_eval.to_mesh_clear()
+
+    rgba = np.zeros((res * res, 4), dtype=np.float32)
+    rgba[pix, :3] = linear_to_srgb(rgb)
+    rgba[pix, 3] = 1.0
+    mask = np.zeros(res * res, dtype=bool)
+    mask[pix] = True
+    return dilate(rgba.reshape(res, res, 4), mask.reshape(res, res)).ravel()
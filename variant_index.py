@@ -0,0 +1,159 @@
+import bpy
+import os
+import json
+import time
+import numpy as np
+from . import hash_utils
+from . import registry
+
+# --- STYLE VARIANT INDEX ---
+# Offline catalog of every style option on every *_GN object in the library:
+# vertex/face counts, bounds, material prefixes and a geometry hash. Built
+# headlessly with index_cli.py so runtime code can look variants up without
+# evaluating Geometry Nodes.
+INDEX_VERSION = 1
+MAX_PER_SOCKET = 64
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def get_index_path():
+    return os.path.join(ADDON_DIR, "resources", "variant_index.json")
+
+# --- BUILD ---
+def socket_range(mod, identifier, cap=MAX_PER_SOCKET):
+    """(values to try, bounded) for an integer modifier input, from its UI limits. Without a max
+    the range runs to the cap and bounded is False: the caller has to find the real end."""
+    try:
+        ui = mod.id_properties_ui(identifier).as_dict()
+    except TypeError:
+        ui = {}
+    lo = max(int(ui.get("min", 0)), 0)
+    hi = ui.get("soft_max", ui.get("max"))
+    if hi is None:
+        return range(lo, lo + cap), False
+    return range(lo, min(int(hi), lo + cap - 1) + 1), True
+
+def describe_mesh(mesh):
+    """Counts, local bounds, material prefixes and content hash of an evaluated mesh"""
+    n_verts = len(mesh.vertices)
+    co = np.empty(n_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+
+    h = hash_utils.new_hash()
+    h.update(co.tobytes())
+    hash_utils.hash_topology(mesh, h, mesh.uv_layers.active)
+
+    used = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", used)
+    prefixes = sorted({
+        mesh.materials[i].name.split(".")[0]
+        for i in np.unique(used) if i < len(mesh.materials) and mesh.materials[i]
+    })
+    return {
+        "verts": n_verts,
+        "faces": len(mesh.polygons),
+        "bbox": [co.min(axis=0).round(5).tolist(), co.max(axis=0).round(5).tolist()] if n_verts else None,
+        "materials": prefixes,
+        "hash": h.hexdigest()[:16],
+    }
+
+def index_object(context, obj, mod, sockets):
+    entries = {}
+    for sock in sockets:
+        if sock not in mod:
+            continue
+        original = mod[sock]
+        values = {}
+        first = last = None
+        try:
+            candidates, bounded = socket_range(mod, sock)
+            for value in candidates:
+                mod[sock] = value
+                obj.update_tag()
+                depsgraph = context.evaluated_depsgraph_get()
+                obj_eval = obj.evaluated_get(depsgraph)
+                mesh = obj_eval.to_mesh()
+                try:
+                    desc = describe_mesh(mesh)
+                finally:
+                    obj_eval.to_mesh_clear()
+                # Past the last real option the menu clamps (repeats the previous
+                # output) or wraps (repeats the first); those values don't exist
+                if not bounded and desc in (first, last):
+                    break
+                values[str(value)] = desc
+                first = first or desc
+                last = desc
+            else:
+                if not bounded:
+                    print(f"HyTailor Index: {sock} has no max and still changes at {len(candidates)} values; "
+                          f"the rest are not indexed")
+        finally:
+            mod[sock] = original
+            obj.update_tag()
+        entries[sock] = values
+    return entries
+
+def build_index(context, library_path, out_path=None):
+    """Spawn the library character and sweep every style socket. Returns the written index."""
+    out_path = out_path or get_index_path()
+    result = bpy.ops.hychar.spawn_character(use_template_cache=False)
+    if 'FINISHED' not in result:
+        raise RuntimeError(f"Could not spawn from {library_path}")
+
+    t_start = time.perf_counter()
+    # Rest pose so bounds don't depend on whatever pose the library was saved in
+    rig = registry.get_rig()
+    if rig:
+        rig.data.pose_position = 'REST'
+
+    objects = {}
+    for prefix, sockets in registry.STYLE_SOCKETS.items():
+        obj, mod = registry.get_gn(prefix)
+        if not obj or not mod:
+            print(f"HyTailor Index: {prefix} not found, skipped")
+            continue
+        t_obj = time.perf_counter()
+        objects[prefix] = index_object(context, obj, mod, tuple(sockets.values()))
+        count = sum(len(v) for v in objects[prefix].values())
+        print(f"HyTailor Index: {prefix} {count} variants in {time.perf_counter() - t_obj:.2f}s")
+
+    index = {
+        "version": INDEX_VERSION,
+        "library_hash": hash_utils.hash_file(library_path),
+        "seconds": round(time.perf_counter() - t_start, 3),
+        "objects": objects,
+    }
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return index
+
+# --- LOOKUP ---
+_loaded = {"stamp": None, "index": None}
+
+def load_index(path=None):
+    """The index as a dict (reloaded when the file changes), or None if it hasn't been built"""
+    path = path or get_index_path()
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (path, st.st_mtime_ns, st.st_size)
+    if _loaded["stamp"] != stamp:
+        with open(path, "r", encoding="utf-8") as f:
+            _loaded["index"] = json.load(f)
+        _loaded["stamp"] = stamp
+    return _loaded["index"]
+
+def get_variants(gn_prefix, socket):
+    """{value: metadata} for one style socket, or None without an index"""
+    index = load_index()
+    if not index:
+        return None
+    return index["objects"].get(gn_prefix, {}).get(socket)
+
+def get_variant(gn_prefix, socket, value):
+    variants = get_variants(gn_prefix, socket)
+    return variants.get(str(value)) if variants else None